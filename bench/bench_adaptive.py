@@ -0,0 +1,125 @@
+"""
+Fixed versus adaptive check intervals: price changes caught per request.
+
+python bench/bench_adaptive.py [--products 200] [--duration 120] [--interval 5]
+                               [--budget 10] [--min-interval 1] [--max-interval 300]
+                               [--change-rate 6] [--volatile 0.1] [--calm-factor 0.01]
+
+Runs the fake Amazon in-process (so its true change counts are readable) with
+--volatile of the products changing --change-rate times a minute and the rest
+--calm-factor times as often. Each mode tracks every product for --duration
+seconds against a fresh catalog: "fixed" checks every --interval seconds,
+"adaptive" uses AdaptiveIntervals under a --budget of requests per second.
+Reports requests made, changes that happened, changes caught (checks that saw
+a new price) and changes caught per 100 requests, split into the volatile and
+calm groups.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from functools import partial
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+ROOT  = os.path.dirname(BENCH)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH)
+
+import fake_amazon  # noqa: E402
+from bench_tracker import asin  # noqa: E402
+
+
+def run_mode(args, mode: str) -> dict:
+    from tracker.adaptive import AdaptiveIntervals
+    from tracker.engine import TrackerEngine
+    from tracker.fetcher import SessionPool, fetch_price
+
+    catalog = fake_amazon.Catalog("whole_fraction:1", change_rate=args.change_rate,
+                                  volatile=args.volatile, calm_factor=args.calm_factor)
+    server  = fake_amazon.start(0, catalog)
+    pool    = SessionPool(pool_maxsize=args.concurrency)
+    base    = f"http://127.0.0.1:{server.server_port}/dp/"
+    urls    = {base + asin(i): asin(i) for i in range(args.products)}
+    group   = {code: "volatile" if catalog.rate(code) == args.change_rate else "calm"
+               for code in urls.values()}
+
+    requests: Counter = Counter()
+    caught: Counter = Counter()
+
+    def on_result(r):
+        g = group[urls[r.url]]
+        requests[g] += 1
+        if r.kind in ("drop", "rise"):
+            caught[g] += 1
+
+    intervals = None
+    if mode == "adaptive":
+        intervals = AdaptiveIntervals(args.min_interval, args.max_interval, budget=args.budget,
+                                      horizon=args.horizon, retune_every=5)
+    engine = TrackerEngine(partial(fetch_price, pool=pool), on_result,
+                           concurrency=args.concurrency, intervals=intervals)
+    for url in urls:
+        engine.add(url, "", args.interval)
+
+    async def main():
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(args.duration)
+        engine.stop()
+        await task
+
+    started = time.time()
+    asyncio.run(main())
+    wall = time.time() - started
+    pool.close()
+    server.shutdown()
+
+    happened: Counter = Counter()
+    for code, n in catalog.versions().items():
+        happened[group[code]] += n
+    row = {"mode": mode, "requests_per_sec": round(sum(requests.values()) / wall, 2)}
+    for g in ("volatile", "calm", "total"):
+        req = sum(requests.values()) if g == "total" else requests[g]
+        got = sum(caught.values()) if g == "total" else caught[g]
+        hap = sum(happened.values()) if g == "total" else happened[g]
+        row[g] = {
+            "requests":        req,
+            "changes":         hap,
+            "caught":          got,
+            "caught_per_100":  round(got / req * 100, 2) if req else None,
+        }
+    if intervals is not None:
+        row["intervals"] = intervals.stats(engine.state)
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=120)
+    parser.add_argument("--interval", type=float, default=5)
+    parser.add_argument("--budget", type=float, default=10)
+    parser.add_argument("--min-interval", type=float, default=1)
+    parser.add_argument("--max-interval", type=float, default=300)
+    parser.add_argument("--horizon", type=float, default=600)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--change-rate", type=float, default=6)
+    parser.add_argument("--volatile", type=float, default=0.1)
+    parser.add_argument("--calm-factor", type=float, default=0.01)
+    parser.add_argument("--modes", default="fixed,adaptive")
+    args = parser.parse_args()
+
+    rows = [run_mode(args, mode) for mode in args.modes.split(",")]
+    for row in rows:
+        print(json.dumps(row), flush=True)
+    for row in rows:
+        t = row["total"]
+        print(f"{row['mode']:>9}: {t['requests']:>6} requests  {t['caught']:>4}/{t['changes']:<4} changes caught"
+              f"  ({t['caught_per_100']} per 100 requests)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Cost of evaluating alert rules for a whole batch of check results.
+
+python bench/bench_analytics.py [--products 20000] [--points 60]
+
+Writes a synthetic history (--points checks per product over 30 days) to a
+temporary database, then times one batch of --products fresh results:
+loading their series from SQLite, summarize(), and AlertRules.evaluate(),
+with NumPy and with the pure-Python fallback. An AlertBatcher is then timed on
+the same batch cold (history loaded) and on a second tick (warm, moments
+only).
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker import analytics  # noqa: E402
+from tracker.analytics import DAY, AlertBatcher, AlertRules, SeriesBatch, summarize  # noqa: E402
+from tracker.engine import CheckResult  # noqa: E402
+from tracker.history import HistoryStore  # noqa: E402
+
+
+def fill(store: HistoryStore, products: list[str], points: int, now: float) -> None:
+    rng = random.Random(1)
+    for url in products:
+        price = rng.uniform(5, 500)
+        for k in range(points):
+            price = max(0.99, price * rng.uniform(0.97, 1.03))
+            store.record(url, now - 30 * DAY + k * (30 * DAY / points), round(price, 2))
+    store.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--points", type=int, default=60)
+    args = parser.parse_args()
+
+    now      = time.time()
+    products = [f"https://www.amazon.com/dp/B{i:09d}" for i in range(args.products)]
+    rng      = random.Random(2)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HistoryStore(os.path.join(tmp, "history.db"), batch_size=5000)
+        t = time.perf_counter()
+        fill(store, products, args.points, now)
+        print(f"filled {args.products * args.points} checks in {time.perf_counter() - t:.1f}s",
+              file=sys.stderr)
+
+        latest  = store.latest_all()
+        results = [CheckResult(url, "me@example.com", "same", round(latest[url][1] * rng.uniform(0.9, 1.05), 2),
+                               latest[url][1], None, args.points, ts=now)
+                   for url in products]
+        rules = AlertRules(min_change=5, drop_from_high=15, new_low=True,
+                           targets={url: 50.0 for url in products[::10]})
+
+        t = time.perf_counter()
+        batch = SeriesBatch.from_store(store, products, rules.days, now - 1)
+        load = time.perf_counter() - t
+
+        numpy = analytics.np
+        for mode in ("numpy", "python"):
+            if mode == "numpy" and numpy is None:
+                continue
+            analytics.np = numpy if mode == "numpy" else None
+            t = time.perf_counter()
+            summary = summarize(batch)
+            summed = time.perf_counter() - t
+            t = time.perf_counter()
+            alerts = rules.evaluate(results, summary)
+            evaluated = time.perf_counter() - t
+            batcher = AlertBatcher(rules, lambda alert: None, store, interval=3600)
+            t = time.perf_counter()
+            batcher.evaluate(results)
+            cold = time.perf_counter() - t
+            later = [replace(r, last=r.price, price=round(r.price * rng.uniform(0.95, 1.05), 2), ts=now + 60)
+                     for r in results]
+            t = time.perf_counter()
+            batcher.evaluate(later)
+            warm = time.perf_counter() - t
+            batcher.close()
+            print(json.dumps({
+                "mode":            mode,
+                "products":        args.products,
+                "points":          len(batch.prices),
+                "load_ms":         round(load * 1000, 1),
+                "summarize_ms":    round(summed * 1000, 1),
+                "evaluate_ms":     round(evaluated * 1000, 1),
+                "alerts":          len(alerts),
+                "batcher_cold_ms": round(cold * 1000, 1),
+                "batcher_warm_ms": round(warm * 1000, 1),
+            }), flush=True)
+        analytics.np = numpy
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
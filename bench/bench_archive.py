@@ -0,0 +1,101 @@
+"""
+Page archive: write throughput, dedup and compression, retention, and replay
+speed per extractor stack.
+
+python bench/bench_archive.py [--products 500] [--checks 20] [--change 0.1]
+                              [--workers 0,2] [--extractors scan;scan,soup]
+
+Renders fake Amazon pages (bench/fixtures, the default --mix plus a few
+captchas) for --products products over --checks rounds; each round a
+--change fraction of prices move, so most bodies repeat. Pages go through
+PageArchive.add() as the fetcher would hand them over, with the price the
+default extractor stack finds. Reports archive size against the raw bytes,
+then replays the whole archive with each extractor stack (";"-separated)
+and worker count, and finally prunes to half its size.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH))
+sys.path.insert(0, BENCH)
+
+import fake_amazon  # noqa: E402
+from bench_tracker import asin  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--checks", type=int, default=20)
+    parser.add_argument("--change", type=float, default=0.1)
+    parser.add_argument("--captcha", type=float, default=0.02)
+    parser.add_argument("--workers", default="0,2")
+    parser.add_argument("--extractors", default="scan;scan,soup")
+    args = parser.parse_args()
+
+    from tracker.archive import PageArchive, replay, resolve_extractors
+    from tracker.extractors import extract, is_blocked_page
+    from tracker.fetcher import PriceResult
+
+    catalog  = fake_amazon.Catalog(fake_amazon.DEFAULT_MIX.replace("huge:2", "huge:1"), huge_kb=300)
+    products = [asin(i) for i in range(args.products)]
+    prices   = {code: round(random.uniform(5, 2500), 2) for code in products}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = PageArchive(os.path.join(tmp, "archive"), segment_bytes=256 * 1024)
+        raw, pages = 0, 0
+        started = time.perf_counter()
+        for _ in range(args.checks):
+            for code in products:
+                if random.random() < args.change:
+                    prices[code] = round(prices[code] * random.uniform(0.85, 1.15), 2)
+                kind = "captcha" if random.random() < args.captcha else catalog.kind(code)
+                body = catalog.render(kind, code, prices[code])
+                price, name = extract(body)
+                result = PriceResult(price=price, status=200, extractor=name,
+                                     blocked=price is None and is_blocked_page(body))
+                # add() drops pages when its queue is full; the bench wants them all
+                while archive._queue.full():
+                    time.sleep(0.001)
+                archive.add(f"https://www.amazon.com/dp/{code}", body, result)
+                raw   += len(body)
+                pages += 1
+        archive.flush()
+        write = time.perf_counter() - started
+        stats = archive.stats()
+        print(json.dumps({
+            "pages":          pages,
+            "raw_mb":         round(raw / 1e6, 1),
+            "write_s":        round(write, 2),
+            "pages_per_s":    round(pages / write),
+            "distinct":       stats["bodies"],
+            "on_disk_mb":     round(stats["on_disk_bytes"] / 1e6, 2),
+            "vs_raw":         round(raw / stats["on_disk_bytes"], 1),
+            "segments":       stats["segments"],
+        }), flush=True)
+
+        for spec in args.extractors.split(";"):
+            for workers in map(int, args.workers.split(",")):
+                report = replay(archive, resolve_extractors(spec), workers=workers)
+                print(json.dumps({"extractors": spec, "workers": workers, **report.summary()}), flush=True)
+
+        archive.close()
+        on_disk = stats["on_disk_bytes"]
+        archive.max_bytes = on_disk // 2
+        dropped = archive.prune()
+        archive = PageArchive(archive.directory)
+        after   = archive.stats()
+        archive.close()
+        print(json.dumps({"pruned_segments": dropped, "pages_left": after["pages"],
+                          "on_disk_mb": round(after["on_disk_bytes"] / 1e6, 2)}), flush=True)
+
+
+if __name__ == "__main__":
+    main()
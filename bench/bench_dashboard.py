@@ -0,0 +1,77 @@
+"""
+Main-thread cost of the GUI dashboard's model at large watchlists.
+
+python bench/bench_dashboard.py [--products 10000,100000] [--results 2000] [--rows 25]
+
+Fills a StateTable with random prices and results, then times what the GUI
+does on its thread: note() for one UI tick's worth of results (the app
+drains up to 2000 per 100 ms tick), refresh() for every sort key and for a
+text and a status filter, and row() for one screen of visible rows. No
+display is needed. Widget work is bounded by the visible rows, whatever the
+product count.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker.dashboard import COLUMNS, DashboardModel  # noqa: E402
+from tracker.engine import CheckResult  # noqa: E402
+from tracker.state import StateTable  # noqa: E402
+
+
+def ms(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return round(best * 1000, 2)
+
+
+def measure(n: int, results: int, rows: int) -> dict:
+    table = StateTable()
+    urls  = [f"https://www.amazon.com/dp/B{i:09d}" for i in range(n)]
+    for url in urls:
+        price = round(random.uniform(5, 500), 2)
+        table.add(url, "me@example.com", 60.0, price, price, 3)
+        if random.random() < 0.5:
+            table.record(table.get(url).id, round(price * random.uniform(0.8, 1.2), 2))
+    model = DashboardModel(table)
+    kinds = ("same", "drop", "rise", "error")
+    batch = [CheckResult(random.choice(urls), "", random.choice(kinds), 10.0, 11.0, 11.0, 4,
+                         ts=time.time()) for _ in range(results)]
+    for r in random.sample(batch, len(batch)):
+        model.note(r)
+
+    row = {"products": n, "note_tick_ms": ms(lambda: [model.note(r) for r in batch])}
+    for key in COLUMNS:
+        model.sort_key = key
+        row[f"sort_{key}_ms"] = ms(model.refresh)
+    model.sort_key, model.query = "product", "b00000"
+    row["filter_text_ms"] = ms(model.refresh)
+    model.query, model.filter = "", "drops"
+    row["filter_status_ms"] = ms(model.refresh)
+    model.filter = "all"
+    order = model.refresh()
+    row["visible_rows_ms"] = ms(lambda: [model.row(pid) for pid in order[:rows]])
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", default="10000,100000")
+    parser.add_argument("--results", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=25)
+    args = parser.parse_args()
+    for n in map(int, args.products.split(",")):
+        print(json.dumps(measure(n, args.results, args.rows)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
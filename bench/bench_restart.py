@@ -0,0 +1,136 @@
+"""
+Cold start versus warm restart from a snapshot: time to steady state.
+
+python bench/bench_restart.py [--products 2000] [--interval 30] [--warmup 40]
+                              [--duration 90] [--rate 50] [--latency 0.02]
+
+Runs the fake Amazon in-process. A first engine tracks every product for
+--warmup seconds and writes a snapshot on stop. Its first checks are spread
+evenly over one interval, standing in for a tracker that has been running
+long enough to lose its own cold-start wave. Then each mode starts a
+fresh engine on the same watchlist for --duration seconds: "cold" fetches
+everything from scratch, "warm" restores the snapshot first. The host rate
+limit is --rate requests per second, standing in for Amazon's throttling.
+
+Steady state is products / interval requests per second. Reports the peak
+rate over 1 s windows and requests in the first interval. time_to_steady is
+when the rate, in 5 s windows, last went over 1.5x steady. time_to_priced
+is when every product first had a known price; warm starts with all of
+them. Also reports snapshot size and capture / write / load + restore
+times.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from functools import partial
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+ROOT  = os.path.dirname(BENCH)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH)
+
+import fake_amazon  # noqa: E402
+from bench_tracker import asin  # noqa: E402
+
+
+def run_engine(args, urls, pool, duration, snapshots=None, restore=False, spread=False):
+    """Track `urls` for `duration` seconds. Returns (start time, result times, restore info)."""
+    from tracker.engine import TrackerEngine
+    from tracker.fetcher import fetch_price
+    from tracker.policy import FetchPolicy
+
+    times: list[float] = []
+    engine = TrackerEngine(partial(fetch_price, pool=pool), lambda r: times.append(time.time()),
+                           concurrency=args.concurrency, policy=FetchPolicy(rate=args.rate),
+                           snapshots=snapshots)
+    now = engine.scheduler.clock()
+    for i, url in enumerate(urls):
+        product = engine.add(url, "", args.interval)
+        if spread:
+            product.next_due = now + i * args.interval / len(urls)
+    info = {}
+    if restore:
+        t = time.perf_counter()
+        snapshot = snapshots.load()
+        info["restored"]   = snapshots.restore(engine, snapshot)
+        info["restore_ms"] = round((time.perf_counter() - t) * 1000, 1)
+        info["snapshot_age_s"] = round(time.time() - snapshot.saved_at, 1)
+        engine.snapshots = None
+
+    async def main():
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(duration)
+        engine.stop()
+        await task
+
+    started = time.time()
+    asyncio.run(main())
+    return started, times, info
+
+
+def summarise(args, mode, started, times, info) -> dict:
+    steady = args.products / args.interval
+    rel    = [t - started for t in times]
+    per_s  = Counter(int(t) for t in rel)
+    per_5  = Counter(int(t // 5) for t in rel)
+    over   = [w for w, n in per_5.items() if n / 5 > 1.5 * steady]
+    row = {
+        "mode":              mode,
+        "requests":          len(rel),
+        "steady_rps":        round(steady, 1),
+        "peak_rps":          max(per_s.values(), default=0),
+        "first_interval":    sum(1 for t in rel if t < args.interval),
+        "time_to_steady_s":  (max(over) + 1) * 5 if over else 0,
+        "time_to_priced_s":  0.0 if mode == "warm" else
+                             (round(sorted(rel)[args.products - 1], 1) if len(rel) >= args.products else None),
+    }
+    row.update(info)
+    return row
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--interval", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=40)
+    parser.add_argument("--duration", type=float, default=90)
+    parser.add_argument("--rate", type=float, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    from tracker.fetcher import SessionPool
+    from tracker.snapshot import SNAPSHOT_SECONDS, SnapshotStore
+
+    server = fake_amazon.start(0, fake_amazon.Catalog("whole_fraction:1"),
+                               fake_amazon.Options(latency=args.latency))
+    pool   = SessionPool(pool_maxsize=args.concurrency)
+    base   = f"http://127.0.0.1:{server.server_port}/dp/"
+    urls   = [base + asin(i) for i in range(args.products)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshots = SnapshotStore(os.path.join(tmp, "state.snap"), every=10)
+        run_engine(args, urls, pool, args.warmup, snapshots=snapshots, spread=True)
+        print(json.dumps({
+            "snapshot_bytes":   os.path.getsize(snapshots.path),
+            "capture_ms_p50":   round(SNAPSHOT_SECONDS.quantile(0.5, stage="capture") * 1000, 2),
+            "write_ms_p50":     round(SNAPSHOT_SECONDS.quantile(0.5, stage="write") * 1000, 2),
+        }), flush=True)
+        # the snapshot ages while cold runs, so warm goes first
+        for mode in ("warm", "cold"):
+            warm = mode == "warm"
+            started, times, info = run_engine(args, urls, pool, args.duration,
+                                              snapshots=snapshots if warm else None, restore=warm)
+            print(json.dumps(summarise(args, mode, started, times, info)), flush=True)
+    pool.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
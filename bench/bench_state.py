@@ -0,0 +1,112 @@
+"""
+Memory and GC cost of per-product tracker state.
+
+python bench/bench_state.py [--products 100000]
+
+Compares one dataclass object per product in a dict (the old engine layout)
+with tracker.state.StateTable. The URL strings are built first and shared by
+both, so the numbers are the state itself: bytes per product (tracemalloc),
+objects the garbage collector has to track, a full gc.collect(), a read of
+every product's last price by URL, and a scan comparing two fields across
+all products.
+"""
+
+import argparse
+import gc
+import json
+import operator
+import os
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracker.state import StateTable  # noqa: E402
+
+
+@dataclass
+class ObjectProduct:
+    url: str
+    email: str
+    interval: float
+    last_price: float | None = None
+    start_price: float | None = None
+    low_price: float | None = None
+    check_count: int = 0
+    next_due: float | None = None
+    failures: int = 0
+
+
+def build_objects(urls, prices):
+    products = {}
+    for url, price in zip(urls, prices):
+        products[url] = ObjectProduct(url, "me@example.com", 60.0, price, price, price,
+                                      12, time.monotonic() + random.random() * 60)
+    return products
+
+
+def build_table(urls, prices):
+    table = StateTable()
+    for url, price in zip(urls, prices):
+        table.add(url, "me@example.com", 60.0, price, price, 12,
+                  time.monotonic() + random.random() * 60)
+    return table
+
+
+def measure(name: str, build, urls, prices) -> dict:
+    gc.collect()
+    objects = len(gc.get_objects())
+    tracemalloc.start()
+    state = build(urls, prices)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    tracked = len(gc.get_objects()) - objects
+
+    t = time.perf_counter()
+    gc.collect()
+    collect = time.perf_counter() - t
+
+    t = time.perf_counter()
+    if isinstance(state, StateTable):
+        lasts = state.take("last_price", urls)
+    else:
+        lasts = [state[url].last_price for url in urls]
+    lookup = time.perf_counter() - t
+    assert lasts[0] == prices[0]
+
+    t = time.perf_counter()
+    if isinstance(state, StateTable):
+        below = sum(map(operator.lt, state.column("last_price"), state.column("start_price")))
+    else:
+        below = sum(p.last_price < p.start_price for p in state.values())
+    scan = time.perf_counter() - t
+    assert below == 0
+
+    n = len(urls)
+    return {
+        "layout":            name,
+        "products":          n,
+        "bytes_per_product": round(size / n, 1),
+        "gc_objects":        tracked,
+        "gc_collect_ms":     round(collect * 1000, 1),
+        "bulk_lookup_ms":    round(lookup * 1000, 1),
+        "column_scan_ms":    round(scan * 1000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100_000)
+    args = parser.parse_args()
+
+    urls   = [f"https://www.amazon.com/dp/B{i:09d}" for i in range(args.products)]
+    prices = [round(random.uniform(5, 500), 2) for _ in urls]
+    for name, build in (("objects", build_objects), ("table", build_table)):
+        print(json.dumps(measure(name, build, urls, prices)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Tracker benchmark against the local fake Amazon.
+
+python bench/bench_tracker.py [--sizes 1,100,10000] [--duration 10]
+                              [--concurrency 64] [--out results.json]
+                              [--watchers 1] [--shared] [--cache-ttl 30]
+                              [--parse-workers 0] [--parse-scaling]
+                              [--compare old.json] [fake_amazon options...]
+
+Starts bench/fake_amazon.py in its own process, then runs each watchlist size
+in a fresh child process so CPU and peak RSS belong to the tracker alone.
+Every product is polled back to back (interval 0) for --duration seconds.
+--watchers N adds each product N times under different URL spellings, and
+--shared puts a SharedFetcher (coalescing + --cache-ttl cache) in front.
+--parse-workers N parses on a process pool; --parse-scaling also measures
+tree-parser throughput on 1..cpu_count worker processes.
+Also times each extractor on the fixtures. Results are written as JSON;
+--compare prints the ratio against an earlier run.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from functools import partial
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+ROOT  = os.path.dirname(BENCH)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH)
+
+import fake_amazon  # noqa: E402
+
+
+def asin(i: int) -> str:
+    return f"B{i + 1:09d}"
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss survives exec on Linux, so it would report the parent's peak
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_child(args) -> dict:
+    from tracker.cache import SharedFetcher
+    from tracker.engine import TrackerEngine
+    from tracker.fetcher import SessionPool, fetch_price
+
+    pool  = SessionPool(pool_maxsize=args.concurrency, conditional=args.etag,
+                        stream=not args.no_stream, drain_bytes=args.drain_kb * 1024,
+                        extract_workers=args.parse_workers)
+    fetch = partial(fetch_price, pool=pool)
+    if args.shared:
+        fetch = SharedFetcher(fetch, ttl=args.cache_ttl)
+
+    latencies: list[float] = []
+    kinds: Counter = Counter()
+    extractors: Counter = Counter()
+
+    def on_result(r):
+        kinds[r.kind] += 1
+        if r.fetch is not None:
+            latencies.append(r.fetch.latency)
+            extractors[r.fetch.extractor or ("304" if r.fetch.not_modified else "none")] += 1
+
+    engine = TrackerEngine(fetch, on_result, concurrency=args.concurrency, jitter=0)
+    base = f"http://127.0.0.1:{args.port}"
+    spellings = ("/dp/{}", "/gp/product/{}?ref=bench", "/Bench-Item/dp/{}/ref=sr_1_1")
+    for i in range(args.size):
+        for w in range(args.watchers):
+            path = spellings[w % len(spellings)].format(asin(i))
+            engine.add(f"{base}{path}{'&' if '?' in path else '?'}w={w}", "", 0)
+
+    async def main():
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(args.duration)
+        engine.stop()
+        await task
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    asyncio.run(main())
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    pool.close()
+
+    checks = len(latencies)
+    return {
+        "products":        args.size,
+        "checks":          checks,
+        "checks_per_sec":  round(checks / wall, 1),
+        "p50_latency_ms":  round(percentile(latencies, 0.50) * 1000, 2) if checks else None,
+        "p99_latency_ms":  round(percentile(latencies, 0.99) * 1000, 2) if checks else None,
+        "cpu_ms_per_check": round(cpu / checks * 1000, 3) if checks else None,
+        "peak_rss_mb":     round(peak_rss_mb(), 1),
+        "kinds":           dict(kinds),
+        "extractors":      dict(extractors),
+        "connections":     pool.stats(),
+        "requests_per_check": round(pool.stats()["requests"] / checks, 3) if checks else None,
+        "cache":           fetch.stats() if args.shared else None,
+    }
+
+
+def bench_extractors(rounds: int = 20) -> dict:
+    from tracker.extractors import EXTRACTORS
+
+    catalog = fake_amazon.Catalog()
+    results = {}
+    for kind in fake_amazon.KINDS:
+        page = catalog.render(kind, "B000000001", 1299.99)
+        row = {"bytes": len(page)}
+        for name, fn in EXTRACTORS:
+            n = rounds if name != "soup" else max(1, rounds // 10)
+            t = time.perf_counter()
+            for _ in range(n):
+                price = fn(page)
+            row[f"{name}_ms"] = round((time.perf_counter() - t) / n * 1000, 3)
+            row[f"{name}_price"] = price
+        results[kind] = row
+    return results
+
+
+def bench_parse_scaling(pages: int = 32, page_kb: int = 200) -> dict:
+    """Pages per second through the tree parsers on 1..cpu_count processes."""
+    from tracker.extractors import EXTRACTORS, ProcessExtractor
+
+    catalog = fake_amazon.Catalog(huge_kb=page_kb)
+    bodies  = [catalog.render("huge", asin(i), 19.99 + i) for i in range(pages)]
+    parsers = [(name, fn) for name, fn in EXTRACTORS if name != "scan"]
+    results = {"page_bytes": len(bodies[0]), "extractor": parsers[0][0]}
+
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for workers in (n for n in counts if n <= (os.cpu_count() or 1)):
+        extractor = ProcessExtractor(workers)
+        list(extractor.map(bodies[:workers], parsers))  # start the workers
+        t = time.perf_counter()
+        prices = list(extractor.map(bodies, parsers))
+        elapsed = time.perf_counter() - t
+        extractor.close()
+        assert all(p is not None for p, _ in prices)
+        results[str(workers)] = round(pages / elapsed, 1)
+    return results
+
+
+def start_server(args) -> tuple[subprocess.Popen, int]:
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH, "fake_amazon.py"), "--port", "0",
+         *fake_amazon.server_args(args)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()
+    if not line.startswith("READY"):
+        proc.kill()
+        raise SystemExit("fake_amazon did not start")
+    return proc, int(line.split()[1])
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: dict, path: str) -> None:
+    with open(path, encoding="utf-8") as f:
+        old = json.load(f)
+    print(f"\nvs {path} ({old['meta'].get('revision')})")
+    for size, row in current["tracking"].items():
+        before = old.get("tracking", {}).get(size)
+        if not before:
+            continue
+        for key in ("checks_per_sec", "p50_latency_ms", "p99_latency_ms",
+                    "cpu_ms_per_check", "peak_rss_mb"):
+            if row.get(key) and before.get(key):
+                print(f"  {size:>6} products  {key:<17} {before[key]:>10} -> {row[key]:>10}"
+                      f"  ({row[key] / before[key]:.2f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1,100,10000")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--no-stream", action="store_true", help="download whole bodies")
+    parser.add_argument("--drain-kb", type=int, default=256,
+                        help="read off at most this much of a stopped stream to keep its socket")
+    parser.add_argument("--watchers", type=int, default=1, help="watchlist entries per product")
+    parser.add_argument("--shared", action="store_true", help="coalesce and cache fetches per ASIN")
+    parser.add_argument("--cache-ttl", type=float, default=30, help="SharedFetcher TTL in seconds")
+    parser.add_argument("--parse-workers", type=int, default=0, help="extraction processes, 0 = inline")
+    parser.add_argument("--parse-scaling", action="store_true", help="measure parse throughput per core count")
+    parser.add_argument("--out", default=None, help="JSON file (default bench/results/<time>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results JSON to compare against")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    fake_amazon.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    server, port = start_server(args)
+    results = {
+        "meta": {
+            "revision":  git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "cpus":      os.cpu_count(),
+            "args":      {k: v for k, v in vars(args).items() if k not in ("child", "size", "port")},
+        },
+        "extract":  bench_extractors(),
+        "tracking": {},
+    }
+    if args.parse_scaling:
+        results["parse_scaling"] = bench_parse_scaling()
+        print("parse pages/s by worker count:", results["parse_scaling"], flush=True)
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            proc = subprocess.run(
+                [sys.executable, __file__, "--child", "--size", str(size),
+                 "--port", str(port), *sys.argv[1:]],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                continue
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            results["tracking"][str(size)] = row
+            print(f"{size:>6} products  {row['checks_per_sec']:>8} checks/s  "
+                  f"p50 {row['p50_latency_ms']} ms  p99 {row['p99_latency_ms']} ms  "
+                  f"cpu {row['cpu_ms_per_check']} ms/check  rss {row['peak_rss_mb']} MB",
+                  flush=True)
+    finally:
+        server.kill()
+
+    out = args.out
+    if out is None:
+        os.makedirs(os.path.join(BENCH, "results"), exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(BENCH, "results", f"{stamp}-{results['meta']['revision'] or 'local'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"wrote {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Lease-based work queue benchmark: throughput by worker count, double checks,
+and recovery when a worker is killed.
+
+python bench/bench_workers.py [--workers 1,2,4] [--products 2000] [--interval 5]
+                              [--duration 15] [--concurrency 8] [--lease 5]
+                              [--kill-one] [fake_amazon options...]
+
+Starts bench/fake_amazon.py (default --latency 0.2, so the run is I/O-bound),
+fills a fresh queue file, then runs N worker processes against it for
+--duration seconds. Every completed check is logged; a product checked again
+sooner than --interval is a double check. --kill-one SIGKILLs one worker
+halfway through and reports how long its leased products stayed stuck.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from functools import partial
+
+BENCH = os.path.dirname(os.path.abspath(__file__))
+ROOT  = os.path.dirname(BENCH)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH)
+
+import fake_amazon  # noqa: E402
+from bench_tracker import asin, start_server  # noqa: E402
+
+
+def run_child(args) -> None:
+    from tracker.fetcher import SessionPool, fetch_price
+    from tracker.leases import LeaseWorker, WorkQueue
+
+    pool = SessionPool(pool_maxsize=args.concurrency)
+    log  = open(args.log, "w", encoding="utf-8")
+
+    def on_result(r):
+        log.write(f"{r.url}\t{r.ts}\n")
+
+    worker = LeaseWorker(WorkQueue(args.queue), partial(fetch_price, pool=pool), on_result,
+                         concurrency=args.concurrency, lease=args.lease, jitter=0)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, worker.stop)
+        await worker.run()
+
+    asyncio.run(main())
+    log.close()
+
+
+def run_workers(args, port: int, n: int, tmp: str) -> dict:
+    from tracker.leases import WorkQueue
+
+    queue_path = os.path.join(tmp, f"queue-{n}.db")
+    queue = WorkQueue(queue_path)
+    base  = f"http://127.0.0.1:{port}/dp/"
+    queue.add_many((base + asin(i), "", args.interval) for i in range(args.products))
+    queue.close()
+
+    logs  = [os.path.join(tmp, f"log-{n}-{i}.tsv") for i in range(n)]
+    procs = [
+        subprocess.Popen([sys.executable, __file__, "--child", "--queue", queue_path,
+                          "--log", log, "--concurrency", str(args.concurrency),
+                          "--lease", str(args.lease)])
+        for log in logs
+    ]
+    started = time.time()
+    killed_at = None
+    if args.kill_one and n > 1:
+        time.sleep(args.duration / 2)
+        procs[0].kill()
+        killed_at = time.time()
+        time.sleep(args.duration / 2)
+    else:
+        time.sleep(args.duration)
+    for p in procs:
+        if p.poll() is None:
+            p.send_signal(signal.SIGTERM)
+    for p in procs:
+        p.wait()
+    wall = time.time() - started
+
+    checks: dict[str, list[float]] = defaultdict(list)
+    for log in logs:
+        with open(log, encoding="utf-8") as f:
+            for line in f:
+                url, _, ts = line.rstrip("\n").partition("\t")
+                checks[url].append(float(ts))
+
+    total, early = 0, 0
+    stuck = 0.0
+    for url, stamps in checks.items():
+        stamps.sort()
+        total += len(stamps)
+        for a, b in zip(stamps, stamps[1:]):
+            gap = b - a
+            if gap < args.interval * 0.95:
+                early += 1
+            if killed_at is not None and a < killed_at < b:
+                stuck = max(stuck, gap - args.interval)
+    return {
+        "workers":        n,
+        "checks":         total,
+        "checks_per_sec": round(total / wall, 1),
+        "products_seen":  len(checks),
+        "double_checks":  early,
+        "max_stuck_s":    round(stuck, 1) if killed_at is not None else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--interval", type=float, default=5)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--lease", type=float, default=5)
+    parser.add_argument("--kill-one", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--queue", help=argparse.SUPPRESS)
+    parser.add_argument("--log", help=argparse.SUPPRESS)
+    fake_amazon.add_arguments(parser)
+    parser.set_defaults(latency=0.2, mix="whole_fraction:1")
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    server, port = start_server(args)
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for n in (int(s) for s in args.workers.split(",")):
+                row = run_workers(args, port, n, tmp)
+                rows.append(row)
+                print(json.dumps(row), flush=True)
+    finally:
+        server.kill()
+    if rows:
+        base = rows[0]["checks_per_sec"] / rows[0]["workers"]
+        for row in rows:
+            print(f"{row['workers']:>3} workers  {row['checks_per_sec']:>8} checks/s  "
+                  f"({row['checks_per_sec'] / base / row['workers']:.0%} of linear)  "
+                  f"double checks {row['double_checks']}")
+
+
+if __name__ == "__main__":
+    main()
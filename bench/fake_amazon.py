@@ -0,0 +1,268 @@
+"""
+Local fake Amazon serving the recorded product pages in bench/fixtures.
+
+python bench/fake_amazon.py --port 8080 [--latency 0.05] [--error-rate 0.01]
+                            [--captcha-rate 0] [--slow-body 0.01] [--etag]
+                            [--mix whole_fraction:4,offscreen_only:3,missing_price:1,huge:2]
+                            [--change-rate 0] [--volatile 1] [--calm-factor 0.02]
+
+GET /dp/<ASIN> picks a fixture for the ASIN (stable across requests, weighted
+by --mix) and fills in that product's current price. "huge" is the
+whole+fraction page padded to --huge-kb. Prices move --change-rate times per
+minute per product; with --volatile below 1 only that fraction of products
+does, the rest move --calm-factor times as often. Prints "READY <port>" once
+listening.
+"""
+
+import argparse
+import http.server
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+KINDS = ("whole_fraction", "offscreen_only", "missing_price", "huge")
+DEFAULT_MIX = "whole_fraction:4,offscreen_only:3,missing_price:1,huge:2"
+
+_ASIN_RE = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})")
+
+
+def _filler(kb: int) -> str:
+    block = (
+        '<div class="a-section a-spacing-small"><div class="a-row"><span class="a-size-base">'
+        'Customers who viewed this item also viewed</span><ul class="a-carousel">'
+        '<li class="a-carousel-card"><a class="a-link-normal" href="/dp/B0FILLER00">'
+        '<img alt="" src="https://m.media-amazon.com/images/I/filler._AC_UL320_.jpg"></a></li>'
+        '</ul></div></div>\n'
+        '<script type="text/javascript">P.when("A","ready").execute(function(A){'
+        'A.state("dp-filler",{"asin":"B0FILLER00","rating":4.5,"count":1024});});</script>\n'
+    )
+    return block * max(1, kb * 1024 // len(block))
+
+
+class Catalog:
+    """Per-ASIN fixture choice and price, moved on a Poisson clock."""
+
+    def __init__(self, mix: str = DEFAULT_MIX, huge_kb: int = 1500,
+                 change_rate: float = 0.0, seed: int = 1,
+                 volatile: float = 1.0, calm_factor: float = 0.02):
+        self.change_rate = change_rate
+        self.seed        = seed
+        self.volatile    = volatile
+        self.calm_factor = calm_factor
+        self.templates: dict[str, list[str]] = {}
+        for kind in KINDS:
+            name = "whole_fraction" if kind == "huge" else kind
+            with open(os.path.join(FIXTURES, f"{name}.html"), encoding="utf-8") as f:
+                text = f.read()
+            text = text.replace("{{FILLER}}", _filler(huge_kb) if kind == "huge" else "")
+            self.templates[kind] = re.split(r"(\{\{[A-Z]+\}\})", text)
+        with open(os.path.join(FIXTURES, "captcha.html"), encoding="utf-8") as f:
+            self.templates["captcha"] = re.split(r"(\{\{[A-Z]+\}\})", f.read())
+
+        self.weights: list[tuple[str, int]] = []
+        for part in mix.split(","):
+            kind, _, weight = part.partition(":")
+            if kind not in KINDS:
+                raise ValueError(f"unknown fixture kind {kind!r}")
+            self.weights.append((kind, int(weight or 1)))
+        self.total = sum(w for _, w in self.weights)
+
+        self._state: dict[str, list] = {}
+        self._lock  = threading.Lock()
+        self.changes = 0
+
+    def kind(self, asin: str) -> str:
+        n = zlib.crc32(asin.encode()) % self.total
+        for kind, weight in self.weights:
+            if n < weight:
+                return kind
+            n -= weight
+        return self.weights[-1][0]
+
+    def price(self, asin: str) -> tuple[float, int]:
+        """(current price, version) for the ASIN, applying any changes that are due."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(asin)
+            if state is None:
+                rng  = random.Random(zlib.crc32(asin.encode()) ^ self.seed)
+                rate = self.rate(asin)
+                state = [round(rng.uniform(5, 2500), 2), 0, self._next_change(rng, now, rate), rng, rate]
+                self._state[asin] = state
+            while state[2] <= now:
+                rng = state[3]
+                state[0] = max(0.99, round(state[0] * rng.uniform(0.85, 1.15), 2))
+                state[1] += 1
+                state[2] = self._next_change(rng, state[2], state[4])
+                self.changes += 1
+            return state[0], state[1]
+
+    def rate(self, asin: str) -> float:
+        """Price changes per minute for the ASIN: --change-rate for the volatile
+        fraction, --calm-factor times that for the rest."""
+        if zlib.crc32(b"volatile:" + asin.encode()) / 2**32 < self.volatile:
+            return self.change_rate
+        return self.change_rate * self.calm_factor
+
+    def versions(self) -> dict[str, int]:
+        """Changes so far per ASIN that has been requested."""
+        with self._lock:
+            return {asin: state[1] for asin, state in self._state.items()}
+
+    def _next_change(self, rng: random.Random, now: float, rate: float) -> float:
+        if rate <= 0:
+            return float("inf")
+        return now + rng.expovariate(rate / 60.0)
+
+    def render(self, kind: str, asin: str, price: float) -> bytes:
+        whole, fraction = f"{price:,.2f}".split(".")
+        values = {
+            "{{ASIN}}":     asin,
+            "{{PRICE}}":    f"{price:,.2f}",
+            "{{WHOLE}}":    whole,
+            "{{FRACTION}}": fraction,
+        }
+        return "".join(values.get(part, part) for part in self.templates[kind]).encode()
+
+
+class Options:
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0,
+                 captcha_rate: float = 0.0, slow_body: float = 0.0, etag: bool = False):
+        self.latency      = latency
+        self.error_rate   = error_rate
+        self.captcha_rate = captcha_rate
+        self.slow_body    = slow_body
+        self.etag         = etag
+
+
+class FakeAmazonHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    catalog: Catalog
+    options: Options
+
+    def _send(self, code: int, body: bytes, headers: dict | None = None) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if not body:
+            return
+        if self.options.slow_body:
+            for i in range(0, len(body), 16 * 1024):
+                self.wfile.write(body[i:i + 16 * 1024])
+                self.wfile.flush()
+                time.sleep(self.options.slow_body)
+        else:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        opts = self.options
+        if opts.latency:
+            time.sleep(opts.latency)
+        m = _ASIN_RE.search(self.path)
+        if not m:
+            self._send(404, b"<html><body>Page Not Found</body></html>")
+            return
+        asin = m.group(1)
+
+        if opts.error_rate and random.random() < opts.error_rate:
+            self._send(503, b"<html><body>Service Unavailable</body></html>")
+            return
+        if opts.captcha_rate and random.random() < opts.captcha_rate:
+            self._send(200, self.catalog.render("captcha", asin, 0.0))
+            return
+
+        price, version = self.catalog.price(asin)
+        headers = {}
+        if opts.etag:
+            etag = f'"{asin}-{version}"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", headers)
+                return
+        kind = self.catalog.kind(asin)
+        self._send(200, self.catalog.render(kind, asin, price), headers)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads     = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # clients that stop reading once they have the price reset the connection
+        if not isinstance(sys.exc_info()[1], (ConnectionError, TimeoutError)):
+            super().handle_error(request, client_address)
+
+
+def start(port: int = 0, catalog: Catalog | None = None, options: Options | None = None):
+    """Serve on a daemon thread and return the server (see server.server_port)."""
+    handler = type("Handler", (FakeAmazonHandler,), {
+        "catalog": catalog or Catalog(),
+        "options": options or Options(),
+    })
+    server = _Server(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--captcha-rate", type=float, default=0.0, help="fraction of robot-check pages")
+    parser.add_argument("--slow-body", type=float, default=0.0, help="seconds between 16 KB body chunks")
+    parser.add_argument("--etag", action="store_true", help="send ETags and honour If-None-Match")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="fixture weights, kind:weight,...")
+    parser.add_argument("--huge-kb", type=int, default=1500, help="size of the huge page")
+    parser.add_argument("--change-rate", type=float, default=0.0, help="price changes per product per minute")
+    parser.add_argument("--volatile", type=float, default=1.0,
+                        help="fraction of products that change at --change-rate")
+    parser.add_argument("--calm-factor", type=float, default=0.02,
+                        help="the other products change at this fraction of --change-rate")
+
+
+def server_args(args) -> list[str]:
+    """The add_arguments() options as a command line, for starting this file as a subprocess."""
+    argv = [
+        "--latency", str(args.latency), "--error-rate", str(args.error_rate),
+        "--captcha-rate", str(args.captcha_rate), "--slow-body", str(args.slow_body),
+        "--mix", args.mix, "--huge-kb", str(args.huge_kb), "--change-rate", str(args.change_rate),
+        "--volatile", str(args.volatile), "--calm-factor", str(args.calm_factor),
+    ]
+    if args.etag:
+        argv.append("--etag")
+    return argv
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8080)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = start(
+        args.port,
+        Catalog(args.mix, args.huge_kb, args.change_rate,
+                volatile=args.volatile, calm_factor=args.calm_factor),
+        Options(args.latency, args.error_rate, args.captcha_rate, args.slow_body, args.etag),
+    )
+    print(f"READY {server.server_port}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Local stand-in for the Resend API, for exercising notifications offline.
+
+python bench/resend_stub.py --port 8025 [--fail-rate 0.2] [--latency 0.05]
+RESEND_API_URL=http://127.0.0.1:8025 python -m price_tracker track ...
+
+Accepts POST /emails and POST /emails/batch, optionally failing a fraction of
+calls with 500, and prints running totals. start() runs it in-process.
+"""
+
+import argparse
+import http.server
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+
+class StubState:
+    def __init__(self, fail_rate: float = 0.0, latency: float = 0.0):
+        self.fail_rate = fail_rate
+        self.latency   = latency
+        self.counters: Counter = Counter()
+        self.emails: list[dict] = []
+        self.lock = threading.Lock()
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state: StubState
+
+    def _reply(self, code: int, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        state  = self.state
+        length = int(self.headers.get("Content-Length", 0))
+        data   = json.loads(self.rfile.read(length) or b"null")
+        if state.latency:
+            time.sleep(state.latency)
+
+        with state.lock:
+            state.counters["calls"] += 1
+            if random.random() < state.fail_rate:
+                state.counters["failed"] += 1
+                fail = True
+            else:
+                fail = False
+        if fail:
+            self._reply(500, {"name": "internal_server_error", "message": "stub failure"})
+            return
+
+        if self.path.rstrip("/") == "/emails/batch":
+            with state.lock:
+                state.counters["batches"] += 1
+                state.counters["emails"] += len(data)
+                state.emails.extend(data)
+            self._reply(200, {"data": [{"id": str(uuid.uuid4())} for _ in data]})
+        elif self.path.rstrip("/") == "/emails":
+            with state.lock:
+                state.counters["emails"] += 1
+                state.emails.append(data)
+            self._reply(200, {"id": str(uuid.uuid4())})
+        else:
+            self._reply(404, {"name": "not_found", "message": self.path})
+
+    def log_message(self, *args):
+        pass
+
+
+def start(port: int = 0, fail_rate: float = 0.0, latency: float = 0.0):
+    """Serve on a daemon thread. Returns (server, state); server.server_port is the port."""
+    state   = StubState(fail_rate, latency)
+    handler = type("Handler", (StubHandler,), {"state": state})
+    server  = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, state = start(args.port, args.fail_rate, args.latency)
+    print(f"Resend stub on http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(5)
+            with state.lock:
+                print(dict(state.counters), flush=True)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
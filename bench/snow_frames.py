@@ -0,0 +1,102 @@
+"""
+Main-loop cost of the snow animation, before and after the coords() rewrite.
+
+python bench/snow_frames.py [--seconds 10] [--fps 25]
+
+Needs a display (or Xvfb). Runs each variant alone in a bare Tk window and
+reports process CPU per wall second and per-frame time. "legacy" is the
+previous delete-and-recreate loop, kept here only for comparison.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import tkinter as tk
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui import BG_DEEP, SnowCanvas  # noqa: E402
+
+
+class LegacySnow(tk.Canvas):
+    COLORS = ["#1a2e44", "#1e3450", "#243d5a", "#1a2840", "#152030"]
+
+    def __init__(self, master, width, height, fps=25, count=55):
+        super().__init__(master, width=width, height=height, bg=BG_DEEP, highlightthickness=0)
+        self.w, self.h, self.delay = width, height, max(1, round(1000 / fps))
+        self.frame_times = deque(maxlen=256)
+        self._flakes = [{
+            "x": random.uniform(0, width), "y": random.randint(0, height),
+            "speed": random.uniform(0.3, 1.1), "drift": random.uniform(-0.3, 0.3),
+            "char": random.choice(SnowCanvas.FLAKE_CHARS),
+            "size": random.choice(SnowCanvas.FLAKE_SIZES),
+            "color": random.choice(self.COLORS),
+            "wobble": random.uniform(0, math.pi * 2),
+        } for _ in range(count)]
+        self._animate()
+
+    def _animate(self):
+        started = time.perf_counter()
+        self.delete("flake")
+        for f in self._flakes:
+            f["wobble"] += 0.03
+            f["x"] += f["drift"] + math.sin(f["wobble"]) * 0.4
+            f["y"] += f["speed"]
+            if f["y"] > self.h + 20:
+                f["x"] = random.uniform(0, self.w)
+                f["y"] = -10
+                f["color"] = random.choice(self.COLORS)
+                f["speed"] = random.uniform(0.3, 1.1)
+            self.create_text(f["x"], f["y"], text=f["char"],
+                             font=("Helvetica", f["size"]), fill=f["color"], tags="flake")
+        self.frame_times.append(time.perf_counter() - started)
+        self.after(self.delay, self._animate)
+
+
+def measure(cls, seconds: float, fps: int) -> dict:
+    root = tk.Tk()
+    root.geometry("660x780")
+    canvas = cls(root, 660, 780, fps=fps)
+    canvas.pack()
+    if isinstance(canvas, SnowCanvas):
+        # measure the animation itself, not the pause-when-unfocused behaviour
+        for seq in ("<Unmap>", "<Map>", "<FocusIn>", "<FocusOut>"):
+            root.unbind(seq)
+        canvas._hidden = False
+        canvas._schedule()
+    root.update()
+
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    root.after(int(seconds * 1000), root.quit)
+    root.mainloop()
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    samples = sorted(canvas.frame_times)
+    root.destroy()
+    return {
+        "cpu_percent":    round(100 * cpu / wall, 2),
+        "sampled_frames": len(samples),
+        "frame_p50_ms":   round(statistics.median(samples) * 1000, 3) if samples else None,
+        "frame_p99_ms":   round(samples[int(len(samples) * 0.99) - 1] * 1000, 3) if samples else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--fps", type=int, default=25)
+    args = parser.parse_args()
+
+    print(json.dumps({
+        "legacy":  measure(LegacySnow, args.seconds, args.fps),
+        "current": measure(SnowCanvas, args.seconds, args.fps),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
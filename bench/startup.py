@@ -0,0 +1,74 @@
+"""
+Cold-start cost of the headless and GUI entry points.
+
+python bench/startup.py [--runs 10]
+
+Each mode is imported in a fresh interpreter; reports wall time for the whole
+process, time spent importing, and peak RSS.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import resource, sys, time
+t = time.perf_counter()
+import {module}
+imported = time.perf_counter() - t
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024
+print(imported, rss, "tkinter" in sys.modules, "resend" in sys.modules)
+"""
+
+MODES = {
+    "headless": "price_tracker",
+    "gui":      "gui",
+}
+
+
+def measure(module: str, runs: int) -> dict | None:
+    walls, imports, rss = [], [], []
+    for _ in range(runs):
+        t = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", PROBE.format(module=module)],
+                              cwd=ROOT, capture_output=True, text=True)
+        walls.append(time.perf_counter() - t)
+        if proc.returncode != 0:
+            print(f"{module}: import failed\n{proc.stderr.strip()}", file=sys.stderr)
+            return None
+        imported, kb, tk_loaded, resend_loaded = proc.stdout.split()
+        imports.append(float(imported))
+        rss.append(int(kb))
+    return {
+        "module":        module,
+        "wall_ms":       round(statistics.median(walls) * 1000, 1),
+        "import_ms":     round(statistics.median(imports) * 1000, 1),
+        "peak_rss_mb":   round(max(rss) / 1024, 1),
+        "loads_tkinter": tk_loaded == "True",
+        "loads_resend":  resend_loaded == "True",
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, module in MODES.items():
+        result = measure(module, args.runs)
+        if result is not None:
+            results[mode] = result
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
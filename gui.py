@@ -0,0 +1,862 @@
+"""
+Price Tracker window. Imported only when the GUI is launched:
+python price_tracker.py   (or: python -m price_tracker gui)
+"""
+
+import csv
+import math
+import queue
+import random
+import time
+from array import array
+from collections import deque
+from datetime import datetime
+import customtkinter as ctk
+import tkinter as tk
+from tkinter import filedialog
+
+from price_tracker import RESEND_API_KEY, drop_email, rise_email
+from tracker.asin import asin, canonical_url
+from tracker.bulk import ImportReport, iter_watchlist, merge_recipients
+from tracker.dashboard import COLUMNS, FILTERS, DashboardModel
+from tracker.engine import TrackerEngine, CheckResult
+from tracker.history import HistoryStore
+from tracker.notifier import Notifier, ResendBackend
+from tracker.policy import FetchPolicy
+from tracker.state import StateTable
+
+BG_DEEP      = "#080e1a" 
+BG_MID       = "#0d1628" 
+FROST_1      = "#111e35"  
+FROST_2      = "#162440" 
+BORDER       = "#1e3356"  
+ACCENT_ICE   = "#a8d8f0" 
+ACCENT_SNOW  = "#deeeff" 
+ACCENT_GLOW  = "#4da6d6"   
+GREEN_FROST  = "#5ddba5"   
+ORANGE_EMBER = "#f09060"   
+TEXT_PRIMARY = "#deeeff"   
+TEXT_MUTED   = "#4a6a8a"  
+TEXT_DIM     = "#2a4a6a"   
+
+
+
+class SnowCanvas(tk.Canvas):
+    """
+    Animated snowflakes drawn on a tkinter Canvas.
+
+    Flake items are created once and moved with coords() each frame; their
+    state lives in flat arrays. The animation pauses while the window is
+    minimized or unfocused, and fps=0 turns it off.
+    """
+
+    FLAKE_CHARS  = ["·", "•", "❄", "❅", "❆", "✦", "*"]
+    FLAKE_COLORS = ["#1a2e44", "#1e3450", "#243d5a", "#1a2840", "#152030"]
+    FLAKE_SIZES  = [7, 8, 9, 10, 11, 13]
+
+    def __init__(self, master, width, height, fps: int = 25, count: int = 55, **kwargs):
+        super().__init__(
+            master,
+            width=width, height=height,
+            bg=BG_DEEP,
+            highlightthickness=0,
+            **kwargs,
+        )
+        self.w = width
+        self.h = height
+        self.fps = fps
+        self.frame_times: deque[float] = deque(maxlen=256)
+
+        self._ids: list[int] = []
+        self._x      = array("d")
+        self._y      = array("d")
+        self._speed  = array("d")
+        self._drift  = array("d")
+        self._wobble = array("d")
+
+        self._running  = True
+        self._hidden   = False
+        self._after_id = None
+        self._init_flakes(count)
+
+        top = self.winfo_toplevel()
+        top.bind("<Unmap>",    self._on_visibility, add="+")
+        top.bind("<Map>",      self._on_visibility, add="+")
+        top.bind("<FocusIn>",  self._on_visibility, add="+")
+        top.bind("<FocusOut>", self._on_visibility, add="+")
+        self._schedule()
+
+    def _init_flakes(self, n: int):
+        for _ in range(n):
+            self._x.append(random.uniform(0, self.w))
+            self._y.append(random.randint(0, self.h))
+            self._speed.append(random.uniform(0.3, 1.1))
+            self._drift.append(random.uniform(-0.3, 0.3))
+            self._wobble.append(random.uniform(0, math.pi * 2))
+            self._ids.append(self.create_text(
+                self._x[-1], self._y[-1],
+                text=random.choice(self.FLAKE_CHARS),
+                font=("Helvetica", random.choice(self.FLAKE_SIZES)),
+                fill=random.choice(self.FLAKE_COLORS),
+                tags="flake",
+            ))
+
+    def _animate(self):
+        self._after_id = None
+        if not self._active():
+            return
+        started = time.perf_counter()
+        x, y, wobble = self._x, self._y, self._wobble
+        speed, drift = self._speed, self._drift
+        limit = self.h + 20
+        coords = self.coords
+        sin = math.sin
+        for i, item in enumerate(self._ids):
+            wobble[i] += 0.03
+            x[i] += drift[i] + sin(wobble[i]) * 0.4
+            y[i] += speed[i]
+            if y[i] > limit:
+                x[i] = random.uniform(0, self.w)
+                y[i] = -10
+                speed[i] = random.uniform(0.3, 1.1)
+                self.itemconfigure(item, fill=random.choice(self.FLAKE_COLORS))
+            coords(item, x[i], y[i])
+        self.frame_times.append(time.perf_counter() - started)
+        self._schedule()
+
+    def _active(self) -> bool:
+        return self._running and not self._hidden and self.fps > 0
+
+    def _schedule(self):
+        if self._after_id is None and self._active():
+            self._after_id = self.after(max(1, round(1000 / self.fps)), self._animate)
+
+    def _on_visibility(self, event=None):
+        try:
+            top = self.winfo_toplevel()
+            self._hidden = top.state() == "iconic" or self.focus_displayof() is None
+        except (tk.TclError, KeyError):
+            return
+        self._schedule()
+
+    def set_fps(self, fps: int):
+        """Change the frame rate; 0 freezes the flakes where they are."""
+        self.fps = max(0, int(fps))
+        self._schedule()
+
+    def stop(self):
+        self._running = False
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+
+
+class FrostEntry(ctk.CTkEntry):
+    def __init__(self, master, **kwargs):
+        super().__init__(
+            master,
+            height=44,
+            fg_color=FROST_2,
+            border_color=BORDER,
+            border_width=1,
+            text_color=TEXT_PRIMARY,
+            placeholder_text_color=TEXT_DIM,
+            font=ctk.CTkFont(family="Consolas", size=13),
+            corner_radius=10,
+            **kwargs,
+        )
+
+
+class DashboardWindow(ctk.CTkToplevel):
+    """
+    Every tracked product in one sortable, filterable table.
+
+    Only the rows that fit exist as widgets. A fixed pool of row slots is
+    refilled from model.order[top:top + rows] on scroll. Each slot remembers
+    the text it shows, and a label is reconfigured only when its own text
+    changes. The order is rebuilt when the sort or filter changes. While
+    results keep arriving it is rebuilt at most every RESORT_MS.
+    """
+
+    ROW_H     = 24
+    RESORT_MS = 1000
+    WIDTHS    = (14, 12, 12, 12, 9, 11, 8)      # characters, in COLUMNS order
+    KIND_COLORS = {
+        "waiting": TEXT_DIM,
+        "start":   ACCENT_ICE,
+        "same":    TEXT_PRIMARY,
+        "drop":    GREEN_FROST,
+        "rise":    ORANGE_EMBER,
+        "error":   ORANGE_EMBER,
+    }
+
+    def __init__(self, master, model: DashboardModel):
+        super().__init__(master)
+        self.model = model
+        self.title("❄  Dashboard")
+        self.geometry("860x600")
+        self.configure(fg_color=BG_DEEP)
+
+        self._top       = 0
+        self._slots: list[list[tk.Label]] = []
+        self._shown: list[tuple | None] = []
+        self._pids: list[int | None] = []
+        self._stale     = False
+        self._resort_at = 0.0
+
+        self._build()
+        self.model.refresh()
+        self.render()
+
+    def _build(self):
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.pack(fill="x", padx=16, pady=(14, 8))
+        self.search = FrostEntry(bar, placeholder_text="filter by URL or ASIN")
+        self.search.pack(side="left", fill="x", expand=True)
+        self.search.bind("<KeyRelease>", self._on_filter)
+        self.filter_menu = ctk.CTkOptionMenu(
+            bar, values=list(FILTERS), command=self._on_filter, width=110,
+            fg_color=FROST_2, button_color=BORDER, button_hover_color=ACCENT_GLOW,
+            font=ctk.CTkFont(family="Consolas", size=12),
+        )
+        self.filter_menu.pack(side="left", padx=(10, 0))
+        self.count_lbl = ctk.CTkLabel(bar, text="", width=130, text_color=TEXT_MUTED,
+                                      font=ctk.CTkFont(family="Consolas", size=11))
+        self.count_lbl.pack(side="right")
+
+        header = tk.Frame(self, bg=FROST_1)
+        header.pack(fill="x", padx=16)
+        self._headers: dict[str, tk.Label] = {}
+        for key, width in zip(COLUMNS, self.WIDTHS):
+            lbl = tk.Label(header, text=COLUMNS[key], width=width, anchor="w", cursor="hand2",
+                           bg=FROST_1, fg=TEXT_DIM, font=("Consolas", 11, "bold"))
+            lbl.pack(side="left", padx=4, pady=6)
+            lbl.bind("<Button-1>", lambda e, k=key: self._on_sort(k))
+            self._headers[key] = lbl
+
+        body = tk.Frame(self, bg=BG_MID)
+        body.pack(fill="both", expand=True, padx=16, pady=(0, 14))
+        self.scrollbar = ctk.CTkScrollbar(body, command=self._on_scrollbar,
+                                          button_color=FROST_2, button_hover_color=BORDER)
+        self.scrollbar.pack(side="right", fill="y")
+        self.rows = tk.Frame(body, bg=BG_MID)
+        self.rows.pack(side="left", fill="both", expand=True)
+        self.rows.pack_propagate(False)
+        self.rows.bind("<Configure>", self._on_resize)
+        for event in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind(event, self._on_wheel)
+        self._mark_sort()
+
+    def _add_slot(self):
+        frame = tk.Frame(self.rows, bg=BG_MID, height=self.ROW_H)
+        frame.pack(fill="x")
+        labels = []
+        for width in self.WIDTHS:
+            lbl = tk.Label(frame, width=width, anchor="w", bg=BG_MID, fg=TEXT_PRIMARY,
+                           font=("Consolas", 11))
+            lbl.pack(side="left", padx=4)
+            labels.append(lbl)
+        self._slots.append(labels)
+        self._shown.append(None)
+        self._pids.append(None)
+
+    def _on_resize(self, event):
+        wanted = max(1, event.height // self.ROW_H)
+        while len(self._slots) < wanted:
+            self._add_slot()
+        while len(self._slots) > wanted:
+            self._slots.pop()[0].master.destroy()
+            self._shown.pop()
+            self._pids.pop()
+        self.render()
+
+    def set_model(self, model: DashboardModel):
+        self.model = model
+        self.invalidate()
+
+    def invalidate(self):
+        """Products were added or removed; rebuild the order on the next tick."""
+        self._stale     = True
+        self._resort_at = 0.0
+
+    def on_tick(self):
+        """Called from the app's UI tick after it has fed results to the model."""
+        dirty = self.model.take_dirty()
+        if dirty and (self.model.sort_key != "product" or self.model.filter != "all"):
+            self._stale = True
+        now = time.monotonic()
+        if self._stale and now >= self._resort_at:
+            self._stale     = False
+            self._resort_at = now + self.RESORT_MS / 1000
+            self.model.refresh()
+            self.render()
+        elif dirty:
+            self.render(dirty)
+
+    def render(self, dirty: set[int] | None = None):
+        """Fill the slots from the model; with `dirty`, only revisit those ids."""
+        order = self.model.order
+        n     = len(order)
+        self._top = max(0, min(self._top, n - len(self._slots)))
+        for s, labels in enumerate(self._slots):
+            i   = self._top + s
+            pid = order[i] if i < n else None
+            if dirty is not None and pid == self._pids[s] and pid not in dirty:
+                continue
+            text  = self.model.row(pid) if pid is not None else ("",) * len(labels)
+            shown = self._shown[s]
+            if text == shown:
+                continue
+            recolor = shown is None or shown[-1] != text[-1]
+            color   = self.KIND_COLORS.get(text[-1], TEXT_PRIMARY)
+            for c, lbl in enumerate(labels):
+                if c in (1, len(labels) - 1) and recolor:
+                    lbl.configure(text=text[c], fg=color)
+                elif shown is None or shown[c] != text[c]:
+                    lbl.configure(text=text[c])
+            self._shown[s] = text
+            self._pids[s]  = pid
+        if n:
+            self.scrollbar.set(self._top / n, min(1.0, (self._top + len(self._slots)) / n))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.count_lbl.configure(text=f"{n:,} of {len(self.model.table):,}")
+
+    def _mark_sort(self):
+        arrow = " ▼" if self.model.descending else " ▲"
+        for key, lbl in self._headers.items():
+            active = key == self.model.sort_key
+            lbl.configure(text=COLUMNS[key] + (arrow if active else ""),
+                          fg=ACCENT_ICE if active else TEXT_DIM)
+
+    def _on_sort(self, key: str):
+        self.model.sort_by(key)
+        self._mark_sort()
+        self.render()
+
+    def _on_filter(self, *_):
+        self.model.query  = self.search.get().strip()
+        self.model.filter = self.filter_menu.get()
+        self.model.refresh()
+        self._top = 0
+        self.render()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * len(self.model.order))
+        elif args[0] == "scroll":
+            step = len(self._slots) if args[2] == "pages" else 1
+            self._top += int(args[1]) * step
+        self.render()
+
+    def _on_wheel(self, event):
+        self._top += -3 if (event.num == 4 or event.delta > 0) else 3
+        self.render()
+
+
+class PriceTrackerApp(ctk.CTk):
+
+    WIN_W = 660
+    WIN_H = 780
+
+    UI_TICK_MS    = 100
+    UI_BATCH      = 2000
+    LOG_MAX_LINES = 500
+
+    def __init__(self, snow_fps: int = 25, log_max_lines: int = LOG_MAX_LINES):
+        super().__init__()
+        self.snow_fps      = snow_fps
+        self.log_max_lines = log_max_lines
+
+        self.title("❄  Price Tracker")
+        self.geometry(f"{self.WIN_W}x{self.WIN_H}")
+        self.resizable(False, False)
+        self.configure(fg_color=BG_DEEP)
+
+        self._tracking    = False
+        self._engine      = None
+        self._url         = None
+        self._last_price  = None
+        self._check_count = 0
+        self._start_price = None
+        self._history     = HistoryStore()
+        self._notifier    = Notifier(ResendBackend(RESEND_API_KEY), workers=2)
+        self._model       = None
+        self._dashboard   = None
+
+        # Worker threads only ever touch _updates; everything else below is
+        # main-thread state that _ui_tick applies to the widgets in one pass.
+        self._updates: queue.SimpleQueue = queue.SimpleQueue()
+        self._pending_log: deque[str] = deque(maxlen=log_max_lines)
+        self._pending_status  = None
+        self._pending_display = None
+        self._log_lines = 0
+        self._tick_id   = None
+
+        self._build_ui()
+        self._ui_tick()
+
+
+    def _build_ui(self):
+        self.snow = SnowCanvas(self, self.WIN_W, self.WIN_H, fps=self.snow_fps)
+        self.snow.place(x=0, y=0)
+
+        overlay = ctk.CTkFrame(self, fg_color="transparent")
+        overlay.place(x=0, y=0, relwidth=1, relheight=1)
+
+        ctk.CTkLabel(
+            overlay,
+            text="❄",
+            font=ctk.CTkFont(size=36),
+            text_color=ACCENT_ICE,
+        ).pack(pady=(32, 0))
+
+        ctk.CTkLabel(
+            overlay,
+            text="PRICE TRACKER",
+            font=ctk.CTkFont(family="Consolas", size=24, weight="bold"),
+            text_color=ACCENT_SNOW,
+        ).pack(pady=(4, 2))
+
+        ctk.CTkLabel(
+            overlay,
+            text="Amazon price monitor  ·  email alerts",
+            font=ctk.CTkFont(family="Consolas", size=11),
+            text_color=TEXT_MUTED,
+        ).pack(pady=(0, 22))
+
+        ctk.CTkFrame(overlay, height=1, fg_color=BORDER).pack(fill="x", padx=36, pady=(0, 20))
+
+        card = ctk.CTkFrame(overlay, fg_color=FROST_1, corner_radius=16,
+                            border_width=1, border_color=BORDER)
+        card.pack(fill="x", padx=28, pady=(0, 16))
+
+        self._field_label(card, "❄  YOUR EMAIL")
+        self.email_entry = FrostEntry(card, placeholder_text="you@example.com")
+        self.email_entry.pack(fill="x", padx=18, pady=(0, 14))
+
+        self._field_label(card, "❄  AMAZON PRODUCT URL")
+        self.url_entry = FrostEntry(card, placeholder_text="https://www.amazon.com/dp/...")
+        self.url_entry.pack(fill="x", padx=18, pady=(0, 14))
+
+        self._field_label(card, "❄  CHECK INTERVAL")
+        slider_row = ctk.CTkFrame(card, fg_color="transparent")
+        slider_row.pack(fill="x", padx=18, pady=(0, 18))
+
+        self.interval_slider = ctk.CTkSlider(
+            slider_row,
+            from_=30, to=3600,
+            number_of_steps=71,
+            button_color=ACCENT_GLOW,
+            button_hover_color=ACCENT_ICE,
+            progress_color=ACCENT_GLOW,
+            fg_color=FROST_2,
+            width=440,
+        )
+        self.interval_slider.set(60)
+        self.interval_slider.pack(side="left", expand=True, fill="x")
+        self.interval_slider.configure(command=self._update_interval_label)
+
+        self.interval_lbl = ctk.CTkLabel(
+            slider_row,
+            text="60s",
+            font=ctk.CTkFont(family="Consolas", size=12, weight="bold"),
+            text_color=ACCENT_ICE,
+            width=52,
+        )
+        self.interval_lbl.pack(side="right")
+
+        self.start_btn = ctk.CTkButton(
+            overlay,
+            text="▶   START TRACKING",
+            height=52,
+            font=ctk.CTkFont(family="Consolas", size=15, weight="bold"),
+            fg_color=ACCENT_GLOW,
+            hover_color=ACCENT_ICE,
+            text_color=BG_DEEP,
+            corner_radius=12,
+            command=self._toggle_tracking,
+        )
+        self.start_btn.pack(fill="x", padx=28, pady=(0, 10))
+
+        tools = ctk.CTkFrame(overlay, fg_color="transparent")
+        tools.pack(fill="x", padx=28, pady=(0, 16))
+        for i, (text, command) in enumerate((("＋  LOAD WATCHLIST", self._load_watchlist),
+                                             ("☰  DASHBOARD", self._open_dashboard))):
+            ctk.CTkButton(
+                tools,
+                text=text,
+                height=34,
+                font=ctk.CTkFont(family="Consolas", size=12, weight="bold"),
+                fg_color=FROST_2,
+                hover_color=BORDER,
+                text_color=ACCENT_ICE,
+                corner_radius=10,
+                command=command,
+            ).pack(side="left", expand=True, fill="x", padx=(6, 0) if i else (0, 6))
+
+        stats = ctk.CTkFrame(overlay, fg_color=FROST_1, corner_radius=14,
+                             border_width=1, border_color=BORDER)
+        stats.pack(fill="x", padx=28, pady=(0, 14))
+
+        col_l = ctk.CTkFrame(stats, fg_color="transparent")
+        col_m = ctk.CTkFrame(stats, fg_color="transparent")
+        col_r = ctk.CTkFrame(stats, fg_color="transparent")
+        col_l.pack(side="left", expand=True, pady=16)
+        col_m.pack(side="left", expand=True, pady=16)
+        col_r.pack(side="left", expand=True, pady=16)
+
+        ctk.CTkFrame(stats, width=1, fg_color=BORDER).pack(side="left", fill="y", pady=12)
+
+        for w in stats.winfo_children():
+            w.pack_forget()
+
+        col_l.pack(side="left", expand=True, pady=16)
+        ctk.CTkFrame(stats, width=1, fg_color=BORDER).pack(side="left", fill="y", pady=10)
+        col_m.pack(side="left", expand=True, pady=16)
+        ctk.CTkFrame(stats, width=1, fg_color=BORDER).pack(side="left", fill="y", pady=10)
+        col_r.pack(side="left", expand=True, pady=16)
+
+        self.lbl_current = self._stat_col(col_l,  "CURRENT",  "—")
+        self.lbl_start   = self._stat_col(col_m,  "STARTED",  "—")
+        self.lbl_checks  = self._stat_col(col_r,  "CHECKS",   "0")
+
+        status_bar = ctk.CTkFrame(overlay, fg_color=FROST_1, corner_radius=10,
+                                  border_width=1, border_color=BORDER)
+        status_bar.pack(fill="x", padx=28, pady=(0, 14))
+
+        self.status_dot = ctk.CTkLabel(
+            status_bar, text="●",
+            font=ctk.CTkFont(size=10),
+            text_color=TEXT_DIM,
+        )
+        self.status_dot.pack(side="left", padx=(14, 6), pady=11)
+
+        self.status_label = ctk.CTkLabel(
+            status_bar,
+            text="Idle  —  enter your details and press Start",
+            font=ctk.CTkFont(family="Consolas", size=12),
+            text_color=TEXT_MUTED,
+        )
+        self.status_label.pack(side="left", pady=11)
+
+        log_header = ctk.CTkFrame(overlay, fg_color="transparent")
+        log_header.pack(fill="x", padx=28, pady=(0, 6))
+
+        ctk.CTkLabel(
+            log_header,
+            text="EVENT LOG",
+            font=ctk.CTkFont(family="Consolas", size=10, weight="bold"),
+            text_color=TEXT_DIM,
+        ).pack(side="left")
+
+        self.log_box = ctk.CTkTextbox(
+            overlay,
+            height=120,
+            fg_color=FROST_1,
+            border_color=BORDER,
+            border_width=1,
+            font=ctk.CTkFont(family="Consolas", size=12),
+            text_color=TEXT_MUTED,
+            corner_radius=12,
+            scrollbar_button_color=FROST_2,
+            scrollbar_button_hover_color=BORDER,
+        )
+        self.log_box.pack(fill="x", padx=28, pady=(0, 24))
+        self.log_box.configure(state="disabled")
+
+
+    def _field_label(self, parent, text: str):
+        ctk.CTkLabel(
+            parent,
+            text=text,
+            font=ctk.CTkFont(family="Consolas", size=10, weight="bold"),
+            text_color=TEXT_MUTED,
+        ).pack(anchor="w", padx=18, pady=(14, 5))
+
+    def _stat_col(self, parent, label: str, initial: str):
+        ctk.CTkLabel(
+            parent,
+            text=label,
+            font=ctk.CTkFont(family="Consolas", size=9, weight="bold"),
+            text_color=TEXT_DIM,
+        ).pack()
+        lbl = ctk.CTkLabel(
+            parent,
+            text=initial,
+            font=ctk.CTkFont(family="Consolas", size=24, weight="bold"),
+            text_color=TEXT_PRIMARY,
+        )
+        lbl.pack()
+        return lbl
+
+
+    def _update_interval_label(self, val):
+        v = int(val)
+        self.interval_lbl.configure(text=f"{v}s")
+        if self._engine is not None and self._url:
+            self._engine.set_interval(self._url, v)
+
+    def _log(self, message: str):
+        ts = datetime.now().strftime("%H:%M:%S")
+        self._pending_log.append(f"[{ts}]  {message}\n")
+
+    def _set_status(self, text: str, color: str = TEXT_MUTED):
+        self._pending_status = (text, color)
+
+    def _ui_tick(self):
+        for _ in range(self.UI_BATCH):
+            try:
+                result = self._updates.get_nowait()
+            except queue.Empty:
+                break
+            self._apply_result(result)
+        if self._dashboard is not None:
+            self._dashboard.on_tick()
+        elif self._model is not None:
+            self._model.take_dirty()
+        self._flush_ui()
+        self._tick_id = self.after(self.UI_TICK_MS, self._ui_tick)
+
+    def _flush_ui(self):
+        if self._pending_log:
+            lines = len(self._pending_log)
+            self.log_box.configure(state="normal")
+            self.log_box.insert("end", "".join(self._pending_log))
+            self._pending_log.clear()
+            self._log_lines += lines
+            excess = self._log_lines - self.log_max_lines
+            if excess > 0:
+                self.log_box.delete("1.0", f"{excess + 1}.0")
+                self._log_lines -= excess
+            self.log_box.see("end")
+            self.log_box.configure(state="disabled")
+
+        if self._pending_status is not None:
+            text, color = self._pending_status
+            self._pending_status = None
+            self.status_label.configure(text=text, text_color=color)
+            self.status_dot.configure(text_color=color)
+
+        if self._pending_display is not None:
+            current, start, state = self._pending_display
+            self._pending_display = None
+            self._render_display(current, start, state)
+
+    def _toggle_tracking(self):
+        if not self._tracking:
+            self._start_tracking()
+        else:
+            self._stop_tracking()
+
+    def _start_tracking(self):
+        email = self.email_entry.get().strip()
+        url   = self.url_entry.get().strip()
+
+        if not email or "@" not in email:
+            self._set_status("⚠  Enter a valid email address.", ORANGE_EMBER)
+            return
+        if not url.startswith("http"):
+            self._set_status("⚠  Enter a valid Amazon URL.", ORANGE_EMBER)
+            return
+
+        url = canonical_url(url)
+        self._tracking    = True
+        self._check_count = 0
+        self._show_running(True)
+        self._set_status("Fetching initial price…", ACCENT_ICE)
+        self._log("— Tracker started —")
+        self._log(f"URL  : {url[:55]}{'…' if len(url)>55 else ''}")
+        self._log(f"Alert: {email}")
+
+        self._url = url
+        self._ensure_engine().add(url, email, int(self.interval_slider.get()))
+        if self._dashboard is not None:
+            self._dashboard.invalidate()
+        self._flush_ui()
+
+    def _stop_tracking(self):
+        self._tracking = False
+        if self._engine is not None:
+            self._engine.stop()
+            self._engine = None
+        self._show_running(False)
+        self._set_status("Stopped.", TEXT_MUTED)
+        self._log("— Tracker stopped —")
+        self._flush_ui()
+
+    def _show_running(self, running: bool):
+        if running:
+            self.start_btn.configure(text="■   STOP TRACKING", fg_color=FROST_2,
+                                     hover_color=BORDER, text_color=ORANGE_EMBER)
+        else:
+            self.start_btn.configure(text="▶   START TRACKING", fg_color=ACCENT_GLOW,
+                                     hover_color=ACCENT_ICE, text_color=BG_DEEP)
+
+    def _ensure_engine(self) -> TrackerEngine:
+        """The running engine, started (with a fresh dashboard model) if there is none."""
+        if self._engine is None:
+            self._engine = TrackerEngine(
+                on_result=self._updates.put,
+                history=self._history,
+                policy=FetchPolicy(),
+            )
+            self._model = DashboardModel(self._engine.state)
+            if self._dashboard is not None:
+                self._dashboard.set_model(self._model)
+            self._engine.start()
+        return self._engine
+
+    def _load_watchlist(self):
+        path = filedialog.askopenfilename(
+            parent=self, title="Load watchlist",
+            filetypes=[("Watchlists", "*.csv *.jsonl *.txt"), ("All files", "*")],
+        )
+        if not path:
+            return
+        email    = self.email_entry.get().strip()
+        interval = int(self.interval_slider.get())
+        report   = ImportReport()
+        try:
+            engine = self._ensure_engine()
+            added  = 0
+            for item in merge_recipients(iter_watchlist(path, email, interval, report=report)):
+                engine.add(item.url, item.email, item.interval)
+                added += 1
+        except (OSError, ValueError, csv.Error) as e:
+            print("Watchlist error:", e)
+            self._set_status("⚠  Couldn't read that watchlist.", ORANGE_EMBER)
+            return
+        self._tracking = True
+        self._show_running(True)
+        self._log(f"Loaded {added:,} products  ·  {report.summary()}")
+        self._set_status(f"Watching {len(engine):,} products", ACCENT_ICE)
+        if self._dashboard is not None:
+            self._dashboard.invalidate()
+        self._flush_ui()
+
+    def _open_dashboard(self):
+        if self._dashboard is not None and self._dashboard.winfo_exists():
+            self._dashboard.focus()
+            return
+        if self._model is None:
+            self._model = DashboardModel(StateTable())
+        self._dashboard = DashboardWindow(self, self._model)
+        self._dashboard.protocol("WM_DELETE_WINDOW", self._close_dashboard)
+
+    def _close_dashboard(self):
+        if self._dashboard is not None:
+            self._dashboard.destroy()
+            self._dashboard = None
+
+
+    def _apply_result(self, r: CheckResult):
+        if self._model is not None:
+            self._model.note(r)
+        if not self._tracking:
+            return
+        if r.url != self._url:
+            self._apply_watchlist_result(r)
+            return
+        self._check_count = r.count
+
+        if r.kind == "start":
+            self._last_price  = r.price
+            self._start_price = r.price
+            self._update_display(r.price, r.price, "start")
+            self._log(f"Starting price: ${r.price:.2f}")
+            self._set_status(f"Watching  ·  press Stop to quit", ACCENT_ICE)
+        elif r.kind == "error" and r.start is None:
+            # drop just this URL; watchlist products on the same engine keep going
+            self._log(f"ERROR: Could not fetch price for {r.url[:55]}")
+            self._url = None
+            self._engine.remove(r.url)
+            if self._dashboard is not None:
+                self._dashboard.invalidate()
+            if len(self._engine):
+                self._set_status("✗  Couldn't fetch that URL. Watchlist still running.", ORANGE_EMBER)
+            else:
+                self._set_status("✗  Couldn't fetch price. Check the URL.", ORANGE_EMBER)
+                self._stop_tracking()
+        elif r.kind == "error":
+            self._log("WARNING: Failed to fetch — retrying next cycle")
+        elif r.kind == "drop":
+            self._on_drop(r.price, r.last, r.change, r.url, r.email)
+        elif r.kind == "rise":
+            self._on_rise(r.price, r.last, r.change, r.url, r.email)
+        else:
+            self._last_price = r.price
+            self._log(f"Check #{r.count}  ·  ${r.price:.2f}  ·  no change")
+            self._set_status(f"Watching  ·  check #{r.count} complete", ACCENT_ICE)
+            self._update_display(r.price, r.start, "same")
+
+
+    def _apply_watchlist_result(self, r: CheckResult):
+        """Dashboard products: log and email changes only, the table shows the rest."""
+        if r.kind not in ("drop", "rise"):
+            return
+        name = asin(r.url) or r.url[:40]
+        sign = "−" if r.kind == "drop" else "+"
+        self._log(f"{name}  ${r.last:.2f} → ${r.price:.2f}  ({sign}${r.change:.2f})")
+        if r.email:
+            build = drop_email if r.kind == "drop" else rise_email
+            self._notifier.notify(r.email, *build(r.price, r.last, r.change, r.url))
+
+    def _on_drop(self, current, last, change, url, email):
+        self._last_price = current
+        self._update_display(current, self._start_price, "drop")
+        self._log(f"Drop  ${last:.2f} → ${current:.2f}  (−${change:.2f})  · email sent")
+        self._set_status(f"Price dropped ${change:.2f}!  Email sent.", GREEN_FROST)
+        subject, body = drop_email(current, last, change, url)
+        self._notifier.notify(email, subject, body)
+
+    def _on_rise(self, current, last, change, url, email):
+        self._last_price = current
+        self._update_display(current, self._start_price, "rise")
+        self._log(f"Rise  ${last:.2f} → ${current:.2f}  (+${change:.2f})  · email sent")
+        self._set_status(f"📈  Price rose ${change:.2f}.  Email sent.", ORANGE_EMBER)
+        subject, body = rise_email(current, last, change, url)
+        self._notifier.notify(email, subject, body)
+
+    def _update_display(self, current: float, start: float, state: str):
+        self._pending_display = (current, start, state)
+
+    def _render_display(self, current: float, start: float, state: str):
+        color_map = {
+            "drop":  GREEN_FROST,
+            "rise":  ORANGE_EMBER,
+            "same":  TEXT_PRIMARY,
+            "start": ACCENT_ICE,
+        }
+        self.lbl_current.configure(
+            text=f"${current:.2f}",
+            text_color=color_map.get(state, TEXT_PRIMARY),
+        )
+        if start is not None:
+            self.lbl_start.configure(text=f"${start:.2f}", text_color=TEXT_MUTED)
+        self.lbl_checks.configure(text=str(self._check_count), text_color=TEXT_MUTED)
+
+
+    def on_close(self):
+        self._tracking = False
+        if self._tick_id is not None:
+            self.after_cancel(self._tick_id)
+        if self._engine is not None:
+            self._engine.stop()
+        self._history.close()
+        self._notifier.close(timeout=2)
+        self.snow.stop()
+        self.destroy()
+
+
+def run(snow_fps: int = 25):
+    ctk.set_appearance_mode("dark")
+    ctk.set_default_color_theme("blue")
+
+    app = PriceTrackerApp(snow_fps=snow_fps)
+    try:
+        app.iconbitmap("favicon.ico")
+    except Exception:
+        pass
+    app.protocol("WM_DELETE_WINDOW", app.on_close)
+    app.mainloop()
@@ -1,586 +1,633 @@
 """
 Amazon Price Tracker 
 pip install customtkinter requests beautifulsoup4 resend
+
+python price_tracker.py                                  open the window
+python -m price_tracker track --watchlist list.txt      headless, no GUI imports
+python -m price_tracker check https://www.amazon.com/dp/...
+python -m price_tracker import big_list.csv --out clean.jsonl
+python -m price_tracker export history.csv
+python -m price_tracker stats --days 30
+python -m price_tracker queue add --watchlist big.csv   then, in as many processes as you like:
+python -m price_tracker work --queue work_queue.db
 """
 
-import resend
-import requests
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import sys
 import threading
 import time
-import math
-import random
 from datetime import datetime
-from bs4 import BeautifulSoup
-import customtkinter as ctk
-import tkinter as tk
-
-resend.api_key = ""
-
-ctk.set_appearance_mode("dark")
-ctk.set_default_color_theme("blue")
-
-BG_DEEP      = "#080e1a" 
-BG_MID       = "#0d1628" 
-FROST_1      = "#111e35"  
-FROST_2      = "#162440" 
-BORDER       = "#1e3356"  
-ACCENT_ICE   = "#a8d8f0" 
-ACCENT_SNOW  = "#deeeff" 
-ACCENT_GLOW  = "#4da6d6"   
-GREEN_FROST  = "#5ddba5"   
-ORANGE_EMBER = "#f09060"   
-TEXT_PRIMARY = "#deeeff"   
-TEXT_MUTED   = "#4a6a8a"  
-TEXT_DIM     = "#2a4a6a"   
+
+from tracker.fetcher import fetch_price
+from tracker.notifier import Message, Notifier, ResendBackend
+
+RESEND_API_KEY = os.environ.get("RESEND_API_KEY", "")
 
 
 def send_email(subject: str, body: str, to: str) -> None:
     try:
-        resend.Emails.send({
-            "from":    "onboarding@resend.dev",
-            "to":      to,
-            "subject": subject,
-            "html":    body,
-        })
+        ResendBackend(RESEND_API_KEY).send(Message(to, subject, body))
     except Exception as e:
         print("Email error:", e)
 
 
-def grab_price(url: str) -> float | None:
-    try:
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        whole    = soup.find("span", class_="a-price-whole")
-        fraction = soup.find("span", class_="a-price-fraction")
-
-        if whole and fraction:
-            price_str    = whole.get_text().strip().replace(",", "").replace(".", "")
-            fraction_str = fraction.get_text().strip()
-            return float(f"{price_str}.{fraction_str}")
-
-        offscreen = soup.find("span", class_="a-offscreen")
-        if offscreen:
-            text = offscreen.get_text().strip().replace("$", "").replace(",", "")
-            return float(text)
-
-        return None
-    except Exception:
-        return None
-
-
-class SnowCanvas(tk.Canvas):
-    """Animated snowflakes drawn on a tkinter Canvas."""
+def drop_email(current: float, last: float, change: float, url: str) -> tuple[str, str]:
+    return (
+        f"Price Dropped to ${current:.2f}!",
+        f"""
+        <div style="font-family:'Segoe UI',sans-serif;max-width:500px;margin:auto;
+                    background:#0d1628;color:#deeeff;border-radius:12px;padding:32px">
+          <div style="font-size:32px;margin-bottom:8px">❄ 💰</div>
+          <h2 style="color:#5ddba5;margin:0 0 6px">Price Drop Detected</h2>
+          <p style="color:#4a6a8a;font-size:14px;margin:0 0 24px">
+            Good news — the price went down.
+          </p>
+          <table style="width:100%;font-size:15px;border-collapse:collapse">
+            <tr style="border-bottom:1px solid #1e3356">
+              <td style="padding:10px 0;color:#4a6a8a">Was</td>
+              <td style="padding:10px 0;text-align:right;color:#4a6a8a"><s>${last:.2f}</s></td>
+            </tr>
+            <tr style="border-bottom:1px solid #1e3356">
+              <td style="padding:10px 0;font-weight:bold">Now</td>
+              <td style="padding:10px 0;text-align:right;font-weight:bold;
+                         color:#5ddba5;font-size:20px">${current:.2f}</td>
+            </tr>
+            <tr>
+              <td style="padding:10px 0;color:#5ddba5">You save</td>
+              <td style="padding:10px 0;text-align:right;color:#5ddba5">${change:.2f}</td>
+            </tr>
+          </table>
+          <a href="{url}" style="display:inline-block;margin-top:24px;
+             background:#5ddba5;color:#080e1a;padding:13px 28px;
+             text-decoration:none;border-radius:8px;font-weight:bold;font-size:15px">
+            Buy Now →
+          </a>
+        </div>
+        """,
+    )
+
+
+def rise_email(current: float, last: float, change: float, url: str) -> tuple[str, str]:
+    return (
+        f"Price Increased to ${current:.2f}",
+        f"""
+        <div style="font-family:'Segoe UI',sans-serif;max-width:500px;margin:auto;
+                    background:#0d1628;color:#deeeff;border-radius:12px;padding:32px">
+          <div style="font-size:32px;margin-bottom:8px">❄ 📈</div>
+          <h2 style="color:#f09060;margin:0 0 6px">Price Increase Detected</h2>
+          <p style="color:#4a6a8a;font-size:14px;margin:0 0 24px">
+            The price went up since your last check.
+          </p>
+          <table style="width:100%;font-size:15px;border-collapse:collapse">
+            <tr style="border-bottom:1px solid #1e3356">
+              <td style="padding:10px 0;color:#4a6a8a">Was</td>
+              <td style="padding:10px 0;text-align:right;color:#4a6a8a">${last:.2f}</td>
+            </tr>
+            <tr>
+              <td style="padding:10px 0;font-weight:bold">Now</td>
+              <td style="padding:10px 0;text-align:right;font-weight:bold;
+                         color:#f09060;font-size:20px">${current:.2f}</td>
+            </tr>
+          </table>
+          <a href="{url}" style="display:inline-block;margin-top:24px;
+             background:#4da6d6;color:#080e1a;padding:13px 28px;
+             text-decoration:none;border-radius:8px;font-weight:bold;font-size:15px">
+            View Product →
+          </a>
+        </div>
+        """,
+    )
+
+
+def alert_email(alert) -> tuple[str, str]:
+    """Subject names the most important rule; the body is the drop / rise email."""
+    last = alert.last if alert.last is not None else alert.price
+    build = rise_email if alert.price > last else drop_email
+    subject, body = build(alert.price, last, abs(alert.price - last), alert.url)
+    if "target" in alert.reasons:
+        subject = f"Target Price Reached: ${alert.price:.2f}!"
+    elif "low" in alert.reasons:
+        subject = f"All-Time Low: ${alert.price:.2f}!"
+    elif "off_high" in alert.reasons and alert.stats["high"]:
+        off = (1 - alert.price / alert.stats["high"]) * 100
+        subject = f"{off:.0f}% Below Its Recent High: ${alert.price:.2f}"
+    return subject, body
+
+
+def load_targets(path: str) -> dict[str, float]:
+    """Target prices from a text file with one `URL PRICE` per line."""
+    from tracker.asin import canonical_url
+
+    targets = {}
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            parts = line.split("#", 1)[0].replace(",", " ").split()
+            if not parts:
+                continue
+            try:
+                targets[canonical_url(parts[0])] = float(parts[1].lstrip("$"))
+            except (IndexError, ValueError):
+                print(f"  line {line_no}: expected URL PRICE: {line.strip()[:80]}", file=sys.stderr)
+    return targets
 
-    FLAKE_CHARS = ["·", "•", "❄", "❅", "❆", "✦", "*"]
 
-    def __init__(self, master, width, height, **kwargs):
-        super().__init__(
-            master,
-            width=width, height=height,
-            bg=BG_DEEP,
-            highlightthickness=0,
-            **kwargs,
-        )
-        self.w = width
-        self.h = height
-        self._flakes = []
-        self._running = True
-        self._init_flakes(55)
-        self._animate()
-
-    def _init_flakes(self, n: int):
-        for _ in range(n):
-            self._flakes.append(self._new_flake(random.randint(0, self.h)))
-
-    def _new_flake(self, y=None):
-        size  = random.choice([7, 8, 9, 10, 11, 13])
-        speed = random.uniform(0.3, 1.1)
-        drift = random.uniform(-0.3, 0.3)
-        char  = random.choice(self.FLAKE_CHARS)
-        alpha_level = random.choice(["#1a2e44", "#1e3450", "#243d5a", "#1a2840", "#152030"])
-        return {
-            "x": random.uniform(0, self.w),
-            "y": random.uniform(0, self.h) if y is None else y,
-            "speed": speed,
-            "drift": drift,
-            "char": char,
-            "size": size,
-            "color": alpha_level,
-            "id": None,
-            "wobble": random.uniform(0, math.pi * 2),
-        }
-
-    def _animate(self):
-        if not self._running:
-            return
-        self.delete("flake")
-        for f in self._flakes:
-            f["wobble"] += 0.03
-            f["x"] += f["drift"] + math.sin(f["wobble"]) * 0.4
-            f["y"] += f["speed"]
-            if f["y"] > self.h + 20:
-                f["x"] = random.uniform(0, self.w)
-                f["y"] = -10
-                f["color"] = random.choice(["#1a2e44", "#1e3450", "#243d5a", "#1a2840", "#152030"])
-                f["speed"] = random.uniform(0.3, 1.1)
-            self.create_text(
-                f["x"], f["y"],
-                text=f["char"],
-                font=("Helvetica", f["size"]),
-                fill=f["color"],
-                tags="flake",
-            )
-        self.after(40, self._animate)
-
-    def stop(self):
-        self._running = False
-
-
-class FrostEntry(ctk.CTkEntry):
-    def __init__(self, master, **kwargs):
-        super().__init__(
-            master,
-            height=44,
-            fg_color=FROST_2,
-            border_color=BORDER,
-            border_width=1,
-            text_color=TEXT_PRIMARY,
-            placeholder_text_color=TEXT_DIM,
-            font=ctk.CTkFont(family="Consolas", size=13),
-            corner_radius=10,
-            **kwargs,
+def grab_price(url: str) -> float | None:
+    return fetch_price(url).price
+
+
+def load_watchlist(path: str, email: str = "", interval: float = 60) -> list[tuple[str, str, float]]:
+    """Products from a .csv, .jsonl or text watchlist (one URL [email] [interval] per line).
+
+    Bad rows are reported on stderr and skipped; a product listed twice is kept once,
+    with every distinct email as a recipient.
+    """
+    from tracker.bulk import ImportReport, iter_watchlist, merge_recipients
+
+    report = ImportReport()
+    items  = [(w.url, w.email, w.interval)
+              for w in merge_recipients(iter_watchlist(path, email, interval, report=report))]
+    _print_report(report)
+    return items
+
+
+def _print_report(report, limit: int = 10, summary: bool = True) -> None:
+    if not (report.bad or report.duplicates or report.merged):
+        return
+    if summary:
+        print(report.summary(), file=sys.stderr)
+    for line, reason, raw in report.errors[:limit]:
+        print(f"  line {line}: {reason}: {raw[:80]}", file=sys.stderr)
+    if report.bad > limit:
+        print(f"  … and {report.bad - limit} more", file=sys.stderr)
+
+
+def _print(message: str) -> None:
+    ts = datetime.now().strftime("%H:%M:%S")
+    print(f"[{ts}]  {message}", flush=True)
+
+
+def _report(result, notifier: Notifier, quiet: bool = False, email: bool = True) -> None:
+    url = result.url if len(result.url) <= 55 else result.url[:55] + "…"
+    if result.kind == "start":
+        if not quiet:
+            _print(f"{url}  ·  starting price ${result.price:.2f}")
+    elif result.kind == "error":
+        _print(f"{url}  ·  WARNING: failed to fetch — retrying next cycle")
+    elif result.kind == "same":
+        if not quiet:
+            _print(f"{url}  ·  check #{result.count}  ·  ${result.price:.2f}  ·  no change")
+    else:
+        arrow = "Drop" if result.kind == "drop" else "Rise"
+        sign  = "−" if result.kind == "drop" else "+"
+        _print(f"{url}  ·  {arrow}  ${result.last:.2f} → ${result.price:.2f}  ({sign}${result.change:.2f})")
+        if email and result.email:
+            build = drop_email if result.kind == "drop" else rise_email
+            subject, body = build(result.price, result.last, result.change, result.url)
+            notifier.notify(result.email, subject, body)
+
+
+def _tracker_parts(args):
+    """The fetch / history / notifier / policy stack shared by track and work."""
+    from functools import partial
+
+    from tracker.cache import SharedFetcher
+    from tracker.fetcher import SessionPool
+    from tracker.history import HistoryStore
+    from tracker.policy import FetchPolicy
+
+    if args.metrics_port:
+        from tracker import metrics
+        metrics.serve(args.metrics_port)
+        _print(f"Metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+
+    archive = None
+    if args.archive:
+        from tracker.archive import PageArchive
+        archive = PageArchive(
+            args.archive, misses_only=args.archive_misses,
+            max_bytes=int(args.archive_max_mb * 1024 * 1024) if args.archive_max_mb else None,
+            max_age=args.archive_days * 86400 if args.archive_days else None,
         )
 
-
-class PriceTrackerApp(ctk.CTk):
-
-    WIN_W = 660
-    WIN_H = 780
-
-    def __init__(self):
-        super().__init__()
-
-        self.title("❄  Price Tracker")
-        self.geometry(f"{self.WIN_W}x{self.WIN_H}")
-        self.resizable(False, False)
-        self.configure(fg_color=BG_DEEP)
-
-        self._tracking    = False
-        self._thread      = None
-        self._last_price  = None
-        self._check_count = 0
-        self._start_price = None
-
-        self._build_ui()
-
-
-    def _build_ui(self):
-        self.snow = SnowCanvas(self, self.WIN_W, self.WIN_H)
-        self.snow.place(x=0, y=0)
-
-        overlay = ctk.CTkFrame(self, fg_color="transparent")
-        overlay.place(x=0, y=0, relwidth=1, relheight=1)
-
-        ctk.CTkLabel(
-            overlay,
-            text="❄",
-            font=ctk.CTkFont(size=36),
-            text_color=ACCENT_ICE,
-        ).pack(pady=(32, 0))
-
-        ctk.CTkLabel(
-            overlay,
-            text="PRICE TRACKER",
-            font=ctk.CTkFont(family="Consolas", size=24, weight="bold"),
-            text_color=ACCENT_SNOW,
-        ).pack(pady=(4, 2))
-
-        ctk.CTkLabel(
-            overlay,
-            text="Amazon price monitor  ·  email alerts",
-            font=ctk.CTkFont(family="Consolas", size=11),
-            text_color=TEXT_MUTED,
-        ).pack(pady=(0, 22))
-
-        ctk.CTkFrame(overlay, height=1, fg_color=BORDER).pack(fill="x", padx=36, pady=(0, 20))
-
-        card = ctk.CTkFrame(overlay, fg_color=FROST_1, corner_radius=16,
-                            border_width=1, border_color=BORDER)
-        card.pack(fill="x", padx=28, pady=(0, 16))
-
-        self._field_label(card, "❄  YOUR EMAIL")
-        self.email_entry = FrostEntry(card, placeholder_text="you@example.com")
-        self.email_entry.pack(fill="x", padx=18, pady=(0, 14))
-
-        self._field_label(card, "❄  AMAZON PRODUCT URL")
-        self.url_entry = FrostEntry(card, placeholder_text="https://www.amazon.com/dp/...")
-        self.url_entry.pack(fill="x", padx=18, pady=(0, 14))
-
-        self._field_label(card, "❄  CHECK INTERVAL")
-        slider_row = ctk.CTkFrame(card, fg_color="transparent")
-        slider_row.pack(fill="x", padx=18, pady=(0, 18))
-
-        self.interval_slider = ctk.CTkSlider(
-            slider_row,
-            from_=30, to=3600,
-            number_of_steps=71,
-            button_color=ACCENT_GLOW,
-            button_hover_color=ACCENT_ICE,
-            progress_color=ACCENT_GLOW,
-            fg_color=FROST_2,
-            width=440,
-        )
-        self.interval_slider.set(60)
-        self.interval_slider.pack(side="left", expand=True, fill="x")
-        self.interval_slider.configure(command=self._update_interval_label)
-
-        self.interval_lbl = ctk.CTkLabel(
-            slider_row,
-            text="60s",
-            font=ctk.CTkFont(family="Consolas", size=12, weight="bold"),
-            text_color=ACCENT_ICE,
-            width=52,
-        )
-        self.interval_lbl.pack(side="right")
-
-        self.start_btn = ctk.CTkButton(
-            overlay,
-            text="▶   START TRACKING",
-            height=52,
-            font=ctk.CTkFont(family="Consolas", size=15, weight="bold"),
-            fg_color=ACCENT_GLOW,
-            hover_color=ACCENT_ICE,
-            text_color=BG_DEEP,
-            corner_radius=12,
-            command=self._toggle_tracking,
+    pool     = SessionPool(pool_maxsize=args.concurrency, drain_bytes=args.drain_kb * 1024,
+                           extract_workers=args.parse_workers, archive=archive)
+    history  = None if args.no_history else HistoryStore(args.history)
+    notifier = Notifier(ResendBackend(RESEND_API_KEY), workers=args.email_workers,
+                        digest_window=args.digest, batch_size=args.email_batch)
+    alerts   = _alert_batcher(args, notifier, history)
+
+    intervals = None
+    if args.adaptive:
+        from tracker.adaptive import AdaptiveIntervals
+        intervals = AdaptiveIntervals(
+            args.min_interval, args.max_interval, budget=args.budget,
+            targets=load_targets(args.targets) if args.targets else None,
+            watch_low=args.new_low,
         )
-        self.start_btn.pack(fill="x", padx=28, pady=(0, 16))
-
-        stats = ctk.CTkFrame(overlay, fg_color=FROST_1, corner_radius=14,
-                             border_width=1, border_color=BORDER)
-        stats.pack(fill="x", padx=28, pady=(0, 14))
-
-        col_l = ctk.CTkFrame(stats, fg_color="transparent")
-        col_m = ctk.CTkFrame(stats, fg_color="transparent")
-        col_r = ctk.CTkFrame(stats, fg_color="transparent")
-        col_l.pack(side="left", expand=True, pady=16)
-        col_m.pack(side="left", expand=True, pady=16)
-        col_r.pack(side="left", expand=True, pady=16)
-
-        ctk.CTkFrame(stats, width=1, fg_color=BORDER).pack(side="left", fill="y", pady=12)
-
-        for w in stats.winfo_children():
-            w.pack_forget()
-
-        col_l.pack(side="left", expand=True, pady=16)
-        ctk.CTkFrame(stats, width=1, fg_color=BORDER).pack(side="left", fill="y", pady=10)
-        col_m.pack(side="left", expand=True, pady=16)
-        ctk.CTkFrame(stats, width=1, fg_color=BORDER).pack(side="left", fill="y", pady=10)
-        col_r.pack(side="left", expand=True, pady=16)
-
-        self.lbl_current = self._stat_col(col_l,  "CURRENT",  "—")
-        self.lbl_start   = self._stat_col(col_m,  "STARTED",  "—")
-        self.lbl_checks  = self._stat_col(col_r,  "CHECKS",   "0")
-
-        status_bar = ctk.CTkFrame(overlay, fg_color=FROST_1, corner_radius=10,
-                                  border_width=1, border_color=BORDER)
-        status_bar.pack(fill="x", padx=28, pady=(0, 14))
-
-        self.status_dot = ctk.CTkLabel(
-            status_bar, text="●",
-            font=ctk.CTkFont(size=10),
-            text_color=TEXT_DIM,
-        )
-        self.status_dot.pack(side="left", padx=(14, 6), pady=11)
 
-        self.status_label = ctk.CTkLabel(
-            status_bar,
-            text="Idle  —  enter your details and press Start",
-            font=ctk.CTkFont(family="Consolas", size=12),
-            text_color=TEXT_MUTED,
-        )
-        self.status_label.pack(side="left", pady=11)
-
-        log_header = ctk.CTkFrame(overlay, fg_color="transparent")
-        log_header.pack(fill="x", padx=28, pady=(0, 6))
-
-        ctk.CTkLabel(
-            log_header,
-            text="EVENT LOG",
-            font=ctk.CTkFont(family="Consolas", size=10, weight="bold"),
-            text_color=TEXT_DIM,
-        ).pack(side="left")
-
-        self.log_box = ctk.CTkTextbox(
-            overlay,
-            height=164,
-            fg_color=FROST_1,
-            border_color=BORDER,
-            border_width=1,
-            font=ctk.CTkFont(family="Consolas", size=12),
-            text_color=TEXT_MUTED,
-            corner_radius=12,
-            scrollbar_button_color=FROST_2,
-            scrollbar_button_hover_color=BORDER,
-        )
-        self.log_box.pack(fill="x", padx=28, pady=(0, 24))
-        self.log_box.configure(state="disabled")
-
-
-    def _field_label(self, parent, text: str):
-        ctk.CTkLabel(
-            parent,
-            text=text,
-            font=ctk.CTkFont(family="Consolas", size=10, weight="bold"),
-            text_color=TEXT_MUTED,
-        ).pack(anchor="w", padx=18, pady=(14, 5))
-
-    def _stat_col(self, parent, label: str, initial: str):
-        ctk.CTkLabel(
-            parent,
-            text=label,
-            font=ctk.CTkFont(family="Consolas", size=9, weight="bold"),
-            text_color=TEXT_DIM,
-        ).pack()
-        lbl = ctk.CTkLabel(
-            parent,
-            text=initial,
-            font=ctk.CTkFont(family="Consolas", size=24, weight="bold"),
-            text_color=TEXT_PRIMARY,
-        )
-        lbl.pack()
-        return lbl
-
-
-    def _update_interval_label(self, val):
-        v = int(val)
-        self.interval_lbl.configure(text=f"{v}s")
-
-    def _log(self, message: str):
-        ts = datetime.now().strftime("%H:%M:%S")
-        self.log_box.configure(state="normal")
-        self.log_box.insert("end", f"[{ts}]  {message}\n")
-        self.log_box.see("end")
-        self.log_box.configure(state="disabled")
-
-    def _set_status(self, text: str, color: str = TEXT_MUTED):
-        self.status_label.configure(text=text, text_color=color)
-        self.status_dot.configure(text_color=color)
-
-    def _toggle_tracking(self):
-        if not self._tracking:
-            self._start_tracking()
-        else:
-            self._stop_tracking()
-
-    def _start_tracking(self):
-        email = self.email_entry.get().strip()
-        url   = self.url_entry.get().strip()
-
-        if not email or "@" not in email:
-            self._set_status("⚠  Enter a valid email address.", ORANGE_EMBER)
-            return
-        if not url.startswith("http"):
-            self._set_status("⚠  Enter a valid Amazon URL.", ORANGE_EMBER)
-            return
-
-        self._tracking    = True
-        self._check_count = 0
-        self.start_btn.configure(
-            text="■   STOP TRACKING",
-            fg_color=FROST_2,
-            hover_color=BORDER,
-            text_color=ORANGE_EMBER,
-        )
-        self._set_status("Fetching initial price…", ACCENT_ICE)
-        self._log("— Tracker started —")
-        self._log(f"URL  : {url[:55]}{'…' if len(url)>55 else ''}")
-        self._log(f"Alert: {email}")
-
-        self._thread = threading.Thread(
-            target=self._tracking_loop,
-            args=(url, email),
-            daemon=True,
-        )
-        self._thread.start()
-
-    def _stop_tracking(self):
-        self._tracking = False
-        self.start_btn.configure(
-            text="▶   START TRACKING",
-            fg_color=ACCENT_GLOW,
-            hover_color=ACCENT_ICE,
-            text_color=BG_DEEP,
-        )
-        self._set_status("Stopped.", TEXT_MUTED)
-        self._log("— Tracker stopped —")
-
-
-    def _tracking_loop(self, url: str, email: str):
-        price = grab_price(url)
-        if price is None:
-            self.after(0, lambda: self._set_status("✗  Couldn't fetch price. Check the URL.", ORANGE_EMBER))
-            self.after(0, lambda: self._log("ERROR: Could not fetch price."))
-            self.after(0, self._stop_tracking)
-            return
-
-        self._last_price  = price
-        self._start_price = price
-        self.after(0, lambda p=price: (
-            self._update_display(p, p, "start"),
-            self._log(f"Starting price: ${p:.2f}"),
-            self._set_status(f"Watching  ·  press Stop to quit", ACCENT_ICE),
-        ))
-
-        while self._tracking:
-            interval = int(self.interval_slider.get())
-            for _ in range(interval * 10):
-                if not self._tracking:
-                    return
-                time.sleep(0.1)
-
-            current = grab_price(url)
-            self._check_count += 1
-            count = self._check_count
-
-            if current is None:
-                self.after(0, lambda: self._log("WARNING: Failed to fetch — retrying next cycle"))
-                continue
+    def on_result(r):
+        _report(r, notifier, args.quiet, email=alerts is None)
+        if alerts is not None:
+            alerts.add(r)
+
+    engine_kwargs = dict(
+        fetch=SharedFetcher(partial(fetch_price, pool=pool), ttl=args.cache_ttl),
+        on_result=on_result,
+        concurrency=args.concurrency,
+        history=history,
+        policy=FetchPolicy(rate=args.rate),
+        intervals=intervals,
+    )
+
+    def close():
+        if alerts is not None:
+            alerts.close()
+        notifier.close()
+        pool.close()
+        if archive is not None:
+            archive.close()
+        if history is not None:
+            history.close()
+
+    return engine_kwargs, close
+
+
+def _alert_batcher(args, notifier: Notifier, history):
+    """An AlertBatcher when any alert rule is given; None keeps one email per change."""
+    if (args.min_change is None and args.drop_from_high is None
+            and not args.new_low and not args.targets):
+        return None
+    from tracker.analytics import AlertBatcher, AlertRules
+
+    rules = AlertRules(
+        min_change=args.min_change if args.min_change is not None else 0.0,
+        drop_from_high=args.drop_from_high,
+        days=args.high_days,
+        new_low=args.new_low,
+        targets=load_targets(args.targets) if args.targets else {},
+    )
+    if args.min_change is None:
+        rules.min_change = math.inf       # only the rules asked for
+
+    def notify(alert):
+        reasons = ", ".join(alert.reasons)
+        _print(f"{alert.url}  ·  ALERT ({reasons})  ·  ${alert.price:.2f}")
+        if alert.email:
+            notifier.notify(alert.email, *alert_email(alert))
+
+    return AlertBatcher(rules, notify, history)
+
+
+def _run(engine, close) -> None:
+    async def main():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, engine.stop)
+            except (NotImplementedError, RuntimeError):
+                pass
+        await engine.run()
 
-            last = self._last_price
-
-            if current < last:
-                change = last - current
-                self.after(0, lambda c=current, l=last, ch=change: self._on_drop(c, l, ch, url, email))
-            elif current > last:
-                change = current - last
-                self.after(0, lambda c=current, l=last, ch=change: self._on_rise(c, l, ch, url, email))
-            else:
-                sp = self._start_price
-                self.after(0, lambda c=current, n=count, s=sp: (
-                    self._log(f"Check #{n}  ·  ${c:.2f}  ·  no change"),
-                    self._set_status(f"Watching  ·  check #{n} complete", ACCENT_ICE),
-                    self._update_display(c, s, "same"),
-                ))
-
-            self._last_price = current
-
-
-    def _on_drop(self, current, last, change, url, email):
-        self._last_price = current
-        self._update_display(current, self._start_price, "drop")
-        self._log(f"Drop  ${last:.2f} → ${current:.2f}  (−${change:.2f})  · email sent")
-        self._set_status(f"Price dropped ${change:.2f}!  Email sent.", GREEN_FROST)
-        threading.Thread(target=send_email, args=(
-            f"Price Dropped to ${current:.2f}!",
-            f"""
-            <div style="font-family:'Segoe UI',sans-serif;max-width:500px;margin:auto;
-                        background:#0d1628;color:#deeeff;border-radius:12px;padding:32px">
-              <div style="font-size:32px;margin-bottom:8px">❄ 💰</div>
-              <h2 style="color:#5ddba5;margin:0 0 6px">Price Drop Detected</h2>
-              <p style="color:#4a6a8a;font-size:14px;margin:0 0 24px">
-                Good news — the price went down.
-              </p>
-              <table style="width:100%;font-size:15px;border-collapse:collapse">
-                <tr style="border-bottom:1px solid #1e3356">
-                  <td style="padding:10px 0;color:#4a6a8a">Was</td>
-                  <td style="padding:10px 0;text-align:right;color:#4a6a8a"><s>${last:.2f}</s></td>
-                </tr>
-                <tr style="border-bottom:1px solid #1e3356">
-                  <td style="padding:10px 0;font-weight:bold">Now</td>
-                  <td style="padding:10px 0;text-align:right;font-weight:bold;
-                             color:#5ddba5;font-size:20px">${current:.2f}</td>
-                </tr>
-                <tr>
-                  <td style="padding:10px 0;color:#5ddba5">You save</td>
-                  <td style="padding:10px 0;text-align:right;color:#5ddba5">${change:.2f}</td>
-                </tr>
-              </table>
-              <a href="{url}" style="display:inline-block;margin-top:24px;
-                 background:#5ddba5;color:#080e1a;padding:13px 28px;
-                 text-decoration:none;border-radius:8px;font-weight:bold;font-size:15px">
-                Buy Now →
-              </a>
-            </div>
-            """,
-            email,
-        ), daemon=True).start()
-
-    def _on_rise(self, current, last, change, url, email):
-        self._last_price = current
-        self._update_display(current, self._start_price, "rise")
-        self._log(f"Rise  ${last:.2f} → ${current:.2f}  (+${change:.2f})  · email sent")
-        self._set_status(f"📈  Price rose ${change:.2f}.  Email sent.", ORANGE_EMBER)
-        threading.Thread(target=send_email, args=(
-            f"Price Increased to ${current:.2f}",
-            f"""
-            <div style="font-family:'Segoe UI',sans-serif;max-width:500px;margin:auto;
-                        background:#0d1628;color:#deeeff;border-radius:12px;padding:32px">
-              <div style="font-size:32px;margin-bottom:8px">❄ 📈</div>
-              <h2 style="color:#f09060;margin:0 0 6px">Price Increase Detected</h2>
-              <p style="color:#4a6a8a;font-size:14px;margin:0 0 24px">
-                The price went up since your last check.
-              </p>
-              <table style="width:100%;font-size:15px;border-collapse:collapse">
-                <tr style="border-bottom:1px solid #1e3356">
-                  <td style="padding:10px 0;color:#4a6a8a">Was</td>
-                  <td style="padding:10px 0;text-align:right;color:#4a6a8a">${last:.2f}</td>
-                </tr>
-                <tr>
-                  <td style="padding:10px 0;font-weight:bold">Now</td>
-                  <td style="padding:10px 0;text-align:right;font-weight:bold;
-                             color:#f09060;font-size:20px">${current:.2f}</td>
-                </tr>
-              </table>
-              <a href="{url}" style="display:inline-block;margin-top:24px;
-                 background:#4da6d6;color:#080e1a;padding:13px 28px;
-                 text-decoration:none;border-radius:8px;font-weight:bold;font-size:15px">
-                View Product →
-              </a>
-            </div>
-            """,
-            email,
-        ), daemon=True).start()
-
-    def _update_display(self, current: float, start: float, state: str):
-        color_map = {
-            "drop":  GREEN_FROST,
-            "rise":  ORANGE_EMBER,
-            "same":  TEXT_PRIMARY,
-            "start": ACCENT_ICE,
-        }
-        self.lbl_current.configure(
-            text=f"${current:.2f}",
-            text_color=color_map.get(state, TEXT_PRIMARY),
-        )
-        if start is not None:
-            self.lbl_start.configure(text=f"${start:.2f}", text_color=TEXT_MUTED)
-        self.lbl_checks.configure(text=str(self._check_count), text_color=TEXT_MUTED)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close()
+
+
+def cmd_track(args) -> int:
+    from tracker.engine import TrackerEngine
+
+    items = load_watchlist(args.watchlist, args.email, args.interval)
+    if not items:
+        print(f"No products in {args.watchlist}", file=sys.stderr)
+        return 1
+
+    snapshots = None
+    if not args.no_snapshot:
+        from tracker.snapshot import SnapshotStore
+        snapshots = SnapshotStore(args.snapshot, every=args.snapshot_every)
+
+    engine_kwargs, close = _tracker_parts(args)
+    engine = TrackerEngine(snapshots=snapshots, **engine_kwargs)
+    for url, email, interval in items:
+        engine.add(url, email, interval)
+    if snapshots is not None:
+        try:
+            snapshot = snapshots.load()
+        except (OSError, ValueError) as e:
+            print("Snapshot error:", e)
+            snapshot = None
+        if snapshot is not None:
+            restored = snapshots.restore(engine, snapshot)
+            age = time.time() - snapshot.saved_at
+            _print(f"Resumed {restored} products from {args.snapshot} ({age:.0f}s old)")
+    _print(f"— Tracking {len(items)} products —")
+    _run(engine, close)
+    _print("— Tracker stopped —")
+    return 0
+
+
+def cmd_work(args) -> int:
+    from tracker.leases import LeaseWorker, open_queue
+
+    if args.budget is not None:
+        print("work: --budget needs the whole watchlist in one process; use it with track",
+              file=sys.stderr)
+        return 1
+    queue = open_queue(args.queue)
+    engine_kwargs, close = _tracker_parts(args)
+    worker = LeaseWorker(queue, lease=args.lease, **engine_kwargs)
+    _print(f"— Worker {worker.worker_id} on {args.queue} —")
+    _run(worker, close)
+    queue.close()
+    _print(f"— Worker stopped ({worker.lost} lost leases) —")
+    return 0
+
+
+def cmd_queue(args) -> int:
+    from tracker.leases import open_queue, serve
+
+    queue = open_queue(args.queue)
+    try:
+        if args.action == "add":
+            if not args.watchlist:
+                print("queue add needs --watchlist", file=sys.stderr)
+                return 1
+            from tracker.bulk import ImportReport, iter_watchlist, merge_recipients
+            report = ImportReport()
+            items  = merge_recipients(iter_watchlist(args.watchlist, args.email, args.interval,
+                                                     report=report))
+            queue.add_many((w.url, w.email, w.interval) for w in items)
+            print(report.summary())
+            _print_report(report, summary=False)
+        elif args.action == "stats":
+            stats = queue.stats()
+            print(f"{stats['products']} products, {stats['due']} due, {stats['leased']} leased")
+            for w in stats["workers"]:
+                print(f"  {w['id']:<40} {w['checks']:>10} checks  seen {datetime.fromtimestamp(w['seen']):%H:%M:%S}")
+        elif args.action == "serve":
+            server = serve(queue, args.port, args.host)
+            _print(f"Work queue {args.queue} on http://{args.host}:{server.server_port}")
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+    return 0
 
 
-    def on_close(self):
-        self._tracking = False
-        self.snow.stop()
-        self.destroy()
+def cmd_stats(args) -> int:
+    from tracker.analytics import SeriesBatch, rolling, summarize
+    from tracker.history import HistoryStore
+
+    if not os.path.exists(args.history):
+        print(f"No history at {args.history}", file=sys.stderr)
+        return 1
+    store = HistoryStore(args.history)
+    try:
+        products = [args.product] if args.product else sorted(store.latest_all())
+        batch    = SeriesBatch.from_store(store, products, args.days)
+        summary  = summarize(batch)
+    finally:
+        store.close()
+    header = f"{'product':<55} {'n':>5} {'low':>9} {'high':>9} {'mean':>9} {'std':>8} {'last':>9} {'off high':>8}"
+    if args.window:
+        header += f" {f'mean/{args.window}':>9} {f'std/{args.window}':>8}"
+    print(header)
+    for i, (product, row) in enumerate(zip(products, summary.rows(list(range(len(products)))))):
+        if row["last"] is None:
+            continue
+        off = (1 - row["last"] / row["high"]) * 100
+        name = product if len(product) <= 55 else product[:54] + "…"
+        line = (f"{name:<55} {int(summary.count[i]):>5} {row['low']:>9.2f} {row['high']:>9.2f} "
+                f"{row['mean']:>9.2f} {row['std']:>8.2f} {row['last']:>9.2f} {off:>7.1f}%")
+        if args.window:
+            mean, std = rolling(batch.prices[batch.offsets[i]:batch.offsets[i + 1]], args.window)
+            line += f" {mean[-1]:>9.2f} {std[-1]:>8.2f}"
+        print(line)
+    return 0
+
+
+def cmd_replay(args) -> int:
+    from tracker.archive import PageArchive, replay, resolve_extractors
+
+    if not os.path.exists(os.path.join(args.archive, "index.db")):
+        print(f"No archive at {args.archive}", file=sys.stderr)
+        return 1
+    try:
+        extractors = resolve_extractors(args.extractors)
+    except (ImportError, AttributeError, ValueError) as e:
+        print("Extractor error:", e, file=sys.stderr)
+        return 1
+    archive = PageArchive(args.archive)
+    try:
+        since  = time.time() - args.days * 86400 if args.days else None
+        pages  = archive.pages(args.product, since=since, misses=args.misses, by_hash=True)
+        report = replay(archive, extractors, workers=args.workers, pages=pages,
+                        max_diffs=args.diffs)
+        stats  = archive.stats()
+    finally:
+        archive.close()
+    print(f"archive: {stats['pages']} pages, {stats['bodies']} distinct bodies, "
+          f"{stats['on_disk_bytes'] / 1e6:.1f} MB on disk ({stats['compression']}x compressed)")
+    print(json.dumps(report.summary()))
+    for product, ts, old, new, name in report.diffs:
+        old_s = "—" if old is None else f"${old:.2f}"
+        new_s = "—" if new is None else f"${new:.2f} ({name})"
+        print(f"  {datetime.fromtimestamp(ts):%Y-%m-%d %H:%M:%S}  {product[:60]}  {old_s} → {new_s}")
+    return 0
+
+
+def cmd_check(args) -> int:
+    from tracker.asin import canonical_url
+    result = fetch_price(canonical_url(args.url))
+    stages = "  ".join(f"{k} {v * 1000:.0f} ms" for k, v in result.timings.items())
+    if result.price is None:
+        print(f"Could not fetch price: {result.failure} ({result.error or 'no price on page'})",
+              file=sys.stderr)
+        if stages:
+            print(stages, file=sys.stderr)
+        return 1
+    print(f"${result.price:.2f}  ({result.extractor}, {result.latency * 1000:.0f} ms)")
+    if stages:
+        print(stages)
+    return 0
+
+
+def cmd_import(args) -> int:
+    from tracker.bulk import ImportReport, detect_format, export_watchlist, iter_watchlist
+
+    if args.out and detect_format(args.out) == "text":
+        print("--out must end in .csv or .jsonl", file=sys.stderr)
+        return 1
+    report = ImportReport()
+    items  = iter_watchlist(args.file, args.email, args.interval, fmt=args.format, report=report)
+    if args.out:
+        export_watchlist(args.out, items)
+    else:
+        for _ in items:
+            pass
+    print(report.summary())
+    _print_report(report, args.show_errors, summary=False)
+    return 0 if report.imported else 1
+
+
+def cmd_export(args) -> int:
+    from tracker.bulk import detect_format, export_history
+    from tracker.history import HistoryStore
+
+    if not os.path.exists(args.history):
+        print(f"No history at {args.history}", file=sys.stderr)
+        return 1
+    if detect_format(args.out) == "text":
+        print("output must end in .csv or .jsonl", file=sys.stderr)
+        return 1
+    store = HistoryStore(args.history)
+    try:
+        n = export_history(args.out, store, since=args.since, product=args.product)
+    finally:
+        store.close()
+    print(f"Wrote {n} checks to {args.out}")
+    return 0
+
+
+def cmd_gui(args) -> int:
+    import gui
+    gui.run(snow_fps=getattr(args, "snow_fps", 25))
+    return 0
+
+
+def _add_tracking_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--concurrency", type=int, default=32, help="checks in flight at once (default 32)")
+    p.add_argument("--rate", type=float, default=10.0, help="requests per second per host (default 10)")
+    p.add_argument("--history", default="price_history.db", help="SQLite history file")
+    p.add_argument("--no-history", action="store_true", help="don't record checks")
+    p.add_argument("--digest", type=float, default=0, metavar="SECONDS",
+                   help="merge alerts per recipient within this window (default off)")
+    p.add_argument("--email-workers", type=int, default=4, help="email sender threads (default 4)")
+    p.add_argument("--email-batch", type=int, default=1,
+                   help="send up to N queued emails per API call (default 1)")
+    p.add_argument("--parse-workers", type=int, default=0,
+                   help="parse pages on N worker processes, 0 = in the fetch threads (default 0)")
+    p.add_argument("--drain-kb", type=int, default=256, metavar="KB",
+                   help="keep the connection if at most KB of a page is left unread (default 256)")
+    p.add_argument("--cache-ttl", type=float, default=30, metavar="SECONDS",
+                   help="reuse a product's price for this long across watchers, 0 = off (default 30)")
+    p.add_argument("--quiet", action="store_true", help="only print changes and errors")
+    p.add_argument("--metrics-port", type=int, default=0,
+                   help="serve Prometheus metrics on 127.0.0.1:PORT/metrics (default off)")
+    g = p.add_argument_group("alert rules", "any of these replaces the email on every price change")
+    g.add_argument("--min-change", type=float, metavar="PCT",
+                   help="email when the price moves at least PCT percent")
+    g.add_argument("--drop-from-high", type=float, metavar="PCT",
+                   help="email when the price falls PCT percent under its --high-days high")
+    g.add_argument("--high-days", type=float, default=30, help="window for the high (default 30)")
+    g.add_argument("--new-low", action="store_true", help="email on a new all-time low")
+    g.add_argument("--targets", metavar="FILE", help="text file of `URL PRICE` target prices")
+    g = p.add_argument_group("page archive", "keep fetched pages for `replay`")
+    g.add_argument("--archive", metavar="DIR", help="archive page bodies in DIR (default off)")
+    g.add_argument("--archive-misses", action="store_true", help="only pages without a price")
+    g.add_argument("--archive-max-mb", type=float, metavar="MB", help="drop the oldest pages past this size")
+    g.add_argument("--archive-days", type=float, metavar="DAYS", help="drop pages older than this")
+    g = p.add_argument_group("adaptive intervals",
+                             "learn each product's check interval from how often its price changes")
+    g.add_argument("--adaptive", action="store_true",
+                   help="replace the fixed interval; it only seeds each product's estimate")
+    g.add_argument("--min-interval", type=float, default=30, help="shortest interval (default 30)")
+    g.add_argument("--max-interval", type=float, default=6 * 3600,
+                   help="longest interval (default 21600)")
+    g.add_argument("--budget", type=float, metavar="RPS",
+                   help="cap planned checks per second across all products (default none)")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="price_tracker", description="Amazon price tracker")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("gui", help="open the tracker window (default)")
+    p.add_argument("--snow-fps", type=int, default=25, help="snow animation frame rate, 0 = off (default 25)")
+    p.set_defaults(func=cmd_gui)
+
+    p = sub.add_parser("track", help="track a watchlist headless")
+    p.add_argument("--watchlist", required=True,
+                   help=".csv / .jsonl watchlist, or text with one URL [email] [interval] per line")
+    p.add_argument("--email", default="", help="alert address for lines without one")
+    p.add_argument("--interval", type=float, default=60, help="seconds between checks (default 60)")
+    p.add_argument("--snapshot", default="tracker_state.snap",
+                   help="state snapshot to resume from and keep updated")
+    p.add_argument("--snapshot-every", type=float, default=60, metavar="SECONDS",
+                   help="seconds between snapshots (default 60)")
+    p.add_argument("--no-snapshot", action="store_true", help="start cold and don't snapshot")
+    _add_tracking_arguments(p)
+    p.set_defaults(func=cmd_track)
+
+    p = sub.add_parser("work", help="check products claimed from a shared work queue")
+    p.add_argument("--queue", default="work_queue.db", help="queue file, or http://host:port of `queue serve`")
+    p.add_argument("--lease", type=float, default=60, help="seconds a claim is held without renewal (default 60)")
+    _add_tracking_arguments(p)
+    p.set_defaults(func=cmd_work)
+
+    p = sub.add_parser("queue", help="manage the shared work queue")
+    p.add_argument("action", choices=("add", "stats", "serve"))
+    p.add_argument("--queue", default="work_queue.db", help="queue file (or http://host:port for add/stats)")
+    p.add_argument("--watchlist", help="products to add (.csv, .jsonl or text)")
+    p.add_argument("--email", default="", help="alert address for rows without one")
+    p.add_argument("--interval", type=float, default=60, help="interval for rows without one (default 60)")
+    p.add_argument("--host", default="127.0.0.1", help="serve: address to listen on")
+    p.add_argument("--port", type=int, default=8765, help="serve: port (default 8765)")
+    p.set_defaults(func=cmd_queue)
+
+    p = sub.add_parser("import", help="validate and de-duplicate a watchlist")
+    p.add_argument("file", help=".csv (url,email,interval), .jsonl or text watchlist")
+    p.add_argument("--out", help="write the clean watchlist here (.csv or .jsonl)")
+    p.add_argument("--format", choices=("csv", "jsonl", "text"), help="input format (default: from extension)")
+    p.add_argument("--email", default="", help="alert address for rows without one")
+    p.add_argument("--interval", type=float, default=60, help="interval for rows without one (default 60)")
+    p.add_argument("--show-errors", type=int, default=20, metavar="N", help="bad rows to print (default 20)")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="export price history as .csv or .jsonl")
+    p.add_argument("out", help="output file (.csv or .jsonl)")
+    p.add_argument("--history", default="price_history.db", help="SQLite history file")
+    p.add_argument("--product", help="only this product URL")
+    p.add_argument("--since", type=float, default=0.0, metavar="UNIX_TS", help="only checks after this time")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("stats", help="price statistics from the history")
+    p.add_argument("--history", default="price_history.db", help="SQLite history file")
+    p.add_argument("--days", type=float, default=30, help="window for high / mean / stddev (default 30)")
+    p.add_argument("--product", help="only this URL")
+    p.add_argument("--window", type=int, default=0, metavar="N",
+                   help="also show mean and stddev of the last N checks (default off)")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("replay", help="re-run extractors over archived pages, offline")
+    p.add_argument("--archive", default="page_archive", help="archive directory")
+    p.add_argument("--extractors", metavar="LIST",
+                   help="comma-separated names (scan, lxml, soup) or module:function (default: all)")
+    p.add_argument("--workers", type=int, default=0, help="parse on N processes (default 0, in-process)")
+    p.add_argument("--product", help="only this URL")
+    p.add_argument("--days", type=float, help="only pages from the last N days")
+    p.add_argument("--misses", action="store_true", help="only pages the live check found no price on")
+    p.add_argument("--diffs", type=int, default=20, help="list up to N pages that now differ (default 20)")
+    p.set_defaults(func=cmd_replay)
+
+    p = sub.add_parser("check", help="fetch one price and exit")
+    p.add_argument("url")
+    p.set_defaults(func=cmd_check)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        return cmd_gui(args)
+    return args.func(args)
 
 
 if __name__ == "__main__":
-    app = PriceTrackerApp()
-    try:
-        app.iconbitmap("favicon.ico")
-    except Exception:
-        pass
-    app.protocol("WM_DELETE_WINDOW", app.on_close)
-    app.mainloop()
+    sys.exit(main())
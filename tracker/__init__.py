@@ -0,0 +1,4 @@
+"""
+Headless building blocks for the price tracker: fetching, scheduling, storage.
+Nothing in this package imports tkinter or customtkinter.
+"""
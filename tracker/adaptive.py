@@ -0,0 +1,167 @@
+"""
+Adaptive per-product check intervals learned from each product's changes.
+
+A product's price changes are treated as a Poisson process. The rate is
+estimated from the checks themselves. Each successful check adds 1 to
+`polls`, adds the seconds since the previous one to `watched`, and adds 1 to
+`changes` if the price moved. All three decay with a half-life of `horizon`,
+so old behaviour fades. A check only shows whether the price moved at least
+once, so `changes` undercounts. changes_seen() corrects for that with the
+estimator from Cho & Garcia-Molina, "Estimating Frequency of Change":
+-n·ln((n - X + 0.5) / (n + 0.5)). One pseudo-change per polls_per_change x
+the configured interval acts as the prior. A new product therefore starts
+at its configured interval, and a couple of quiet checks don't swing it.
+
+To see the most distinct changes for a given number of requests, poll each
+product in proportion to its change rate λ. The changes seen per second,
+p(1 - e^(-λ/p)), all gain equally from an extra request when λ/p is the
+same for every product. So the delay is 1 / (k·λ·boost), clamped to
+[min_interval, max_interval]. k is polls_per_change unless a `budget`
+(requests per second across all products) forces it lower; retune()
+recomputes it over the whole StateTable every `retune_every` seconds.
+boost is near_boost for products within `near` of their target price or,
+with watch_low, of their all-time low.
+"""
+
+import math
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def changes_seen(polls: float, changed: float) -> float:
+    """Estimated changes behind `changed` of `polls` checks seeing a new price."""
+    return -polls * math.log((polls - changed + 0.5) / (polls + 0.5))
+
+
+class AdaptiveIntervals:
+    def __init__(self, min_interval: float = 30.0, max_interval: float = 6 * 3600.0,
+                 budget: float | None = None, polls_per_change: float = 2.0,
+                 horizon: float = 7 * 86400.0, targets: dict[str, float] | None = None,
+                 watch_low: bool = False, near: float = 0.05, near_boost: float = 4.0,
+                 retune_every: float = 30.0, clock=time.time):
+        self.min_interval     = min_interval
+        self.max_interval     = max_interval
+        self.budget           = budget
+        self.polls_per_change = polls_per_change
+        self.horizon          = horizon
+        self.targets          = targets or {}
+        self.watch_low        = watch_low
+        self.near             = near
+        self.near_boost       = near_boost
+        self.retune_every     = retune_every
+        self.clock            = clock
+        self.k                = polls_per_change
+        self._retune_at       = 0.0
+
+    def next_interval(self, product, result) -> float:
+        """Fold `result` into `product`'s change rate and return its next delay."""
+        now = self.clock()
+        if result.price is not None:
+            last = product.checked_at
+            if last is not None and result.kind != "start":
+                dt    = max(0.0, now - last)
+                decay = 0.5 ** (dt / self.horizon)
+                product.polls   = product.polls * decay + 1
+                product.changes = product.changes * decay + (result.kind in ("drop", "rise"))
+                product.watched = product.watched * decay + dt
+            product.checked_at = now
+        if now >= self._retune_at:
+            self.retune(product.table)
+        return self.interval(product)
+
+    def rate(self, product) -> float:
+        """Estimated price changes per second."""
+        seen = changes_seen(product.polls, product.changes)
+        return (seen + 1) / (product.watched + self.polls_per_change * product.interval)
+
+    def boost(self, url: str, price: float | None, low: float | None) -> float:
+        if price is None:
+            return 1.0
+        target = self.targets.get(url)
+        if target is not None and price <= target * (1 + self.near):
+            return self.near_boost
+        if self.watch_low and low is not None and price <= low * (1 + self.near):
+            return self.near_boost
+        return 1.0
+
+    def interval(self, product) -> float:
+        polls = self.k * self.rate(product) * self.boost(product.url, product.last_price,
+                                                         product.low_price)
+        return min(self.max_interval, max(self.min_interval, 1 / polls))
+
+    def retune(self, table) -> float:
+        """Recompute k so the polls of every product in `table` fit the budget."""
+        self._retune_at = self.clock() + self.retune_every
+        if self.budget is None or not len(table):
+            self.k = self.polls_per_change
+            return self.k
+        ids = table.live_ids()
+        weights = self._weights(table, ids)
+        lo, hi = 1 / self.max_interval, 1 / self.min_interval
+
+        def total(k):
+            if np is not None:
+                return float(np.clip(k * weights, lo, hi).sum())
+            return sum(min(hi, max(lo, k * w)) for w in weights)
+
+        k = self.polls_per_change
+        if total(k) > self.budget:
+            low, high = 0.0, k
+            for _ in range(30):
+                k = (low + high) / 2
+                if total(k) > self.budget:
+                    high = k
+                else:
+                    low = k
+            k = low
+        self.k = k
+        return k
+
+    def _weights(self, table, ids: list[int]):
+        """rate x boost for each id, as an array when NumPy is available."""
+        cols  = {name: table.column(name) for name in
+                 ("polls", "changes", "watched", "interval", "last_price", "low_price")}
+        prior = self.polls_per_change
+        if np is not None:
+            idx  = np.asarray(ids, dtype=np.intp)
+            col  = {name: np.frombuffer(c, dtype=float)[idx] for name, c in cols.items()}
+            n    = col["polls"]
+            seen = -n * np.log((n - col["changes"] + 0.5) / (n + 0.5))
+            weights = (seen + 1) / (col["watched"] + prior * col["interval"])
+            price, low = col["last_price"], col["low_price"]
+            near = np.zeros(len(ids), dtype=bool)
+            if self.watch_low:
+                with np.errstate(invalid="ignore"):
+                    near |= price <= low * (1 + self.near)
+            if self.targets:
+                target = np.array([self.targets.get(table.urls[i], math.nan) for i in ids])
+                with np.errstate(invalid="ignore"):
+                    near |= price <= target * (1 + self.near)
+            return np.where(near, weights * self.near_boost, weights)
+        weights = []
+        for i in ids:
+            seen  = changes_seen(cols["polls"][i], cols["changes"][i])
+            w     = (seen + 1) / (cols["watched"][i] + prior * cols["interval"][i])
+            price = cols["last_price"][i]
+            low   = cols["low_price"][i]
+            weights.append(w * self.boost(table.urls[i], None if price != price else price,
+                                          None if low != low else low))
+        return weights
+
+    def stats(self, table) -> dict:
+        """Planned requests per second and the spread of intervals."""
+        intervals = sorted(self.interval(p) for p in table)
+        if not intervals:
+            return {"products": 0, "k": self.k, "planned_rps": 0.0}
+        return {
+            "products":    len(intervals),
+            "k":           self.k,
+            "planned_rps": round(sum(1 / i for i in intervals), 3),
+            "min":         round(intervals[0], 1),
+            "median":      round(intervals[len(intervals) // 2], 1),
+            "max":         round(intervals[-1], 1),
+        }
@@ -0,0 +1,408 @@
+"""
+Price analytics over stored series, and alert rules evaluated a batch at a time.
+
+SeriesBatch holds the price series of many products as two flat arrays
+(ts, price) plus per-product offsets. That lets summarize() work out every
+product's numbers in a handful of array operations: all-time low, high over
+the window, mean and standard deviation over the window, and latest price.
+With NumPy installed the work runs as reduceat over the segments; without
+it the same numbers come from plain loops. rolling() gives a trailing mean /
+stddev for a single series; `stats --window N` shows its latest values.
+
+AlertRules.evaluate() takes a whole batch of CheckResults with the summary of
+their history before that batch. It returns at most one Alert per product,
+listing every rule that fired. Rules fire when the price crosses a line, not
+on every check past it:
+  change    price moved at least min_change percent (0 = any change)
+  low       below the all-time low
+  off_high  drop_from_high percent or more under the window's high
+  target    at or under the product's target price
+AlertBatcher collects engine results and evaluates them every `interval`
+seconds on its own thread.
+"""
+
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Sequence
+
+from tracker import metrics
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NAN = float("nan")
+DAY = 86400.0
+
+ALERTS = metrics.METRICS.counter("alerts_total", "Alerts by rule")
+EVAL_SECONDS = metrics.METRICS.histogram("alert_eval_seconds", "Time per alert batch (load + evaluate)")
+
+
+@dataclass
+class SeriesBatch:
+    products: list[str]
+    ts: Sequence[float]            # flat, products[i] owns [offsets[i], offsets[i + 1])
+    prices: Sequence[float]
+    offsets: list[int]
+    lows: dict[str, float] = field(default_factory=dict)   # all-time, may predate ts
+
+    @classmethod
+    def from_rows(cls, products: list[str], rows: Iterable[tuple[str, float, float]],
+                  lows: dict[str, float] | None = None) -> "SeriesBatch":
+        """`rows` are (product, ts, price), grouped by product, oldest first."""
+        spans: dict[str, tuple[int, int]] = {}
+        ts, prices = [], []
+        current, start = None, 0
+        for product, t, price in rows:
+            if product != current:
+                if current is not None:
+                    spans[current] = (start, len(ts))
+                current, start = product, len(ts)
+            ts.append(t)
+            prices.append(price)
+        if current is not None:
+            spans[current] = (start, len(ts))
+
+        if list(spans) == products:
+            offsets = [s for s, _ in spans.values()] + [len(ts)]
+            return cls(products, ts, prices, offsets, lows or {})
+        # reorder into `products` order; unknown products get empty series
+        flat_ts, flat_prices, offsets = [], [], [0]
+        for p in products:
+            s, e = spans.get(p, (0, 0))
+            flat_ts += ts[s:e]
+            flat_prices += prices[s:e]
+            offsets.append(len(flat_ts))
+        return cls(products, flat_ts, flat_prices, offsets, lows or {})
+
+    @classmethod
+    def from_store(cls, store, products: list[str], days: float = 30.0,
+                   until: float | None = None) -> "SeriesBatch":
+        until = time.time() if until is None else until
+        rows  = store.series_many(products, until - days * DAY, until)
+        return cls.from_rows(products, rows, store.lows(products, until))
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+
+@dataclass
+class Summary:
+    """Per-product columns, in SeriesBatch.products order; NaN where there is no data."""
+    products: list[str]
+    count: Sequence[int]
+    low: Sequence[float]
+    high: Sequence[float]
+    mean: Sequence[float]
+    std: Sequence[float]
+    last: Sequence[float]
+
+    def rows(self, indices: list[int]) -> list[dict]:
+        """low / high / mean / std / last of each product in `indices`, None for NaN."""
+        names = ("low", "high", "mean", "std", "last")
+        cols  = []
+        for name in names:
+            col = getattr(self, name)
+            if np is not None and isinstance(col, np.ndarray):
+                cols.append(col[indices].tolist())
+            else:
+                cols.append([col[i] for i in indices])
+        return [{name: None if v != v else v for name, v in zip(names, values)}
+                for values in zip(*cols)]
+
+    @classmethod
+    def from_moments(cls, products: list[str], moments: list[tuple]) -> "Summary":
+        """From (count, low, high, sum, sum of squares, last) per product."""
+        count, low, high, mean, std, last = [], [], [], [], [], []
+        for n, lo, hi, s, s2, final in moments:
+            count.append(n)
+            low.append(lo)
+            high.append(hi)
+            last.append(final)
+            if n:
+                m = s / n
+                mean.append(m)
+                std.append(math.sqrt(max(s2 / n - m * m, 0.0)))
+            else:
+                mean.append(NAN)
+                std.append(NAN)
+        return cls(products, count, low, high, mean, std, last)
+
+
+def _opt(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+def summarize(batch: SeriesBatch) -> Summary:
+    if np is not None:
+        return _summarize_np(batch)
+    return _summarize_py(batch)
+
+
+def _summarize_np(batch: SeriesBatch) -> Summary:
+    n       = len(batch.products)
+    prices  = np.asarray(batch.prices, dtype=float)
+    offsets = np.asarray(batch.offsets, dtype=np.intp)
+    counts  = np.diff(offsets)
+    filled  = counts > 0
+    starts  = offsets[:-1][filled]
+
+    low, high, mean, std, last = (np.full(n, np.nan) for _ in range(5))
+    if prices.size:
+        low[filled]  = np.minimum.reduceat(prices, starts)
+        high[filled] = np.maximum.reduceat(prices, starts)
+        mean[filled] = np.add.reduceat(prices, starts) / counts[filled]
+        dev = prices - np.repeat(mean[filled], counts[filled])
+        std[filled]  = np.sqrt(np.add.reduceat(dev * dev, starts) / counts[filled])
+        last[filled] = prices[offsets[1:][filled] - 1]
+    stored = np.fromiter((batch.lows.get(p, np.nan) for p in batch.products), float, n)
+    low    = np.fmin(stored, low)
+    return Summary(batch.products, counts, low, high, mean, std, last)
+
+
+def _summarize_py(batch: SeriesBatch) -> Summary:
+    count, low, high, mean, std, last = [], [], [], [], [], []
+    prices, offsets = batch.prices, batch.offsets
+    for i, product in enumerate(batch.products):
+        seg = prices[offsets[i]:offsets[i + 1]]
+        stored = batch.lows.get(product, NAN)
+        count.append(len(seg))
+        if not seg:
+            low.append(stored)
+            high.append(NAN)
+            mean.append(NAN)
+            std.append(NAN)
+            last.append(NAN)
+            continue
+        m = math.fsum(seg) / len(seg)
+        low.append(min(seg) if math.isnan(stored) else min(stored, min(seg)))
+        high.append(max(seg))
+        mean.append(m)
+        std.append(math.sqrt(math.fsum((x - m) ** 2 for x in seg) / len(seg)))
+        last.append(seg[-1])
+    return Summary(batch.products, count, low, high, mean, std, last)
+
+
+def rolling(prices: Sequence[float], window: int) -> tuple[Sequence[float], Sequence[float]]:
+    """Trailing mean and stddev of `prices` over `window` points (fewer at the start)."""
+    if np is not None:
+        x  = np.asarray(prices, dtype=float)
+        c1 = np.concatenate(([0.0], np.cumsum(x)))
+        c2 = np.concatenate(([0.0], np.cumsum(x * x)))
+        hi = np.arange(1, x.size + 1)
+        lo = np.maximum(hi - window, 0)
+        n  = hi - lo
+        mean = (c1[hi] - c1[lo]) / n
+        var  = np.maximum((c2[hi] - c2[lo]) / n - mean * mean, 0.0)
+        return mean, np.sqrt(var)
+    means, stds = [], []
+    s = s2 = 0.0
+    for i, x in enumerate(prices):
+        s, s2 = s + x, s2 + x * x
+        if i >= window:
+            old = prices[i - window]
+            s, s2 = s - old, s2 - old * old
+        n = min(i + 1, window)
+        m = s / n
+        means.append(m)
+        stds.append(math.sqrt(max(s2 / n - m * m, 0.0)))
+    return means, stds
+
+
+@dataclass
+class Alert:
+    url: str
+    email: str
+    price: float
+    last: float | None
+    reasons: list[str]
+    stats: dict                    # Summary.rows() entry: the history before this check
+    target: float | None = None
+
+
+@dataclass
+class AlertRules:
+    min_change: float = 0.0                    # percent; 0 alerts on any change
+    drop_from_high: float | None = None        # percent under the window high
+    days: float = 30.0                         # window for high / mean / std
+    new_low: bool = False
+    targets: dict[str, float] = field(default_factory=dict)
+
+    def evaluate(self, results: list, summary: Summary) -> list[Alert]:
+        """One Alert per result that trips a rule; `results[i]` pairs with
+        summary.products[i]."""
+        if not results:
+            return []
+        fired = self._fire_np(results, summary) if np is not None else self._fire_py(results, summary)
+        alerts = []
+        stats  = summary.rows([i for i, _ in fired])
+        counts = Counter()
+        for (i, reasons), row in zip(fired, stats):
+            r = results[i]
+            counts.update(reasons)
+            alerts.append(Alert(r.url, r.email, r.price, _previous(r), reasons,
+                                row, self.targets.get(r.url)))
+        for reason, n in counts.items():
+            ALERTS.inc(n, rule=reason)
+        return alerts
+
+    def _fire_np(self, results: list, summary: Summary) -> list[tuple[int, list[str]]]:
+        n      = len(results)
+        price  = np.fromiter((NAN if r.price is None else r.price for r in results), float, n)
+        prev   = np.fromiter((_nan(_previous(r)) for r in results), float, n)
+        target = np.fromiter((self.targets.get(r.url, NAN) for r in results), float, n)
+        low    = np.asarray(summary.low, dtype=float)
+        high   = np.asarray(summary.high, dtype=float)
+        ok     = ~np.isnan(price)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            moved = np.abs(price - prev) / prev * 100
+            rules = {"change": ok & (price != prev) & ~np.isnan(prev) & (moved >= self.min_change)}
+            if self.new_low:
+                rules["low"] = ok & (price < low)
+            if self.drop_from_high is not None:
+                line = high * (1 - self.drop_from_high / 100)
+                rules["off_high"] = ok & (price <= line) & ~(prev <= line)
+            if self.targets:
+                rules["target"] = ok & (price <= target) & ~(prev <= target)
+
+        names = list(rules)
+        hits  = np.stack([rules[name] for name in names])
+        fired = np.flatnonzero(hits.any(axis=0))
+        return [(i, [name for name, hit in zip(names, row) if hit])
+                for i, row in zip(fired.tolist(), hits[:, fired].T.tolist())]
+
+    def _fire_py(self, results: list, summary: Summary) -> list[tuple[int, list[str]]]:
+        fired = []
+        for i, r in enumerate(results):
+            price, prev = r.price, _previous(r)
+            if price is None:
+                continue
+            reasons = []
+            if prev is not None and price != prev and abs(price - prev) / prev * 100 >= self.min_change:
+                reasons.append("change")
+            if self.new_low and price < summary.low[i]:
+                reasons.append("low")
+            high = summary.high[i]
+            if self.drop_from_high is not None and not math.isnan(high):
+                line = high * (1 - self.drop_from_high / 100)
+                if price <= line and not (prev is not None and prev <= line):
+                    reasons.append("off_high")
+            target = self.targets.get(r.url)
+            if target is not None and price <= target and not (prev is not None and prev <= target):
+                reasons.append("target")
+            if reasons:
+                fired.append((i, reasons))
+        return fired
+
+
+def _previous(result) -> float | None:
+    """The price before this check; None on a product's first check."""
+    return None if result.kind == "start" else result.last
+
+
+def _nan(value: float | None) -> float:
+    return NAN if value is None else value
+
+
+class AlertBatcher:
+    """Queues CheckResults and evaluates them against AlertRules in batches.
+
+    add() is cheap and safe from any thread. Every `interval` seconds a
+    worker thread takes the batch (the newest result per product), evaluates
+    it and hands each Alert to `notify`.
+
+    Each product's window is kept as running moments (count, low, high, sum,
+    sum of squares, last). A batch only reads history for products seen for
+    the first time or not reloaded in `refresh` seconds. For the others the
+    new price is folded in, so a tick costs about one array pass over the
+    batch. Between reloads, points that have aged out of the window still
+    count.
+    """
+
+    def __init__(self, rules: AlertRules, notify: Callable[[Alert], None],
+                 history=None, interval: float = 1.0, refresh: float = 3600.0):
+        self.rules    = rules
+        self.notify   = notify
+        self.history  = history
+        self.interval = interval
+        self.refresh  = refresh
+
+        self._moments: dict[str, tuple] = {}     # url -> (loaded at, count, low, high, sum, sum2, last)
+        self._pending: dict[str, object] = {}
+        self._lock    = threading.Lock()
+        self._stop    = threading.Event()
+        self._thread  = threading.Thread(target=self._loop, name="alerts", daemon=True)
+        self._thread.start()
+
+    def add(self, result) -> None:
+        if result.price is None:
+            return
+        with self._lock:
+            self._pending[result.url] = result
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self) -> None:
+        while True:
+            stopping = self._stop.wait(self.interval)
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self) -> list[Alert]:
+        with self._lock:
+            batch, self._pending = list(self._pending.values()), {}
+        if not batch:
+            return []
+        started = time.perf_counter()
+        try:
+            alerts = self.evaluate(batch)
+        except Exception as e:
+            print("Alert evaluation error:", e)
+            return []
+        EVAL_SECONDS.observe(time.perf_counter() - started)
+        for alert in alerts:
+            try:
+                self.notify(alert)
+            except Exception as e:
+                print("Alert callback error:", e)
+        return alerts
+
+    def evaluate(self, results: list) -> list[Alert]:
+        now      = time.time()
+        moments  = self._moments
+        products = [r.url for r in results]
+        stale    = [url for url in products
+                    if url not in moments or moments[url][0] < now - self.refresh]
+        if stale:
+            self._load(stale, min(r.ts for r in results) - 1e-6, now)
+        summary = Summary.from_moments(products, [moments[url][1:] for url in products])
+        alerts  = self.rules.evaluate(results, summary)
+        for r in results:
+            loaded, n, lo, hi, s, s2, _ = moments[r.url]
+            p = r.price
+            moments[r.url] = (loaded, n + 1, p if not lo <= p else lo, p if not hi >= p else hi,
+                              s + p, s2 + p * p, p)
+        return alerts
+
+    def _load(self, products: list[str], before: float, now: float) -> None:
+        if self.history is None:
+            for url in products:
+                self._moments[url] = (now, 0, NAN, NAN, 0.0, 0.0, NAN)
+            return
+        summary = summarize(SeriesBatch.from_store(self.history, products, self.rules.days, before))
+        cols = [summary.count, summary.low, summary.high, summary.mean, summary.std, summary.last]
+        if np is not None:
+            cols = [np.asarray(col).tolist() for col in cols]
+        for url, n, lo, hi, m, sd, final in zip(products, *cols):
+            if n:
+                self._moments[url] = (now, n, lo, hi, m * n, (sd * sd + m * m) * n, final)
+            else:
+                self._moments[url] = (now, 0, lo, NAN, 0.0, 0.0, NAN)
@@ -0,0 +1,478 @@
+"""
+Content-addressed archive of fetched page bodies, for offline re-extraction.
+
+add() queues a body with the outcome of its check and never blocks. If the
+queue is full the page is dropped and counted. One writer thread hashes each
+body (SHA-256). Only bodies it hasn't stored yet are zlib-compressed and
+appended to the current segment file, NNNNNN.seg under `directory`. A new
+segment starts every `segment_bytes`. An SQLite index maps each hash to its
+segment, offset and length. It also records every archived page by product
+and time, with the status, price and extractor seen when it was fetched.
+
+Retention drops whole segments, oldest first, together with the pages whose
+bodies live in them. A segment is dropped when the archive is over
+`max_bytes` or its newest write is older than `max_age` seconds. A body seen
+again after its segment was sealed is appended once more to the current
+segment, so a page's body lasts at least as long as the page.
+
+Streaming fetches stop reading once the price is confirmed. Their bodies
+are stored as read, flagged `truncated`. 304 responses and failed requests
+have no body and are not archived.
+
+replay() runs any extractor stack over the archive, optionally on a process
+pool. It streams pages in hash order, parses every distinct body once and
+compares the result with the price recorded for each page that has that
+body. A truncated body ends just past the price the live scan found, so an
+extractor that needs the rest of the page can't be judged on it: such
+pages are counted as `truncated` instead of lost or changed.
+"""
+
+import hashlib
+import importlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from tracker import metrics
+from tracker.extractors import EXTRACTORS, Extractor, ProcessExtractor, extract
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash    BLOB PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset  INTEGER NOT NULL,
+    length  INTEGER NOT NULL,
+    size    INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blobs_segment ON blobs (segment);
+
+CREATE TABLE IF NOT EXISTS pages (
+    id        INTEGER PRIMARY KEY,
+    product   TEXT NOT NULL,
+    ts        REAL NOT NULL,
+    hash      BLOB NOT NULL,
+    status    INTEGER,
+    price     REAL,
+    extractor TEXT,
+    blocked   INTEGER NOT NULL DEFAULT 0,
+    truncated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pages_product_ts ON pages (product, ts);
+CREATE INDEX IF NOT EXISTS pages_ts ON pages (ts);
+CREATE INDEX IF NOT EXISTS pages_hash ON pages (hash);
+
+CREATE TABLE IF NOT EXISTS segments (
+    id      INTEGER PRIMARY KEY,
+    bytes   INTEGER NOT NULL DEFAULT 0,
+    last_ts REAL
+);
+"""
+
+INSERT_PAGE = """
+INSERT INTO pages (product, ts, hash, status, price, extractor, blocked, truncated)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+ARCHIVED = metrics.METRICS.counter("archive_pages_total", "Archived pages by outcome")
+
+_STOP = object()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@dataclass
+class ArchivedPage:
+    id: int
+    product: str
+    ts: float
+    hash: bytes
+    status: int | None
+    price: float | None
+    extractor: str | None
+    blocked: bool
+    truncated: bool
+
+
+class PageArchive:
+    """Deduplicated, compressed page bodies in append-only segments."""
+
+    def __init__(self, directory: str = "page_archive", segment_bytes: int = 64 * 1024 * 1024,
+                 max_bytes: int | None = None, max_age: float | None = None,
+                 misses_only: bool = False, level: int = 6, queue_size: int = 256,
+                 batch_size: int = 100, flush_interval: float = 0.5, prune_every: float = 60.0):
+        self.directory      = directory
+        self.segment_bytes  = segment_bytes
+        self.max_bytes      = max_bytes
+        self.max_age        = max_age
+        self.misses_only    = misses_only
+        self.level          = level
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+        self.prune_every    = prune_every
+        self.path           = os.path.join(directory, "index.db")
+
+        os.makedirs(directory, exist_ok=True)
+        conn = _connect(self.path)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        metrics.METRICS.gauge("archive_queue", "Pages waiting to be archived", fn=self._queue.qsize)
+        self._readers = threading.local()
+        self._writer  = threading.Thread(target=self._write_loop, name="archive-writer", daemon=True)
+        self._writer.start()
+
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"{segment:06d}.seg")
+
+    def add(self, product: str, body: bytes, result) -> None:
+        """Queue `body` with its PriceResult; skipped with misses_only when it had a price."""
+        if self.misses_only and result.price is not None:
+            return
+        try:
+            self._queue.put_nowait((product, time.time(), body, result.status, result.price,
+                                    result.extractor, result.blocked, result.truncated))
+        except queue.Full:
+            ARCHIVED.inc(outcome="dropped")
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Block until every page queued so far has been written."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    # -- writing -------------------------------------------------------------
+
+    def _write_loop(self) -> None:
+        conn = _connect(self.path)
+        row  = conn.execute("SELECT id FROM segments ORDER BY id DESC LIMIT 1").fetchone()
+        self._segment = row[0] if row else self._new_segment(conn)
+        self._out     = open(self.segment_path(self._segment), "ab")
+        pruned_at = 0.0
+        stop = False
+        while not stop:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._commit(conn, batch)
+                except (OSError, sqlite3.Error) as e:
+                    print("Archive write error:", e)
+            if (self.max_bytes or self.max_age) and time.monotonic() - pruned_at >= self.prune_every:
+                pruned_at = time.monotonic()
+                try:
+                    self.prune(conn)
+                except (OSError, sqlite3.Error) as e:
+                    print("Archive prune error:", e)
+            for waiter in waiters:
+                waiter.set()
+        self._out.close()
+        conn.close()
+
+    def _new_segment(self, conn: sqlite3.Connection) -> int:
+        with conn:
+            return conn.execute("INSERT INTO segments (bytes) VALUES (0)").lastrowid
+
+    def _commit(self, conn: sqlite3.Connection, batch: list[tuple]) -> None:
+        blobs, pages, outcomes = {}, [], Counter()
+        for product, ts, body, status, price, extractor, blocked, truncated in batch:
+            digest = hashlib.sha256(body).digest()
+            if digest not in blobs:
+                row = conn.execute("SELECT segment FROM blobs WHERE hash = ?", (digest,)).fetchone()
+                if row is None or row[0] != self._segment:
+                    data   = zlib.compress(body, self.level)
+                    offset = self._out.tell()
+                    self._out.write(data)
+                    blobs[digest] = (digest, self._segment, offset, len(data), len(body))
+                    outcomes["stored"] += 1
+                else:
+                    blobs[digest] = None
+                    outcomes["deduped"] += 1
+            else:
+                outcomes["deduped"] += 1
+            pages.append((product, ts, digest, status, price, extractor, int(blocked), int(truncated)))
+
+        # the index never points at bytes that aren't on disk yet
+        self._out.flush()
+        os.fsync(self._out.fileno())
+        size = self._out.tell()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?)",
+                             [b for b in blobs.values() if b is not None])
+            conn.executemany(INSERT_PAGE, pages)
+            conn.execute("UPDATE segments SET bytes = ?, last_ts = ? WHERE id = ?",
+                         (size, max(p[1] for p in pages), self._segment))
+        for outcome, n in outcomes.items():
+            ARCHIVED.inc(n, outcome=outcome)
+        if size >= self.segment_bytes:
+            self._out.close()
+            self._segment = self._new_segment(conn)
+            self._out     = open(self.segment_path(self._segment), "ab")
+
+    def prune(self, conn: sqlite3.Connection | None = None) -> int:
+        """Drop the oldest sealed segments past max_bytes / max_age. Returns how many.
+        Without `conn` this must not race the writer, so only call it on a closed archive."""
+        own  = conn is None
+        conn = conn or _connect(self.path)
+        current = getattr(self, "_segment", None)
+        try:
+            segments = conn.execute("SELECT id, bytes, last_ts FROM segments ORDER BY id").fetchall()
+            total    = sum(s[1] for s in segments)
+            cutoff   = time.time() - self.max_age if self.max_age else None
+            dropped  = 0
+            for seg, size, last_ts in segments[:-1]:
+                if seg == current:
+                    break
+                over  = self.max_bytes is not None and total > self.max_bytes
+                stale = cutoff is not None and (last_ts or 0) < cutoff
+                if not (over or stale):
+                    break
+                with conn:
+                    conn.execute("DELETE FROM pages WHERE hash IN "
+                                 "(SELECT hash FROM blobs WHERE segment = ?)", (seg,))
+                    conn.execute("DELETE FROM blobs WHERE segment = ?", (seg,))
+                    conn.execute("DELETE FROM segments WHERE id = ?", (seg,))
+                try:
+                    os.remove(self.segment_path(seg))
+                except FileNotFoundError:
+                    pass
+                total   -= size
+                dropped += 1
+            return dropped
+        finally:
+            if own:
+                conn.close()
+
+    # -- reading -------------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._readers.conn = _connect(self.path)
+        return conn
+
+    def pages(self, product: str | None = None, since: float | None = None,
+              until: float | None = None, misses: bool = False,
+              by_hash: bool = False) -> Iterator[ArchivedPage]:
+        """Archived pages, oldest first, or grouped by body with `by_hash`;
+        `misses` keeps those that had no price. Rows are read as they're used."""
+        sql, args = ["SELECT * FROM pages WHERE 1"], []
+        if product is not None:
+            sql.append("AND product = ?")
+            args.append(product)
+        if since is not None:
+            sql.append("AND ts >= ?")
+            args.append(since)
+        if until is not None:
+            sql.append("AND ts < ?")
+            args.append(until)
+        if misses:
+            sql.append("AND price IS NULL")
+        sql.append("ORDER BY hash, ts" if by_hash else "ORDER BY ts")
+        for row in self._conn().execute(" ".join(sql), args):
+            yield ArchivedPage(*row)
+
+    def bodies(self, hashes: list[bytes]) -> list[bytes | None]:
+        """Decompressed bodies for `hashes`, in order; None for ones no longer stored.
+        Reads each segment in offset order."""
+        conn, where = self._conn(), {}
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for digest, seg, offset, length in conn.execute(
+                    f"SELECT hash, segment, offset, length FROM blobs WHERE hash IN ({marks})", chunk):
+                where[digest] = (seg, offset, length)
+        found: dict[bytes, bytes] = {}
+        by_segment = defaultdict(list)
+        for digest, (seg, offset, length) in where.items():
+            by_segment[seg].append((offset, length, digest))
+        for seg, entries in by_segment.items():
+            entries.sort()
+            with open(self.segment_path(seg), "rb") as f:
+                for offset, length, digest in entries:
+                    f.seek(offset)
+                    found[digest] = zlib.decompress(f.read(length))
+        return [found.get(digest) for digest in hashes]
+
+    def body(self, digest: bytes) -> bytes | None:
+        return self.bodies([digest])[0]
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        pages, products, misses = conn.execute(
+            "SELECT count(*), count(DISTINCT product), count(*) - count(price) FROM pages").fetchone()
+        blobs, raw, stored = conn.execute(
+            "SELECT count(*), coalesce(sum(size), 0), coalesce(sum(length), 0) FROM blobs").fetchone()
+        segments, on_disk = conn.execute(
+            "SELECT count(*), coalesce(sum(bytes), 0) FROM segments").fetchone()
+        return {
+            "pages":          pages,
+            "products":       products,
+            "misses":         misses,
+            "bodies":         blobs,
+            "segments":       segments,
+            "raw_bytes":      raw,
+            "stored_bytes":   stored,
+            "on_disk_bytes":  on_disk,
+            "compression":    round(raw / stored, 2) if stored else None,
+        }
+
+
+# -- replay ------------------------------------------------------------------
+
+def resolve_extractors(spec: str | None) -> list[tuple[str, Extractor]]:
+    """Comma-separated extractor names from EXTRACTORS, or module:function for
+    one under test (module level, so a process pool can pickle it)."""
+    if not spec:
+        return list(EXTRACTORS)
+    known, stack = dict(EXTRACTORS), []
+    for name in (s.strip() for s in spec.split(",")):
+        if name in known:
+            stack.append((name, known[name]))
+        elif ":" in name:
+            module, _, attr = name.partition(":")
+            stack.append((name, getattr(importlib.import_module(module), attr)))
+        else:
+            raise ValueError(f"unknown extractor {name!r} (known: {', '.join(known)})")
+    return stack
+
+
+@dataclass
+class ReplayReport:
+    pages: int = 0
+    bodies: int = 0
+    raw_bytes: int = 0
+    seconds: float = 0.0
+    same: int = 0          # found the recorded price
+    changed: int = 0       # found a different price
+    gained: int = 0        # found a price where the live check found none
+    lost: int = 0          # found nothing where the live check had a price
+    missing: int = 0       # no price either way
+    truncated: int = 0     # lost or changed, but on a body cut short after the live price
+    unavailable: int = 0   # body no longer stored
+    by_extractor: Counter = field(default_factory=Counter)
+    diffs: list[tuple] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        return {
+            "pages":       self.pages,
+            "bodies":      self.bodies,
+            "seconds":     round(self.seconds, 3),
+            "bodies_per_s": round(self.bodies / self.seconds, 1) if self.seconds else None,
+            "mb_per_s":    round(self.raw_bytes / 1e6 / self.seconds, 1) if self.seconds else None,
+            "same":        self.same,
+            "changed":     self.changed,
+            "gained":      self.gained,
+            "lost":        self.lost,
+            "missing":     self.missing,
+            "truncated":   self.truncated,
+            "unavailable": self.unavailable,
+            "by_extractor": dict(self.by_extractor),
+        }
+
+
+def _groups(pages: Iterable[ArchivedPage], batch: int) -> Iterator[dict[bytes, list[ArchivedPage]]]:
+    """Up to `batch` distinct hashes at a time, each with its pages. Input in
+    hash order keeps every hash in one group."""
+    group: dict[bytes, list[ArchivedPage]] = {}
+    for page in pages:
+        same = group.get(page.hash)
+        if same is None:
+            if len(group) >= batch:
+                yield group
+                group = {}
+            same = group[page.hash] = []
+        same.append(page)
+    if group:
+        yield group
+
+
+def replay(archive: PageArchive, extractors: list[tuple[str, Extractor]] | None = None,
+           workers: int = 0, pages: Iterable[ArchivedPage] | None = None,
+           batch: int = 256, max_diffs: int = 20) -> ReplayReport:
+    """Re-extract every distinct body in `pages` (default: the whole archive) and
+    compare with the prices recorded when they were fetched. No network.
+    Memory is bounded by `batch` bodies when `pages` come in hash order, as
+    from archive.pages(by_hash=True)."""
+    pages  = archive.pages(by_hash=True) if pages is None else pages
+    report = ReplayReport()
+    pool   = ProcessExtractor(workers) if workers else None
+    started = time.perf_counter()
+    try:
+        for by_hash in _groups(pages, batch):
+            chunk  = list(by_hash)
+            bodies = archive.bodies(chunk)
+            live   = [b for b in bodies if b is not None]
+            if pool is not None:
+                found = iter(pool.map(live, extractors, chunksize=max(1, len(live) // (4 * workers))))
+            else:
+                found = iter([extract(b, extractors) for b in live])
+            for digest, body in zip(chunk, bodies):
+                report.pages += len(by_hash[digest])
+                if body is None:
+                    report.unavailable += len(by_hash[digest])
+                    continue
+                price, name = next(found)
+                report.bodies    += 1
+                report.raw_bytes += len(body)
+                for page in by_hash[digest]:
+                    _tally(report, page, price, name, max_diffs)
+    finally:
+        if pool is not None:
+            pool.close()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def _tally(report: ReplayReport, page: ArchivedPage, price: float | None,
+           name: str | None, max_diffs: int) -> None:
+    old = page.price
+    if price is not None:
+        report.by_extractor[name] += 1
+    if old is None and price is None:
+        report.missing += 1
+        return
+    if old is not None and price is not None and abs(old - price) < 0.005:
+        report.same += 1
+        return
+    if old is not None and page.truncated:
+        report.truncated += 1
+        return
+    if old is None:
+        report.gained += 1
+    elif price is None:
+        report.lost += 1
+    else:
+        report.changed += 1
+    if len(report.diffs) < max_diffs:
+        report.diffs.append((page.product, page.ts, old, price, name))
@@ -0,0 +1,64 @@
+"""
+Product URL canonicalization.
+
+/dp/B0XXXXXXXX, /gp/product/B0XXXXXXXX?ref=..., /Some-Long-Slug/dp/B0XXXXXXXX/
+and the mobile /gp/aw/d/ form all name the same item. canonical_key() maps
+them to "<marketplace>/<ASIN>" (amazon.com/B0XXXXXXXX) and canonical_url() to
+the short https://www.<marketplace>/dp/<ASIN> form. URLs without an ASIN are
+returned unchanged apart from the fragment.
+"""
+
+import re
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+_ASIN_RE = re.compile(
+    r"/(?:dp|gp/product|gp/aw/d|gp/offer-listing|exec/obidos/ASIN|o/ASIN|product-reviews)"
+    r"/([A-Z0-9]{10})(?:[/?#]|$)",
+    re.IGNORECASE,
+)
+
+# scheme, host[:port] and path; cheaper than urlsplit on bulk imports
+_URL_RE = re.compile(r"([a-zA-Z][a-zA-Z0-9+.-]*)://([^/?#]*)([^?#]*)")
+
+# smile., m., www. and the like all serve the same marketplace
+_AMAZON_HOST_RE = re.compile(r"^(?:[a-z0-9-]+\.)*?(amazon\.[a-z.]+)$")
+
+
+def asin(url: str) -> str | None:
+    m = _ASIN_RE.search(urlsplit(url).path)
+    return m.group(1).upper() if m else None
+
+
+def marketplace(url: str) -> str:
+    """amazon.<tld> for Amazon hosts, otherwise the host[:port] as given."""
+    return _market(urlsplit(url).netloc)[0]
+
+
+@lru_cache(maxsize=1024)
+def _market(netloc: str) -> tuple[str, bool]:
+    host = netloc.lower().rsplit("@", 1)[-1]
+    m = _AMAZON_HOST_RE.match(host.split(":", 1)[0])
+    return (m.group(1), True) if m else (host, False)
+
+
+def canonical(url: str) -> tuple[str, str]:
+    """(key, url) with a single parse of `url`."""
+    parts = _URL_RE.match(url)
+    m = _ASIN_RE.search(url, parts.start(3), parts.end(3)) if parts else None
+    if m is None:
+        url = url.split("#", 1)[0]
+        return url, url
+    code = m.group(1).upper()
+    market, amazon = _market(parts.group(2))
+    if amazon:
+        return f"{market}/{code}", f"https://www.{market}/dp/{code}"
+    return f"{market}/{code}", f"{parts.group(1).lower()}://{market}/dp/{code}"
+
+
+def canonical_key(url: str) -> str:
+    return canonical(url)[0]
+
+
+def canonical_url(url: str) -> str:
+    return canonical(url)[1]
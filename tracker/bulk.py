@@ -0,0 +1,237 @@
+"""
+Streaming bulk import of watchlists and export of history.
+
+iter_watchlist() reads CSV (.csv), JSON Lines (.jsonl / .ndjson) or the plain
+"URL [email] [interval]" text format one row at a time. Each row is
+validated and its URL reduced to the canonical marketplace+ASIN form. A row
+repeating a product and email already seen is skipped as a duplicate; a row
+adding another email to a known product is counted as merged and still
+yielded. Bad rows go to an ImportReport instead of stopping the import. The
+only state kept is what has been seen, so memory grows with the number of
+distinct products and recipients, not the file size.
+
+merge_recipients() folds those rows into one WatchItem per product, for
+callers that track products by URL; its email lists every recipient,
+comma-separated, and the Notifier sends each their own email.
+
+export_history() and export_watchlist() write CSV or JSONL straight from a
+cursor / iterator.
+"""
+
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, TextIO
+
+from tracker.asin import canonical
+
+CSV_FIELDS     = ("url", "email", "interval")
+HISTORY_FIELDS = ("product", "ts", "price", "extractor", "latency", "error")
+
+MIN_INTERVAL = 1.0
+
+
+@dataclass
+class WatchItem:
+    url: str
+    email: str
+    interval: float
+    key: str
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    merged: int = 0
+    bad: int = 0
+    errors: list[tuple[int, str, str]] = field(default_factory=list)   # (line, reason, raw)
+    max_errors: int = 100
+    on_bad: Callable[[int, str, str], None] | None = None
+
+    def reject(self, line: int, reason: str, raw) -> None:
+        if not isinstance(raw, str):
+            raw = ",".join(raw)
+        self.bad += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line, reason, raw))
+        if self.on_bad is not None:
+            self.on_bad(line, reason, raw)
+
+    def summary(self) -> str:
+        return (f"{self.rows} rows: {self.imported} imported, "
+                f"{self.merged} merged as extra recipients, "
+                f"{self.duplicates} duplicates, {self.bad} bad")
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    return "text"
+
+
+def _open(path: str, mode: str) -> TextIO:
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+# Row readers yield (line, raw, url, email, interval, error); error is set
+# when the row could not even be split into fields. raw may be the parsed CSV
+# row, joined back up only if the row is rejected.
+
+def _csv_rows(f: TextIO) -> Iterator[tuple]:
+    reader = csv.reader(f)
+    cols   = None
+    while True:
+        line = reader.line_num
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, "", None, None, None, f"bad CSV: {e}"
+            if reader.line_num == line:   # no progress, the reader is stuck
+                return
+            continue
+        if not row or (len(row) == 1 and not row[0].strip()) or row[0].startswith("#"):
+            continue
+        if cols is None:
+            header = [c.strip().lower() for c in row]
+            if "url" in header:
+                cols = [header.index(name) if name in header else None for name in CSV_FIELDS]
+                continue
+            cols = [0, 1, 2]
+        if cols == [0, 1, 2] and len(row) == 3:
+            yield reader.line_num, row, row[0].strip(), row[1].strip(), row[2].strip(), None
+            continue
+        values = [row[c].strip() if c is not None and c < len(row) else None for c in cols]
+        yield reader.line_num, row, *values, None
+
+
+def _jsonl_rows(f: TextIO) -> Iterator[tuple]:
+    for line, raw in enumerate(f, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            obj = json.loads(raw)
+        except ValueError:
+            yield line, raw, None, None, None, "not JSON"
+            continue
+        if not isinstance(obj, dict):
+            yield line, raw, None, None, None, "not a JSON object"
+            continue
+        yield line, raw, obj.get("url"), obj.get("email"), obj.get("interval"), None
+
+
+def _text_rows(f: TextIO) -> Iterator[tuple]:
+    for line, raw in enumerate(f, 1):
+        parts = raw.split("#", 1)[0].replace(",", " ").split()
+        if not parts:
+            continue
+        yield (line, raw.rstrip("\n"), parts[0],
+               parts[1] if len(parts) > 1 else None,
+               parts[2] if len(parts) > 2 else None, None)
+
+
+_READERS = {"csv": _csv_rows, "jsonl": _jsonl_rows, "text": _text_rows}
+
+
+def iter_watchlist(path: str, email: str = "", interval: float = 60,
+                   fmt: str | None = None, report: ImportReport | None = None,
+                   seen: dict | None = None) -> Iterator[WatchItem]:
+    """Valid, first-seen (product, email) rows from `path`, one at a time."""
+    report = report if report is not None else ImportReport()
+    # key -> first email; (key, email) for each further recipient
+    seen   = seen if seen is not None else {}
+    fmt    = fmt or detect_format(path)
+    with _open(path, "r") as f:
+        for line, raw, url, row_email, row_interval, error in _READERS[fmt](f):
+            report.rows += 1
+            if error is not None:
+                report.reject(line, error, raw)
+                continue
+            if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+                report.reject(line, "missing or invalid URL", raw)
+                continue
+            row_email = row_email or email
+            if row_email and (not isinstance(row_email, str) or "@" not in row_email):
+                report.reject(line, "invalid email", raw)
+                continue
+            if row_interval in (None, ""):
+                seconds = interval
+            else:
+                try:
+                    seconds = float(row_interval)
+                except (TypeError, ValueError):
+                    report.reject(line, "invalid interval", raw)
+                    continue
+                if not seconds >= MIN_INTERVAL:
+                    report.reject(line, f"interval below {MIN_INTERVAL:g}s", raw)
+                    continue
+            key, url = canonical(url)
+            first = seen.get(key)
+            if first is None:
+                seen[key] = row_email
+            elif first == row_email or (key, row_email) in seen:
+                report.duplicates += 1
+                continue
+            else:
+                seen[key, row_email] = None
+                report.merged += 1
+                yield WatchItem(url, row_email, seconds, key)
+                continue
+            report.imported += 1
+            yield WatchItem(url, row_email, seconds, key)
+
+
+def merge_recipients(items: Iterable[WatchItem]) -> list[WatchItem]:
+    """One WatchItem per product: every email, comma-separated, and the shortest interval."""
+    merged: dict[str, WatchItem] = {}
+    for item in items:
+        first = merged.get(item.key)
+        if first is None:
+            merged[item.key] = item
+            continue
+        if item.email:
+            first.email = f"{first.email},{item.email}" if first.email else item.email
+        first.interval = min(first.interval, item.interval)
+    return list(merged.values())
+
+
+def _writer(f: TextIO, fmt: str, fields: tuple[str, ...]):
+    if fmt == "csv":
+        w = csv.writer(f)
+        w.writerow(fields)
+        return w.writerow
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    return lambda row: f.write(dumps(dict(zip(fields, row))) + "\n")
+
+
+def write_rows(path: str, rows: Iterable[tuple], fields: tuple[str, ...],
+               fmt: str | None = None) -> int:
+    fmt = fmt or detect_format(path)
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError(f"can only export .csv or .jsonl, not {path!r}")
+    n = 0
+    with _open(path, "w") as f:
+        write = _writer(f, fmt, fields)
+        for row in rows:
+            write(row)
+            n += 1
+    return n
+
+
+def export_watchlist(path: str, items: Iterable, fmt: str | None = None) -> int:
+    """Write WatchItems or engine Products (anything with url/email/interval)."""
+    rows = ((item.url, item.email, item.interval) for item in items)
+    return write_rows(path, rows, CSV_FIELDS, fmt)
+
+
+def export_history(path: str, store, since: float = 0.0, until: float | None = None,
+                   product: str | None = None, fmt: str | None = None) -> int:
+    return write_rows(path, store.iter_checks(since, until, product), HISTORY_FIELDS, fmt)
@@ -0,0 +1,124 @@
+"""
+Request coalescing and a short-lived result cache in front of fetch_price.
+
+SharedFetcher is a drop-in `fetch(url)` for TrackerEngine. URLs are reduced
+to their marketplace+ASIN key first, so every spelling of a product shares:
+
+  * one in-flight fetch: concurrent callers for a key wait for the first
+    caller's result instead of sending their own request;
+  * one recent price: successful results are kept for `ttl` seconds in an
+    LRU of at most `max_entries` keys, and each URL is served a kept result
+    at most once. The URL whose fetch produced it, or one that already had
+    it (including callers that waited on that fetch), fetches again, so a product checked more often than `ttl` still
+    sees every price move.
+
+Results served this way are copies with `cached=True`; the engine doesn't
+count them as checks of their own.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Callable
+
+from tracker import metrics
+from tracker.asin import canonical_key, canonical_url
+from tracker.fetcher import PriceResult, fetch_price
+
+LOOKUPS = metrics.METRICS.counter("fetch_cache_total", "Fetches by cache outcome")
+
+
+class _Entry:
+    __slots__ = ("expires", "result", "served")
+
+    def __init__(self, expires: float, result: PriceResult, served: set[str]):
+        self.expires = expires
+        self.result  = result
+        self.served  = served
+
+
+class _Flight:
+    def __init__(self, url: str):
+        self.done   = threading.Event()
+        self.urls   = {url}          # the leader and every follower, all given the result
+        self.result: PriceResult | None = None
+
+
+class SharedFetcher:
+    def __init__(self, fetch: Callable[[str], PriceResult] = fetch_price,
+                 ttl: float = 30.0, max_entries: int = 10_000, clock=time.monotonic):
+        self.fetch       = fetch
+        self.ttl         = ttl
+        self.max_entries = max_entries
+        self.clock       = clock
+
+        self._cache: OrderedDict[str, _Entry] = OrderedDict()
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+        self.hits      = 0
+        self.coalesced = 0
+        self.misses    = 0
+
+    def __call__(self, url: str) -> PriceResult:
+        key = canonical_key(url)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                if entry.expires <= self.clock():
+                    del self._cache[key]
+                elif url not in entry.served:
+                    entry.served.add(url)
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    LOOKUPS.inc(result="hit")
+                    return replace(entry.result, cached=True, latency=0.0, timings={})
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight(url)
+                self.misses += 1
+            else:
+                flight.urls.add(url)
+                self.coalesced += 1
+        LOOKUPS.inc(result="miss" if leader else "coalesced")
+
+        if not leader:
+            flight.done.wait()
+            return replace(flight.result, cached=True, timings={})
+
+        result = None
+        try:
+            result = self.fetch(canonical_url(url))
+            if not isinstance(result, PriceResult):
+                result = PriceResult(price=result)
+        except Exception as e:
+            result = PriceResult(error=f"{type(e).__name__}: {e}", failure="error")
+        finally:
+            if result is None:
+                result = PriceResult(error="cancelled", failure="error")
+            with self._lock:
+                del self._flights[key]
+                if result.price is not None and self.ttl > 0:
+                    self._cache[key] = _Entry(self.clock() + self.ttl, result, flight.urls)
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+            flight.result = result
+            flight.done.set()
+        return result
+
+    def invalidate(self, url: str) -> None:
+        with self._lock:
+            self._cache.pop(canonical_key(url), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits":      self.hits,
+                "coalesced": self.coalesced,
+                "misses":    self.misses,
+                "entries":   len(self._cache),
+                "in_flight": len(self._flights),
+            }
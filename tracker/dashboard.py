@@ -0,0 +1,152 @@
+"""
+Sorted, filtered rows of a StateTable for the GUI's virtualized dashboard.
+
+DashboardModel reads prices straight from the table's columns. It adds two
+small columns of its own, indexed by product id like the table's: the kind
+of each product's last result and when it arrived. note() records a result
+and marks that product dirty. refresh() rebuilds `order`, the ids to show in
+display order, from the current sort and filter. Only refresh when those
+change or the data under them has moved. The view asks for row() only for
+the ids on screen, and take_dirty() says which of those to redraw. Nothing
+here imports tkinter.
+"""
+
+import math
+import time
+from array import array
+
+from tracker.asin import asin
+
+KINDS      = ("waiting", "start", "same", "drop", "rise", "error")
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+
+# sort key -> column header
+COLUMNS = {
+    "product": "PRODUCT",
+    "current": "CURRENT",
+    "start":   "START",
+    "low":     "LOW",
+    "change":  "CHANGE",
+    "checked": "LAST CHECK",
+    "status":  "STATUS",
+}
+FILTERS = ("all", "drops", "rises", "errors", "waiting")
+
+
+def _money(value: float) -> str:
+    return "—" if value != value else f"${value:,.2f}"
+
+
+class DashboardModel:
+    """Display order, filter and per-row text for every product in `table`."""
+
+    def __init__(self, table):
+        self.table      = table
+        self.sort_key   = "product"
+        self.descending = False
+        self.query      = ""
+        self.filter     = "all"
+        self.order: list[int] = []
+        self._kind  = bytearray()
+        self._seen  = array("d")
+        self._dirty: set[int] = set()
+
+    def note(self, result) -> int | None:
+        """Record a CheckResult; returns its product id, or None if untracked."""
+        product = self.table.get(result.url)
+        if product is None:
+            return None
+        pid  = product.id
+        grow = pid + 1 - len(self._seen)
+        if grow > 0:
+            self._kind.extend(bytes(grow))
+            self._seen.extend([math.nan] * grow)
+        self._kind[pid] = KIND_CODES[result.kind]
+        self._seen[pid] = result.ts or time.time()
+        self._dirty.add(pid)
+        return pid
+
+    def take_dirty(self) -> set[int]:
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def sort_by(self, key: str) -> None:
+        """Sort on `key`; sorting on the current key again flips the direction."""
+        if key == self.sort_key:
+            self.descending = not self.descending
+        else:
+            self.sort_key, self.descending = key, False
+        self.refresh()
+
+    def kind(self, pid: int) -> str:
+        if self.table.column("failures")[pid]:
+            return "error"
+        return KINDS[self._kind[pid]] if pid < len(self._kind) else "waiting"
+
+    def refresh(self) -> list[int]:
+        table = self.table
+        ids   = table.live_ids()
+        if self.query:
+            q, urls = self.query.lower(), table.urls
+            ids = [i for i in ids if q in urls[i].lower()]
+        if self.filter != "all":
+            ids = self._filtered(ids)
+
+        key = self._key()
+        if self.sort_key in ("product", "status"):
+            ids.sort(key=key, reverse=self.descending)
+        else:
+            # unknown values (NaN) go last whichever way round
+            known   = [i for i in ids if key(i) == key(i)]
+            unknown = [i for i in ids if key(i) != key(i)] if len(known) < len(ids) else []
+            known.sort(key=key, reverse=self.descending)
+            ids = known + unknown
+        self.order = ids
+        return ids
+
+    def _filtered(self, ids: list[int]) -> list[int]:
+        kind, failures = self._kind, self.table.column("failures")
+        n = len(kind)
+        if self.filter == "waiting":
+            start = self.table.column("start_price")
+            return [i for i in ids if start[i] != start[i]]
+        if self.filter == "errors":
+            return [i for i in ids if failures[i] or (i < n and kind[i] == KIND_CODES["error"])]
+        want = KIND_CODES["drop" if self.filter == "drops" else "rise"]
+        return [i for i in ids if i < n and kind[i] == want and not failures[i]]
+
+    def _key(self):
+        table = self.table
+        if self.sort_key == "product":
+            return table.urls.__getitem__
+        if self.sort_key == "status":
+            return lambda i: KIND_CODES[self.kind(i)]
+        if self.sort_key == "checked":
+            seen, n = self._seen, len(self._seen)
+            return lambda i: seen[i] if i < n else math.nan
+        if self.sort_key == "change":
+            last, start = table.column("last_price"), table.column("start_price")
+            return lambda i: (last[i] - start[i]) / start[i] if start[i] else math.nan
+        column = {"current": "last_price", "start": "start_price", "low": "low_price"}[self.sort_key]
+        return table.column(column).__getitem__
+
+    def row(self, pid: int) -> tuple[str, ...]:
+        """Display strings for one product, in COLUMNS order."""
+        table = self.table
+        url   = table.urls[pid]
+        last  = table.column("last_price")[pid]
+        start = table.column("start_price")[pid]
+        seen  = self._seen[pid] if pid < len(self._seen) else math.nan
+        if start == start and last == last and start:
+            change = f"{(last - start) / start * 100:+.1f}%"
+        else:
+            change = "—"
+        return (
+            asin(url) or url,
+            _money(last),
+            _money(start),
+            _money(table.column("low_price")[pid]),
+            change,
+            "—" if seen != seen else time.strftime("%H:%M:%S", time.localtime(seen)),
+            self.kind(pid),
+        )
@@ -0,0 +1,302 @@
+"""
+Asyncio tracking engine: one event loop drives every product on the watchlist.
+
+A single dispatcher sleeps until the scheduler's next deadline, then starts
+the due checks, never more than `concurrency` at once. An optional
+FetchPolicy can defer a due check (rate limit, open circuit) and stretch the
+interval after failures (backoff), and an optional AdaptiveIntervals replaces
+each product's fixed interval with one learned from its changes. The blocking
+`fetch(url)` callable (fetch_price by default) runs on a thread pool and each
+result is classified as start / drop / rise / same / error before being
+handed to `on_result`. Scheduler lag (how late each check starts) and queue
+depths are recorded in tracker.metrics. Per-product state lives in a
+tracker.state.StateTable. Results a caching `fetch` marks `cached` move
+prices but don't count as checks: no history row, check_count or interval
+update. A product whose next_due is already set, e.g. by
+a restored tracker.snapshot, keeps that time when the engine starts instead
+of being checked at once. An optional SnapshotStore is saved every
+`snapshots.every` seconds and once more on stop.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from tracker import metrics
+from tracker.fetcher import PriceResult, fetch_price
+from tracker.scheduler import Scheduler
+from tracker.state import Product, StateTable
+
+
+@dataclass
+class CheckResult:
+    url: str
+    email: str
+    kind: str                  # "start", "drop", "rise", "same" or "error"
+    price: float | None
+    last: float | None
+    start: float | None
+    count: int
+    fetch: PriceResult | None = None
+    ts: float = 0.0
+
+    @property
+    def change(self) -> float:
+        if self.price is None or self.last is None:
+            return 0.0
+        return abs(self.price - self.last)
+
+
+class TrackerEngine:
+    """Runs every product's checks on one asyncio loop with a concurrency cap."""
+
+    def __init__(
+        self,
+        fetch: Callable[[str], PriceResult | float | None] = fetch_price,
+        on_result: Callable[[CheckResult], None] | None = None,
+        concurrency: int = 32,
+        history=None,
+        jitter: float = 0.1,
+        policy=None,
+        intervals=None,
+        snapshots=None,
+    ):
+        self.fetch       = fetch
+        self.on_result   = on_result
+        self.concurrency = concurrency
+        self.history     = history
+        self.policy      = policy
+        self.intervals   = intervals
+        self.snapshots   = snapshots
+        self.scheduler   = Scheduler(jitter=jitter)
+        self.state       = StateTable()
+
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._stopped: asyncio.Event | None = None
+        self._thread: threading.Thread | None = None
+        self._stop_requested = False
+        self._snapshot_write: asyncio.Future | None = None
+
+    def add(self, url: str, email: str, interval: float) -> Product:
+        product = self.state.add(url, email, interval)
+        self._call_in_loop(self._enqueue, product)
+        return product
+
+    def remove(self, url: str) -> None:
+        self.state.remove(url)
+        if self.policy is not None:
+            self.policy.forget(url)
+        self._call_in_loop(self._cancel, url)
+
+    def set_interval(self, url: str, interval: float) -> None:
+        product = self.state.get(url)
+        if product is not None and product.interval != interval:
+            self._call_in_loop(self._reschedule, product, interval)
+
+    def products(self) -> list[Product]:
+        return list(self.state)
+
+    def __len__(self) -> int:
+        return len(self.state)
+
+    async def run(self) -> None:
+        """Track until stop() is called. Usable directly from asyncio.run()."""
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                            thread_name_prefix="fetch")
+        self._wake     = asyncio.Event()
+        self._stopped  = asyncio.Event()
+        self._loop     = asyncio.get_running_loop()
+        metrics.METRICS.gauge("in_flight", "Checks running now", fn=lambda: len(self._tasks))
+        metrics.METRICS.gauge("scheduled", "Checks waiting for their due time", fn=self.scheduler.__len__)
+        metrics.METRICS.gauge("products", "Products on the watchlist", fn=self.__len__)
+        if self._stop_requested:
+            self._stopped.set()
+        for product in list(self.state):
+            self._enqueue(product)
+        background = [asyncio.create_task(self._dispatch())]
+        if self.snapshots is not None:
+            background.append(asyncio.create_task(self._snapshot_loop()))
+        try:
+            await self._stopped.wait()
+        finally:
+            for task in background:
+                task.cancel()
+            for task in self._tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
+            if self.snapshots is not None:
+                if self._snapshot_write is not None:
+                    await asyncio.gather(self._snapshot_write, return_exceptions=True)
+                try:
+                    self.snapshots.save(self)
+                except Exception as e:
+                    print("Snapshot error:", e)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._loop = None
+
+    def start(self) -> threading.Thread:
+        """Run the engine on a daemon thread, for callers with their own main loop."""
+        self._stop_requested = False
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),),
+                                        name="tracker-engine", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop_requested = True
+        self._call_in_loop(lambda: self._stopped.set())
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None
+
+    def _call_in_loop(self, fn, *args) -> None:
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(fn, *args)
+        except RuntimeError:
+            pass
+
+    def _enqueue(self, product: Product) -> None:
+        url = product.url
+        if not self.state.holds(product) or url in self._tasks or url in self.scheduler:
+            return
+        if product.next_due is None:
+            product.next_due = self.scheduler.schedule(url, 0, jitter=False)
+        else:
+            self.scheduler.schedule_at(url, product.next_due)
+        self._wake.set()
+
+    def _reschedule(self, product: Product, interval: float) -> None:
+        old, product.interval = product.interval, interval
+        if product.url in self.scheduler and product.next_due is not None:
+            due = product.next_due - old + interval
+            product.next_due = self.scheduler.schedule_at(product.url, due)
+            self._wake.set()
+
+    def _cancel(self, url: str) -> None:
+        self.scheduler.cancel(url)
+        task = self._tasks.pop(url, None)
+        if task is not None:
+            task.cancel()
+
+    async def _dispatch(self) -> None:
+        while True:
+            free = self.concurrency - len(self._tasks)
+            if free > 0:
+                now = self.scheduler.clock()
+                for url in self.scheduler.pop_due(now, limit=free):
+                    product = self.state.get(url)
+                    if product is None or url in self._tasks:
+                        continue
+                    wait = self.policy.admit(url) if self.policy is not None else 0.0
+                    if wait > 0:
+                        product.next_due = self.scheduler.schedule(url, wait)
+                        continue
+                    if product.next_due is not None:
+                        metrics.SCHEDULER_LAG.observe(max(0.0, now - product.next_due))
+                    self._tasks[url] = asyncio.create_task(self._run_check(product))
+                delay = self.scheduler.delay()
+            else:
+                delay = None
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.snapshots.every)
+            payload = self.snapshots.capture(self)
+            # shielded so stop() waits for the write instead of racing the final save
+            self._snapshot_write = asyncio.ensure_future(
+                self._loop.run_in_executor(None, self.snapshots.write, payload))
+            try:
+                await asyncio.shield(self._snapshot_write)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("Snapshot error:", e)
+
+    async def _run_check(self, product: Product) -> None:
+        url    = product.url
+        result = None
+        try:
+            result = await self.check(product)
+        finally:
+            if self._tasks.get(url) is asyncio.current_task():
+                del self._tasks[url]
+                if self.state.holds(product):
+                    delay = self.next_delay(product, result)
+                    product.next_due = self.scheduler.schedule(url, delay)
+            self._wake.set()
+
+    def next_delay(self, product: Product, result: CheckResult | None) -> float:
+        """Seconds until `product`'s next check, given its latest result (None if it failed)."""
+        delay = product.interval
+        if self.intervals is not None and result is not None:
+            if result.fetch.cached:
+                delay = self.intervals.interval(product)
+            else:
+                delay = self.intervals.next_interval(product, result)
+        if self.policy is not None:
+            delay = self.policy.next_delay(product.url, delay)
+        return delay
+
+    async def check(self, product: Product) -> CheckResult:
+        fetched = await self._loop.run_in_executor(self._executor, self.fetch, product.url)
+        if not self.state.holds(product):
+            # removed while the fetch was out; its row may already belong to another URL
+            raise asyncio.CancelledError
+        if not isinstance(fetched, PriceResult):
+            fetched = PriceResult(price=fetched)
+        # a cached result is someone else's request: it moves the price but isn't a check
+        if self.policy is not None and not fetched.cached:
+            self.policy.record(product.url, fetched.price, fetched.status, fetched.blocked)
+        result = self._classify(product, fetched.price, counted=not fetched.cached)
+        self.state.record(product.id, fetched.price)
+        result.fetch = fetched
+        result.ts    = time.time()
+        if self.history is not None and not fetched.cached:
+            self.history.record_result(result)
+        if self.on_result is not None:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                print("Result callback error:", e)
+        return result
+
+    def _classify(self, product: Product, price: float | None, counted: bool = True) -> CheckResult:
+        last = product.last_price
+        if product.start_price is None:
+            if price is None:
+                return CheckResult(product.url, product.email, "error",
+                                   None, None, None, 0)
+            product.start_price = product.last_price = price
+            return CheckResult(product.url, product.email, "start",
+                               price, price, price, 0)
+
+        if counted:
+            product.check_count += 1
+        if price is None:
+            kind = "error"
+        elif price < last:
+            kind = "drop"
+        elif price > last:
+            kind = "rise"
+        else:
+            kind = "same"
+        if price is not None:
+            product.last_price = price
+        return CheckResult(product.url, product.email, kind, price, last,
+                           product.start_price, product.check_count)
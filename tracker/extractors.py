@@ -0,0 +1,225 @@
+"""
+Price extractors, cheapest first.
+
+  scan   regex over the raw bytes for the three price spans, no tree at all
+  lxml   C parser, only if lxml is installed
+  soup   the original BeautifulSoup html.parser path, kept as the fallback
+
+extract() walks the stack and reports which strategy produced the price.
+EXTRACTORS is a plain list so callers can reorder it or plug in their own.
+IncrementalScanner runs the scan over a body as it streams in, and
+is_blocked_page() spots the robot-check page Amazon serves instead of a product.
+ProcessExtractor runs extract() on a process pool so parsing can use every
+core; only the body goes out and only (price, name) comes back.
+"""
+
+import itertools
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+Extractor = Callable[[bytes], float | None]
+
+
+def _class_re(name: bytes) -> re.Pattern:
+    return re.compile(
+        rb'<span[^>]*?\sclass="(?:[^"]*\s)?' + re.escape(name) + rb'(?:\s[^"]*)?"[^>]*>([^<]*)',
+        re.IGNORECASE,
+    )
+
+
+_WHOLE_RE     = _class_re(b"a-price-whole")
+_FRACTION_RE  = _class_re(b"a-price-fraction")
+_OFFSCREEN_RE = _class_re(b"a-offscreen")
+
+_BLOCKED_RE = re.compile(
+    rb"validateCaptcha|Type the characters you see in this image|api-services-support@amazon\.com",
+    re.IGNORECASE,
+)
+
+
+def is_blocked_page(content: bytes) -> bool:
+    return _BLOCKED_RE.search(content) is not None
+
+
+def _whole_fraction(whole: str, fraction: str) -> float:
+    price_str    = whole.strip().replace(",", "").replace(".", "")
+    fraction_str = fraction.strip()
+    return float(f"{price_str}.{fraction_str}")
+
+
+def _offscreen(text: str) -> float:
+    return float(text.strip().replace("$", "").replace(",", ""))
+
+
+def scan_price(content: bytes) -> float | None:
+    whole = _WHOLE_RE.search(content)
+    if whole:
+        fraction = _FRACTION_RE.search(content, whole.end())
+        if fraction:
+            try:
+                return _whole_fraction(whole.group(1).decode("utf-8", "replace"),
+                                       fraction.group(1).decode("utf-8", "replace"))
+            except ValueError:
+                return None
+    offscreen = _OFFSCREEN_RE.search(content)
+    if offscreen:
+        try:
+            return _offscreen(offscreen.group(1).decode("utf-8", "replace"))
+        except ValueError:
+            return None
+    return None
+
+
+class IncrementalScanner:
+    """
+    Scan patterns applied chunk by chunk. feed() returns True once a price is
+    confirmed: whole+fraction as soon as both spans are closed, an a-offscreen
+    price once `settle_bytes` more have arrived without a whole/fraction pair
+    (they normally sit right after it in the same a-price block).
+    """
+
+    OVERLAP = 4096
+
+    def __init__(self, settle_bytes: int = 8192):
+        self.settle_bytes = settle_bytes
+        self.buf          = bytearray()
+        self.price: float | None = None
+        self._scanned   = 0
+        self._whole     = None
+        self._offscreen = None
+
+    def _complete(self, pattern: re.Pattern, start: int):
+        m = pattern.search(self.buf, start)
+        if m and m.end() < len(self.buf):
+            return m
+        return None
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.price is not None:
+            return True
+        self.buf += chunk
+        start = max(0, self._scanned - self.OVERLAP)
+        self._scanned = len(self.buf)
+
+        if self._whole is None:
+            self._whole = self._complete(_WHOLE_RE, start)
+        if self._whole is not None:
+            fraction = self._complete(_FRACTION_RE, max(start, self._whole.end()))
+            if fraction:
+                try:
+                    self.price = _whole_fraction(
+                        self._whole.group(1).decode("utf-8", "replace"),
+                        fraction.group(1).decode("utf-8", "replace"),
+                    )
+                    return True
+                except ValueError:
+                    self._whole = None
+
+        if self._offscreen is None:
+            self._offscreen = self._complete(_OFFSCREEN_RE, start)
+        if (self._offscreen is not None and self._whole is None
+                and len(self.buf) - self._offscreen.end() >= self.settle_bytes):
+            return self.finish() is not None
+        return False
+
+    def finish(self) -> float | None:
+        """Best answer from what has been read; call when the stream ends."""
+        if self.price is None and self._offscreen is not None:
+            try:
+                self.price = _offscreen(self._offscreen.group(1).decode("utf-8", "replace"))
+            except ValueError:
+                self._offscreen = None
+        return self.price
+
+
+def _lxml_first(root, name: str):
+    found = root.xpath(
+        f"//span[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]"
+    )
+    return found[0] if found else None
+
+
+def lxml_price(content: bytes) -> float | None:
+    root = lxml.html.fromstring(content)
+
+    whole    = _lxml_first(root, "a-price-whole")
+    fraction = _lxml_first(root, "a-price-fraction")
+
+    if whole is not None and fraction is not None:
+        return _whole_fraction(whole.text_content(), fraction.text_content())
+
+    offscreen = _lxml_first(root, "a-offscreen")
+    if offscreen is not None:
+        return _offscreen(offscreen.text_content())
+
+    return None
+
+
+def soup_price(content: bytes) -> float | None:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+
+    whole    = soup.find("span", class_="a-price-whole")
+    fraction = soup.find("span", class_="a-price-fraction")
+
+    if whole and fraction:
+        return _whole_fraction(whole.get_text(), fraction.get_text())
+
+    offscreen = soup.find("span", class_="a-offscreen")
+    if offscreen:
+        return _offscreen(offscreen.get_text())
+
+    return None
+
+
+EXTRACTORS: list[tuple[str, Extractor]] = [("scan", scan_price)]
+if lxml is not None:
+    EXTRACTORS.append(("lxml", lxml_price))
+EXTRACTORS.append(("soup", soup_price))
+
+
+def extract(content: bytes,
+            extractors: list[tuple[str, Extractor]] | None = None) -> tuple[float | None, str | None]:
+    """Return (price, name of the extractor that found it), or (None, None)."""
+    for name, fn in extractors or EXTRACTORS:
+        try:
+            price = fn(content)
+        except Exception:
+            continue
+        if price is not None:
+            return price, name
+    return None, None
+
+
+class ProcessExtractor:
+    """extract() on worker processes, callable with the same arguments.
+
+    Extractors are sent by reference, so they must be module-level functions.
+    A body is pickled once into the worker's pipe; nothing else is copied.
+    """
+
+    def __init__(self, workers: int | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        # spawn, not fork: callers are usually multi-threaded by the time they parse
+        self._pool   = ProcessPoolExecutor(max_workers=self.workers,
+                                           mp_context=multiprocessing.get_context("spawn"))
+
+    def __call__(self, content: bytes,
+                 extractors: list[tuple[str, Extractor]] | None = None) -> tuple[float | None, str | None]:
+        return self._pool.submit(extract, content, extractors).result()
+
+    def map(self, bodies, extractors: list[tuple[str, Extractor]] | None = None, chunksize: int = 1):
+        """(price, name) for each body, in order."""
+        return self._pool.map(extract, bodies, itertools.repeat(extractors), chunksize=chunksize)
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,380 @@
+"""
+Shared HTTP layer: one pooled keep-alive session per host, conditional
+requests (ETag / Last-Modified) and per-check connection reuse stats.
+
+In streaming mode the body is fed to an IncrementalScanner chunk by chunk and
+reading stops as soon as a price is confirmed, or once `max_bytes` have been
+read without one. If at most `drain_bytes` of the body are still on the wire
+they are read and discarded so the socket goes back to the pool; otherwise
+the connection is closed, trading a new connect (and TLS handshake) on the
+next check for not downloading the rest of a large page. 304s and HTTP
+errors are released the same way. With `extract_workers` the tree parsers
+run on a process pool (ProcessExtractor) while fetching stays on the
+calling thread.
+With an `archive` (tracker.archive.PageArchive) every body read is handed to
+it along with its outcome.
+
+Every check records per-stage timings (connect, wait, download, parse) and a
+failure reason (timeout, connect, http_<status>, blocked, parse_miss, error)
+on its PriceResult and in tracker.metrics.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.connection import HTTPConnection, HTTPSConnection
+
+from tracker import metrics
+from tracker.extractors import (EXTRACTORS, IncrementalScanner, ProcessExtractor, extract,
+                                is_blocked_page)
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120.0.0.0 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+}
+
+TIMEOUT     = 10
+CHUNK_SIZE  = 16 * 1024
+MAX_BYTES   = 4 * 1024 * 1024
+DRAIN_BYTES = 256 * 1024
+
+# Connections opened (and seconds spent opening them, DNS and TLS included) by
+# the current thread since the last reset; a check runs start to finish on one
+# thread, so this tells us whether it reused a socket.
+_opened = threading.local()
+
+
+def _timed_connect(connect) -> None:
+    started = time.perf_counter()
+    try:
+        connect()
+    finally:
+        _opened.count   = getattr(_opened, "count", 0) + 1
+        _opened.seconds = getattr(_opened, "seconds", 0.0) + time.perf_counter() - started
+
+
+class _CountingHTTPConnection(HTTPConnection):
+    def connect(self):
+        _timed_connect(super().connect)
+
+
+class _CountingHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        _timed_connect(super().connect)
+
+
+class _CountingHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class _CountingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http":  _CountingHTTPPool,
+            "https": _CountingHTTPSPool,
+        }
+
+
+@dataclass
+class PriceResult:
+    price: float | None = None
+    status: int | None = None
+    not_modified: bool = False
+    new_connections: int = 0
+    bytes: int = 0
+    extractor: str | None = None
+    truncated: bool = False
+    blocked: bool = False
+    latency: float = 0.0
+    error: str | None = None
+    failure: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    cached: bool = False
+
+    @property
+    def reused(self) -> bool:
+        return self.status is not None and self.new_connections == 0
+
+
+@dataclass
+class _Validators:
+    etag: str | None
+    last_modified: str | None
+    price: float
+
+
+class SessionPool:
+    """Keep-alive sessions keyed by host, plus the conditional-request cache."""
+
+    def __init__(self, pool_maxsize: int = 32, conditional: bool = True,
+                 stream: bool = True, max_bytes: int = MAX_BYTES, drain_bytes: int = DRAIN_BYTES,
+                 extract_workers: int = 0, archive=None):
+        self.pool_maxsize = pool_maxsize
+        self.conditional  = conditional
+        self.stream       = stream
+        self.max_bytes    = max_bytes
+        self.drain_bytes  = drain_bytes
+        self.extract      = ProcessExtractor(extract_workers) if extract_workers else extract
+        self.archive      = archive
+
+        self._sessions: dict[str, requests.Session] = {}
+        self._validators: dict[str, _Validators] = {}
+        self._lock = threading.Lock()
+
+        self.requests     = 0
+        self.reused       = 0
+        self.opened       = 0
+        self.not_modified = 0
+
+    def session_for(self, url: str) -> requests.Session:
+        host = urlsplit(url).netloc.lower()
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(HEADERS)
+                adapter = _CountingAdapter(pool_connections=1,
+                                           pool_maxsize=self.pool_maxsize)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+        return session
+
+    def get(self, url: str) -> tuple[requests.Response, int]:
+        """GET with stored validators. Returns the response and sockets opened."""
+        headers = {}
+        cached = self._validators.get(url) if self.conditional else None
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        _opened.count   = 0
+        _opened.seconds = 0.0
+        response = self.session_for(url).get(url, headers=headers, timeout=TIMEOUT,
+                                             stream=self.stream)
+        opened = _opened.count
+
+        with self._lock:
+            self.requests += 1
+            if opened:
+                self.opened += opened
+            else:
+                self.reused += 1
+            if response.status_code == 304:
+                self.not_modified += 1
+        return response, opened
+
+    def cached_price(self, url: str) -> float | None:
+        cached = self._validators.get(url)
+        return cached.price if cached is not None else None
+
+    def remember(self, url: str, response: requests.Response, price: float | None) -> None:
+        etag          = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if price is None or not (etag or last_modified):
+            self._validators.pop(url, None)
+            return
+        self._validators[url] = _Validators(etag, last_modified, price)
+
+    def forget(self, url: str) -> None:
+        self._validators.pop(url, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests":     self.requests,
+                "reused":       self.reused,
+                "opened":       self.opened,
+                "not_modified": self.not_modified,
+                "hosts":        len(self._sessions),
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+        if isinstance(self.extract, ProcessExtractor):
+            self.extract.close()
+
+
+default_pool = SessionPool()
+
+
+def _fallbacks() -> list:
+    return [(name, fn) for name, fn in EXTRACTORS if name != "scan"]
+
+
+def _drain(response: requests.Response, limit: int) -> bool:
+    """Read off the rest of a body of at most `limit` wire bytes, freeing its socket."""
+    raw  = response.raw
+    left = raw.length_remaining
+    if left is not None and left > limit:
+        return False
+    read = 0
+    try:
+        while read <= limit:
+            data = raw.read(CHUNK_SIZE, decode_content=False)
+            if not data:
+                return True
+            read += len(data)
+    except Exception:
+        pass
+    return False
+
+
+def _release(response: requests.Response, pool: SessionPool) -> None:
+    """Done with `response` without reading its body (304, HTTP error): keep the
+    socket if what's left is small, close it otherwise."""
+    if pool.stream and pool.drain_bytes > 0:
+        _drain(response, pool.drain_bytes)
+    response.close()
+
+
+def _read_streaming(response: requests.Response, result: PriceResult, pool: SessionPool) -> bytearray:
+    # download covers reading and decompressing the body; parse is the scanner's share
+    scanner = IncrementalScanner()
+    done    = False
+    parse   = 0.0
+    started = time.perf_counter()
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            t = time.perf_counter()
+            found = scanner.feed(chunk)
+            parse += time.perf_counter() - t
+            if found or len(scanner.buf) >= pool.max_bytes:
+                done = True
+                break
+        if done and pool.drain_bytes > 0:
+            _drain(response, pool.drain_bytes)
+    finally:
+        response.close()
+    t = time.perf_counter()
+    result.timings["download"] = t - started - parse
+
+    result.bytes     = len(scanner.buf)
+    result.truncated = done
+    if scanner.finish() is not None:
+        result.price, result.extractor = scanner.price, "scan"
+    else:
+        result.price, result.extractor = pool.extract(bytes(scanner.buf), _fallbacks())
+        if result.price is None:
+            result.blocked = is_blocked_page(scanner.buf)
+    result.timings["parse"] = parse + time.perf_counter() - t
+    return scanner.buf
+
+
+def _read_whole(response: requests.Response, result: PriceResult, pool: SessionPool) -> bytes:
+    started = time.perf_counter()
+    content = response.content
+    t = time.perf_counter()
+    result.timings["download"] = t - started
+    result.bytes = len(content)
+    # the byte scan is cheap enough to run here; only the tree parsers go to pool.extract
+    result.price, result.extractor = extract(content, [e for e in EXTRACTORS if e[0] == "scan"])
+    if result.price is None:
+        result.price, result.extractor = pool.extract(content, _fallbacks())
+    if result.price is None:
+        result.blocked = is_blocked_page(content)
+    result.timings["parse"] = time.perf_counter() - t
+    return content
+
+
+def classify_failure(result: PriceResult, exc: Exception | None = None) -> str | None:
+    """Why a check produced no price, or None if it did."""
+    if exc is not None:
+        if isinstance(exc, requests.Timeout):
+            return "timeout"
+        if isinstance(exc, requests.ConnectionError):
+            return "connect"
+        if result.status is not None and result.status >= 400:
+            return f"http_{result.status}"
+        return "error"
+    if result.price is not None:
+        return None
+    if result.blocked:
+        return "blocked"
+    return "parse_miss"
+
+
+def _observe(result: PriceResult) -> None:
+    metrics.CHECK_SECONDS.observe(result.latency)
+    for stage, seconds in result.timings.items():
+        metrics.STAGE_SECONDS.observe(seconds, stage=stage)
+    if result.failure is not None:
+        metrics.FAILURES.inc(reason=result.failure)
+        metrics.CHECKS.inc(outcome="failed")
+    else:
+        metrics.CHECKS.inc(outcome="not_modified" if result.not_modified else "ok")
+
+
+def fetch_price(url: str, pool: SessionPool | None = None) -> PriceResult:
+    started = time.perf_counter()
+    result  = _fetch(url, pool or default_pool)
+    result.latency = time.perf_counter() - started
+    _observe(result)
+    return result
+
+
+def _fetch(url: str, pool: SessionPool) -> PriceResult:
+    started  = time.perf_counter()
+    result   = PriceResult()
+    response = None
+    try:
+        response, opened = pool.get(url)
+        connect = _opened.seconds
+        result.status          = response.status_code
+        result.new_connections = opened
+        if connect:
+            result.timings["connect"] = connect
+        result.timings["wait"] = time.perf_counter() - started - connect
+
+        if response.status_code == 304:
+            _release(response, pool)
+            result.price        = pool.cached_price(url)
+            result.not_modified = True
+        else:
+            if response.status_code >= 400:
+                _release(response, pool)
+            response.raise_for_status()
+            if pool.stream:
+                body = _read_streaming(response, result, pool)
+            else:
+                body = _read_whole(response, result, pool)
+            pool.remember(url, response, result.price)
+            if pool.archive is not None:
+                pool.archive.add(url, body, result)
+        result.failure = classify_failure(result)
+        return result
+    except Exception as e:
+        pool.forget(url)
+        if result.status is None:
+            result.status = getattr(getattr(e, "response", None), "status_code", None)
+        result.price   = None
+        result.error   = f"{type(e).__name__}: {e}"
+        result.failure = classify_failure(result, e)
+        return result
+    finally:
+        if response is not None:
+            response.close()
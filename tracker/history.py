@@ -0,0 +1,215 @@
+"""
+Price history in an embedded SQLite database (WAL mode).
+
+record() only puts a row on a queue; a single writer thread drains it and
+commits in batches, so the tracker never waits on disk. Readers use their own
+connections and are not blocked by the writer.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+from tracker import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    id        INTEGER PRIMARY KEY,
+    product   TEXT NOT NULL,
+    ts        REAL NOT NULL,
+    price     REAL,
+    extractor TEXT,
+    latency   REAL,
+    error     TEXT
+);
+CREATE INDEX IF NOT EXISTS checks_product_ts ON checks (product, ts);
+
+CREATE TABLE IF NOT EXISTS latest (
+    product TEXT PRIMARY KEY,
+    ts      REAL NOT NULL,
+    price   REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+INSERT_CHECK = """
+INSERT INTO checks (product, ts, price, extractor, latency, error)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+UPSERT_LATEST = """
+INSERT INTO latest (product, ts, price) VALUES (?, ?, ?)
+ON CONFLICT (product) DO UPDATE SET ts = excluded.ts, price = excluded.price
+WHERE excluded.ts >= latest.ts
+"""
+
+_STOP = object()
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class HistoryStore:
+    """Batched, off-thread writer plus indexed queries over past checks."""
+
+    def __init__(self, path: str = "price_history.db",
+                 batch_size: int = 500, flush_interval: float = 0.5):
+        self.path           = path
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+
+        conn = _connect(path)
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._queue: queue.Queue = queue.Queue()
+        metrics.METRICS.gauge("history_queue", "Checks waiting to be written", fn=self.pending)
+        self._readers = threading.local()
+        self.written  = 0
+        self._writer  = threading.Thread(target=self._write_loop,
+                                         name="history-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, product: str, ts: float, price: float | None,
+               extractor: str | None = None, latency: float | None = None,
+               error: str | None = None) -> None:
+        self._queue.put((product, ts, price, extractor, latency, error))
+
+    def record_result(self, result) -> None:
+        """Record an engine CheckResult."""
+        fetched = result.fetch
+        self.record(
+            result.url, result.ts, result.price,
+            fetched.extractor if fetched else None,
+            fetched.latency if fetched else None,
+            fetched.error if fetched else None,
+        )
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Block until every row queued so far has been committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self) -> None:
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def _write_loop(self) -> None:
+        conn = _connect(self.path)
+        stop = False
+        while not stop:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(conn, batch)
+            for waiter in waiters:
+                waiter.set()
+        conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: list[tuple]) -> None:
+        latest = [(row[0], row[1], row[2]) for row in batch if row[2] is not None]
+        try:
+            with conn:
+                conn.executemany(INSERT_CHECK, batch)
+                conn.executemany(UPSERT_LATEST, latest)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            print("History write error:", e)
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = self._readers.conn = _connect(self.path)
+        return conn
+
+    def latest(self, product: str) -> tuple[float, float] | None:
+        """(ts, price) of the most recent successful check, or None."""
+        return self._reader().execute(
+            "SELECT ts, price FROM latest WHERE product = ?", (product,)
+        ).fetchone()
+
+    def latest_all(self) -> dict[str, tuple[float, float]]:
+        rows = self._reader().execute("SELECT product, ts, price FROM latest")
+        return {product: (ts, price) for product, ts, price in rows}
+
+    def iter_checks(self, since: float = 0.0, until: float | None = None,
+                    product: str | None = None):
+        """Stream (product, ts, price, extractor, latency, error) rows in insertion order."""
+        until = time.time() if until is None else until
+        sql, args = "SELECT product, ts, price, extractor, latency, error FROM checks", [since, until]
+        if product is not None:
+            sql += " WHERE product = ? AND ts BETWEEN ? AND ? ORDER BY ts"
+            args.insert(0, product)
+        else:
+            sql += " WHERE ts BETWEEN ? AND ? ORDER BY id"
+        # a private connection, so a slow consumer doesn't hold the shared reader
+        conn = _connect(self.path)
+        try:
+            yield from conn.execute(sql, args)
+        finally:
+            conn.close()
+
+    def series(self, product: str, since: float = 0.0,
+               until: float | None = None) -> list[tuple[float, float | None]]:
+        """(ts, price) rows for one product in [since, until], oldest first."""
+        until = time.time() if until is None else until
+        return self._reader().execute(
+            "SELECT ts, price FROM checks WHERE product = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+            (product, since, until),
+        ).fetchall()
+
+    def series_many(self, products: list[str], since: float = 0.0,
+                    until: float | None = None) -> list[tuple[str, float, float]]:
+        """(product, ts, price) for successful checks of `products`, grouped by
+        product and oldest first within each."""
+        until = time.time() if until is None else until
+        rows  = []
+        for chunk in _chunks(products, 900):
+            marks = ",".join("?" * len(chunk))
+            rows += self._reader().execute(
+                f"SELECT product, ts, price FROM checks WHERE product IN ({marks}) "
+                "AND ts BETWEEN ? AND ? AND price IS NOT NULL ORDER BY product, ts",
+                (*chunk, since, until),
+            ).fetchall()
+        return rows
+
+    def lows(self, products: list[str], until: float | None = None) -> dict[str, float]:
+        """Lowest recorded price of each product that has one, up to `until`."""
+        until = time.time() if until is None else until
+        out   = {}
+        for chunk in _chunks(products, 900):
+            marks = ",".join("?" * len(chunk))
+            out.update(self._reader().execute(
+                f"SELECT product, MIN(price) FROM checks WHERE product IN ({marks}) "
+                "AND ts <= ? AND price IS NOT NULL GROUP BY product",
+                (*chunk, until),
+            ).fetchall())
+        return out
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
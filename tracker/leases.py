@@ -0,0 +1,435 @@
+"""
+Lease-based work queue for running several tracker processes on one watchlist.
+
+The watchlist and every product's state live in one SQLite file (WAL mode)
+that all workers open. `next_due` is the earliest time a row may be claimed.
+A worker claims due rows by writing its id as owner and pushing next_due out
+to the lease deadline, so nobody else can claim them while the lease holds.
+When the check is done the worker writes the new state back, clears the
+owner and sets next_due = now + interval, so a product is never checked
+twice in one interval. Leases of in-flight checks are renewed every
+lease/3 seconds; a worker that dies simply stops renewing, and its products
+become claimable again once the lease runs out.
+
+With AdaptiveIntervals the change-rate estimate (polls, changes, watched,
+checked_at) is stored with each row too, so it keeps learning whichever
+worker checks the product. A --budget needs the whole watchlist in one
+process and isn't supported here.
+
+A completion from a worker that has lost its lease is discarded. Times are
+wall-clock, so hosts sharing the file need synchronised clocks. SQLite
+locking over network filesystems is unreliable, so across machines keep the
+file on one host and run serve() there; workers elsewhere use
+RemoteWorkQueue, which has the same methods over HTTP/JSON.
+"""
+
+import asyncio
+import http.server
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from tracker import metrics
+from tracker.engine import TrackerEngine
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS work (
+    product     TEXT PRIMARY KEY,
+    email       TEXT NOT NULL DEFAULT '',
+    interval    REAL NOT NULL,
+    next_due    REAL NOT NULL DEFAULT 0,
+    owner       TEXT,
+    scheduled   REAL NOT NULL DEFAULT 0,
+    last_price  REAL,
+    start_price REAL,
+    check_count INTEGER NOT NULL DEFAULT 0,
+    checked_at  REAL,
+    polls       REAL NOT NULL DEFAULT 0,
+    changes     REAL NOT NULL DEFAULT 0,
+    watched     REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS work_due ON work (next_due);
+
+CREATE TABLE IF NOT EXISTS workers (
+    id     TEXT PRIMARY KEY,
+    host   TEXT,
+    pid    INTEGER,
+    seen   REAL,
+    checks INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+UPSERT_PRODUCT = """
+INSERT INTO work (product, email, interval) VALUES (?, ?, ?)
+ON CONFLICT (product) DO UPDATE SET email = excluded.email, interval = excluded.interval
+"""
+
+CLAIM = """
+UPDATE work SET owner = ?, next_due = ?
+WHERE product IN (
+    SELECT product FROM work WHERE next_due <= ? ORDER BY next_due LIMIT ?
+)
+RETURNING product, email, interval, scheduled, last_price, start_price, check_count,
+          polls, changes, watched, checked_at
+"""
+
+COMPLETE = """
+UPDATE work SET owner = NULL, next_due = ?1, scheduled = ?1, checked_at = COALESCE(?2, checked_at),
+                last_price = ?3, start_price = ?4, check_count = ?5,
+                polls = ?8, changes = ?9, watched = ?10
+WHERE product = ?6 AND owner = ?7
+"""
+
+HEARTBEAT = """
+INSERT INTO workers (id, host, pid, seen, checks) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET seen = excluded.seen, checks = workers.checks + excluded.checks
+"""
+
+
+# columns added after the first release, created on open if missing
+_ADDED_COLUMNS = ("polls", "changes", "watched")
+
+
+@dataclass
+class Completion:
+    product: list                 # Product.row(): url, email, interval, last, start, count, due
+    next_due: float
+    checked_at: float | None      # None when the check was deferred, not run
+    learned: list                 # polls, changes, watched
+
+
+class WorkQueue:
+    """The shared table of products, due times and leases."""
+
+    def __init__(self, path: str = "work_queue.db"):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                    isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        have = {row[1] for row in self.conn.execute("PRAGMA table_info(work)")}
+        for name in _ADDED_COLUMNS:
+            if name not in have:
+                self.conn.execute(f"ALTER TABLE work ADD COLUMN {name} REAL NOT NULL DEFAULT 0")
+        self._lock = threading.Lock()
+
+    def add(self, url: str, email: str, interval: float) -> None:
+        self.add_many([(url, email, interval)])
+
+    def add_many(self, items) -> int:
+        """Insert or update (url, email, interval) rows; existing state is kept."""
+        n = 0
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for batch in _batches(items, 5000):
+                    self.conn.executemany(UPSERT_PRODUCT, batch)
+                    n += len(batch)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return n
+
+    def remove(self, url: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM work WHERE product = ?", (url,))
+
+    def sync(self, worker: str, done: list[Completion], claim: int,
+             lease: float) -> tuple[list[list], int, float | None]:
+        """One transaction: write back `done`, renew `worker`'s leases, claim up to
+        `claim` due products. Returns (claimed, completions lost, next due time);
+        claimed rows are Product.row() plus polls, changes, watched, checked_at."""
+        now = time.time()
+        claimed, lost = [], 0
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for c in done:
+                    url, _, _, last, start, count, _ = c.product
+                    cur = self.conn.execute(COMPLETE, (
+                        c.next_due, c.checked_at, last, start, count, url, worker, *c.learned,
+                    ))
+                    lost += cur.rowcount == 0
+                self.conn.execute("UPDATE work SET next_due = ? WHERE owner = ?", (now + lease, worker))
+                if claim > 0:
+                    rows = self.conn.execute(CLAIM, (worker, now + lease, now, claim)).fetchall()
+                    for url, email, interval, due, last, start, count, *learned in rows:
+                        claimed.append([url, email, interval, last, start, count, due, *learned])
+                self.conn.execute(HEARTBEAT, (worker, socket.gethostname(), os.getpid(), now,
+                                              sum(c.checked_at is not None for c in done)))
+                nxt = self.conn.execute("SELECT MIN(next_due) FROM work").fetchone()[0]
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return claimed, lost, nxt
+
+    def release(self, worker: str) -> None:
+        """Give back every lease `worker` holds, e.g. on a clean shutdown."""
+        with self._lock:
+            self.conn.execute("UPDATE work SET owner = NULL, next_due = scheduled WHERE owner = ?",
+                              (worker,))
+
+    def stats(self, alive: float = 60.0) -> dict:
+        now = time.time()
+        with self._lock:
+            products, due, leased = self.conn.execute(
+                "SELECT COUNT(*), SUM(next_due <= ?), SUM(owner IS NOT NULL AND next_due > ?) FROM work",
+                (now, now),
+            ).fetchone()
+            workers = self.conn.execute(
+                "SELECT id, host, pid, seen, checks FROM workers WHERE seen > ?", (now - alive,)
+            ).fetchall()
+        return {
+            "products": products,
+            "due":      due or 0,
+            "leased":   leased or 0,
+            "workers":  [dict(zip(("id", "host", "pid", "seen", "checks"), w)) for w in workers],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+
+def _batches(items, size: int):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def serve(queue: WorkQueue, port: int, host: str = "127.0.0.1"):
+    """Expose `queue` to RemoteWorkQueue clients. Serves on a daemon thread."""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, code: int, payload) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, queue.stats())
+            else:
+                self._reply(404, {"error": self.path})
+
+        def do_POST(self):
+            data = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            try:
+                if self.path == "/sync":
+                    done = [Completion(row[:7], row[7], row[8], row[9:12]) for row in data["done"]]
+                    claimed, lost, nxt = queue.sync(data["worker"], done, data["claim"], data["lease"])
+                    self._reply(200, {"claimed": claimed,
+                                      "lost": lost, "next_due": nxt})
+                elif self.path == "/add":
+                    self._reply(200, {"added": queue.add_many(map(tuple, data["items"]))})
+                elif self.path == "/remove":
+                    queue.remove(data["url"])
+                    self._reply(200, {})
+                elif self.path == "/release":
+                    queue.release(data["worker"])
+                    self._reply(200, {})
+                else:
+                    self._reply(404, {"error": self.path})
+            except (KeyError, TypeError, sqlite3.Error) as e:
+                self._reply(400, {"error": str(e)})
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="work-queue-server", daemon=True).start()
+    return server
+
+
+class RemoteWorkQueue:
+    """WorkQueue over HTTP, for workers on other machines than the queue file."""
+
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url     = url.rstrip("/")
+        self.timeout = timeout
+
+    def _call(self, path: str, payload=None):
+        data = None if payload is None else json.dumps(payload).encode()
+        req  = urllib.request.Request(self.url + path, data=data,
+                                      headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.load(resp)
+
+    def add(self, url: str, email: str, interval: float) -> None:
+        self.add_many([(url, email, interval)])
+
+    def add_many(self, items) -> int:
+        added = 0
+        for batch in _batches(items, 5000):
+            added += self._call("/add", {"items": batch})["added"]
+        return added
+
+    def remove(self, url: str) -> None:
+        self._call("/remove", {"url": url})
+
+    def sync(self, worker: str, done: list[Completion], claim: int,
+             lease: float) -> tuple[list[list], int, float | None]:
+        reply = self._call("/sync", {
+            "worker": worker, "claim": claim, "lease": lease,
+            "done":   [c.product + [c.next_due, c.checked_at, *c.learned] for c in done],
+        })
+        return reply["claimed"], reply["lost"], reply["next_due"]
+
+    def release(self, worker: str) -> None:
+        self._call("/release", {"worker": worker})
+
+    def stats(self) -> dict:
+        return self._call("/stats")
+
+    def close(self) -> None:
+        pass
+
+
+def open_queue(target: str):
+    """A RemoteWorkQueue for http(s):// targets, otherwise a WorkQueue on that file."""
+    if target.startswith(("http://", "https://")):
+        return RemoteWorkQueue(target)
+    return WorkQueue(target)
+
+
+def _learned(product) -> list:
+    return [product.polls, product.changes, product.watched]
+
+
+class LeaseWorker(TrackerEngine):
+    """A TrackerEngine whose products come from a shared WorkQueue.
+
+    Checks run exactly as in the engine (fetch on the thread pool, policy,
+    history, on_result); only the scheduling is replaced by claim / complete.
+    """
+
+    def __init__(self, queue, *args, lease: float = 60.0, poll: float = 1.0,
+                 batch_window: float = 0.05, worker_id: str | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.queue        = queue
+        self.lease        = lease
+        self.poll         = poll
+        self.batch_window = batch_window
+        self.worker_id    = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lost         = 0
+        self._done: list[Completion] = []
+
+    def add(self, url: str, email: str, interval: float) -> None:
+        self.queue.add(url, email, interval)
+
+    def remove(self, url: str) -> None:
+        self.queue.remove(url)
+
+    async def run(self) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency,
+                                            thread_name_prefix="fetch")
+        db = ThreadPoolExecutor(max_workers=1, thread_name_prefix="work-queue")
+        self._wake     = asyncio.Event()
+        self._stopped  = asyncio.Event()
+        self._loop     = asyncio.get_running_loop()
+        metrics.METRICS.gauge("in_flight", "Checks running now", fn=lambda: len(self._tasks))
+        if self._stop_requested:
+            self._stopped.set()
+        renew_every = self.lease / 3
+        try:
+            while not self._stopped.is_set():
+                # one transaction covers every completion of the last batch_window
+                await asyncio.sleep(self.batch_window)
+                done, self._done = self._done, []
+                free = self.concurrency - len(self._tasks)
+                try:
+                    claimed, lost, next_due = await self._loop.run_in_executor(
+                        db, self.queue.sync, self.worker_id, done, free, self.lease)
+                except Exception as e:
+                    print("Work queue error:", e)
+                    self._done[:0] = done
+                    claimed, lost, next_due = [], 0, None
+                self.lost += lost
+                now = time.time()
+                for row in claimed:
+                    product = self.state.add(*row[:7])
+                    product.polls, product.changes, product.watched, product.checked_at = row[7:]
+                    if product.next_due:   # the time it was due; 0 until first checked
+                        metrics.SCHEDULER_LAG.observe(max(0.0, now - product.next_due))
+                    self._tasks[product.url] = asyncio.create_task(self._run_lease(product))
+
+                if len(self._tasks) >= self.concurrency or next_due is None:
+                    delay = min(self.poll, renew_every)
+                else:
+                    delay = min(self.poll, renew_every, max(0.0, next_due - now))
+                self._wake.clear()
+                if delay > 0 and not self._done:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
+            done, self._done = self._done, []
+            try:
+                await self._loop.run_in_executor(db, self.queue.sync, self.worker_id, done, 0, self.lease)
+                await self._loop.run_in_executor(db, self.queue.release, self.worker_id)
+            except Exception as e:
+                print("Work queue error:", e)
+            db.shutdown(wait=True)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self.state.clear()
+            self._loop = None
+
+    def stop(self) -> None:
+        self._stop_requested = True
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._stopped.set)
+                loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass
+
+    async def _run_lease(self, product) -> None:
+        url = product.url
+        try:
+            wait = self.policy.admit(url) if self.policy is not None else 0.0
+            if wait > 0:
+                self._done.append(Completion(product.row(), time.time() + wait, None,
+                                             _learned(product)))
+                return
+            try:
+                result = await self.check(product)
+            except Exception as e:
+                # still complete the lease, or sync would renew it for ever
+                print("Check error:", e)
+                result = None
+                if self.policy is not None:
+                    self.policy.record(url, None)
+            delay  = self.next_delay(product, result)
+            now    = time.time()
+            self._done.append(Completion(product.row(), now + delay, now, _learned(product)))
+        finally:
+            self._tasks.pop(url, None)
+            self.state.remove(url)
+            self._wake.set()
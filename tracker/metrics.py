@@ -0,0 +1,216 @@
+"""
+In-process metrics: counters, gauges and fixed-bucket histograms.
+
+Everything records into the module-level METRICS registry. snapshot() is a
+cheap dict for the GUI, keyed by metric name and then label values
+(e.g. snapshot()["check_failures_total"]["timeout"]); render() is the
+Prometheus text format, served by serve() on an optional local port
+(GET /metrics).
+"""
+
+import bisect
+import http.server
+import threading
+from typing import Callable
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels: tuple[tuple[str, str], ...], default: str) -> str:
+    return ",".join(str(v) for _, v in labels) or default
+
+
+def _label_str(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return "{" + inner + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name   = name
+        self.help   = help
+        self.values: dict[tuple, float] = {}
+        self._lock  = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_label_str(key)} {value:g}")
+        return lines
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {_label_key(k, "total"): v for k, v in self.values.items()}
+
+
+class Gauge:
+    """A value that is set directly, or read from `fn` at scrape time."""
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float] | None = None):
+        self.name  = name
+        self.help  = help
+        self.fn    = fn
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def read(self) -> float:
+        if self.fn is not None:
+            try:
+                return float(self.fn())
+            except Exception:
+                return float("nan")
+        return self.value
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {self.read():g}"]
+
+    def snapshot(self) -> float:
+        return self.read()
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS):
+        self.name    = name
+        self.help    = help
+        self.buckets = tuple(buckets)
+        self.series: dict[tuple, list] = {}
+        self._lock   = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def quantile(self, q: float, **labels) -> float | None:
+        """Upper bound of the bucket holding the q-th observation."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.series.get(key)
+            if series is None or series[2] == 0:
+                return None
+            counts, _, total = series[0][:], series[1], series[2]
+        target, seen = q * total, 0
+        for i, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, s[0][:], s[1], s[2]) for k, s in sorted(self.series.items())]
+        for key, counts, total, count in items:
+            running = 0
+            for bound, n in zip(self.buckets, counts):
+                running += n
+                lines.append(f"{self.name}_bucket{_label_str(key + (('le', f'{bound:g}'),))} {running}")
+            lines.append(f"{self.name}_bucket{_label_str(key + (('le', '+Inf'),))} {count}")
+            lines.append(f"{self.name}_sum{_label_str(key)} {total:g}")
+            lines.append(f"{self.name}_count{_label_str(key)} {count}")
+        return lines
+
+    def snapshot(self) -> dict:
+        out = {}
+        for key in list(self.series):
+            labels = dict(key)
+            series = self.series[key]
+            out[_label_key(key, "all")] = {
+                "count": series[2],
+                "mean":  series[1] / series[2] if series[2] else None,
+                "p50":   self.quantile(0.5, **labels),
+                "p99":   self.quantile(0.99, **labels),
+            }
+        return out
+
+
+class Registry:
+    def __init__(self, prefix: str = "price_tracker"):
+        self.prefix  = prefix
+        self.metrics: dict[str, Counter | Gauge | Histogram] = {}
+        self._lock   = threading.Lock()
+
+    def _get(self, cls, name: str, *args, **kwargs):
+        full = f"{self.prefix}_{name}"
+        with self._lock:
+            metric = self.metrics.get(full)
+            if metric is None:
+                metric = self.metrics[full] = cls(full, *args, **kwargs)
+        return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def histogram(self, name: str, help: str = "", buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets)
+
+    def gauge(self, name: str, help: str = "", fn: Callable[[], float] | None = None) -> Gauge:
+        gauge = self._get(Gauge, name, help)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        prefix = len(self.prefix) + 1
+        return {name[prefix:]: metric.snapshot() for name, metric in list(self.metrics.items())}
+
+
+METRICS = Registry()
+
+CHECKS = METRICS.counter("checks_total", "Price checks by outcome")
+FAILURES = METRICS.counter("check_failures_total", "Failed checks by reason")
+STAGE_SECONDS = METRICS.histogram("stage_seconds", "Time spent per check stage")
+CHECK_SECONDS = METRICS.histogram("check_seconds", "End-to-end fetch time per check")
+SCHEDULER_LAG = METRICS.histogram("scheduler_lag_seconds", "How late checks start after they fall due")
+EMAIL_SECONDS = METRICS.histogram("email_send_seconds", "Time per email API call")
+EMAILS = METRICS.counter("emails_total", "Emails by outcome")
+EMAIL_EVENTS = METRICS.counter("email_events_total",
+                               "Notifier events: queued, dropped, sent, retried, failed, ...")
+
+
+def serve(port: int, registry: Registry = METRICS, host: str = "127.0.0.1"):
+    """Serve GET /metrics on a daemon thread. Returns the server."""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,264 @@
+"""
+Email notifications through a bounded queue and a fixed pool of senders.
+
+notify() never blocks the tracker: messages go on a bounded queue (and are
+dropped, counted, if it is full). With a digest window, messages for the same
+recipient that arrive within the window are merged into one email. Failed
+sends are retried with exponential backoff; backends with send_batch() get up
+to `batch_size` messages per API call. close() waits at most its timeout;
+messages still unsent then, or waiting out a retry, are dropped and counted
+as abandoned. A comma-separated recipient list gets
+one email per address.
+
+Point ResendBackend at bench/resend_stub.py (api_url=...) to run without the
+real API.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from tracker import metrics
+
+SENDER = "onboarding@resend.dev"
+
+_STOP = object()
+
+
+@dataclass
+class Message:
+    to: str
+    subject: str
+    html: str
+    attempts: int = 0
+
+
+@contextmanager
+def _timed(mode: str):
+    """Record one API call's duration and outcome in tracker.metrics."""
+    started = time.perf_counter()
+    outcome = "failed"
+    try:
+        yield
+        outcome = "sent"
+    finally:
+        metrics.EMAIL_SECONDS.observe(time.perf_counter() - started, mode=mode)
+        metrics.EMAILS.inc(outcome=outcome, mode=mode)
+
+
+class ResendBackend:
+    def __init__(self, api_key: str = "", api_url: str | None = None, sender: str = SENDER):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.sender  = sender
+
+    def _resend(self):
+        import resend
+        resend.api_key = self.api_key
+        if self.api_url:
+            resend.api_url = self.api_url
+        return resend
+
+    def _payload(self, msg: Message) -> dict:
+        return {
+            "from":    self.sender,
+            "to":      msg.to,
+            "subject": msg.subject,
+            "html":    msg.html,
+        }
+
+    def send(self, msg: Message) -> None:
+        with _timed("single"):
+            self._resend().Emails.send(self._payload(msg))
+
+    def send_batch(self, msgs: list[Message]) -> None:
+        with _timed("batch"):
+            self._resend().Batch.send([self._payload(m) for m in msgs])
+
+
+def digest(msgs: list[Message]) -> Message:
+    """Merge several alerts for one recipient into a single email."""
+    if len(msgs) == 1:
+        return msgs[0]
+    subject = f"{len(msgs)} price changes"
+    items = "\n".join(
+        f'<li style="margin:4px 0">{m.subject}</li>' for m in msgs
+    )
+    html = (
+        f'<div style="font-family:\'Segoe UI\',sans-serif;max-width:500px;margin:auto">'
+        f'<h2 style="margin:0 0 12px">{subject}</h2><ul>{items}</ul></div>'
+        + "".join(m.html for m in msgs)
+    )
+    return Message(msgs[0].to, subject, html)
+
+
+class Notifier:
+    """Fixed worker pool with retry, per-recipient digests and optional batching."""
+
+    def __init__(self, backend, workers: int = 4, digest_window: float = 0.0,
+                 retries: int = 3, retry_delay: float = 2.0,
+                 batch_size: int = 1, max_queue: int = 10_000):
+        self.backend       = backend
+        self.digest_window = digest_window
+        self.retries       = retries
+        self.retry_delay   = retry_delay
+        self.batch_size    = batch_size if hasattr(backend, "send_batch") else 1
+
+        self.counters: Counter = Counter()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._pending: dict[str, list[Message]] = {}
+        self._deadlines: dict[str, float] = {}
+        self._cond    = threading.Condition()
+        self._closed  = threading.Event()
+        self._lock    = threading.Lock()
+        metrics.METRICS.gauge("email_queue", "Emails waiting for a sender", fn=self._queue.qsize)
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"notify-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for w in self._workers:
+            w.start()
+        self._digester = None
+        if digest_window > 0:
+            self._digester = threading.Thread(target=self._digest_loop,
+                                              name="notify-digest", daemon=True)
+            self._digester.start()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[key] += n
+        metrics.EMAIL_EVENTS.inc(n, event=key)
+
+    def notify(self, to: str, subject: str, html: str) -> None:
+        """Queue an email to `to`, which may be several comma-separated addresses."""
+        if not to or self._closed.is_set():
+            return
+        if "," in to:
+            for addr in to.split(","):
+                if addr.strip():
+                    self.notify(addr.strip(), subject, html)
+            return
+        msg = Message(to, subject, html)
+        if self.digest_window <= 0:
+            self._enqueue(msg)
+            return
+        with self._cond:
+            batch = self._pending.setdefault(to, [])
+            if batch:
+                self._count("coalesced")
+            else:
+                self._deadlines[to] = time.monotonic() + self.digest_window
+            batch.append(msg)
+            self._cond.notify()
+
+    def _enqueue(self, msg: Message) -> None:
+        try:
+            self._queue.put_nowait(msg)
+            self._count("queued")
+        except queue.Full:
+            self._count("dropped")
+
+    def _release(self, force: bool = False) -> None:
+        now = time.monotonic()
+        due = [to for to, t in self._deadlines.items() if force or t <= now]
+        for to in due:
+            del self._deadlines[to]
+            self._enqueue(digest(self._pending.pop(to)))
+
+    def _digest_loop(self) -> None:
+        with self._cond:
+            while not self._closed.is_set():
+                self._release()
+                timeout = min(self._deadlines.values(), default=None)
+                if timeout is not None:
+                    timeout = max(0.0, timeout - time.monotonic())
+                self._cond.wait(timeout)
+
+    def _work(self) -> None:
+        while True:
+            msg = self._queue.get()
+            if msg is _STOP:
+                self._queue.task_done()
+                return
+            batch = [msg]
+            while len(batch) < self.batch_size:
+                try:
+                    extra = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is _STOP:
+                    self._queue.task_done()
+                    self._queue.put(_STOP)
+                    break
+                batch.append(extra)
+            self._deliver(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def _deliver(self, batch: list[Message]) -> None:
+        while True:
+            try:
+                if len(batch) > 1:
+                    self.backend.send_batch(batch)
+                    self._count("batches")
+                else:
+                    self.backend.send(batch[0])
+                self._count("sent", len(batch))
+                return
+            except Exception as e:
+                attempt = max(m.attempts for m in batch)
+                if attempt >= self.retries:
+                    self._count("failed", len(batch))
+                    print("Email error:", e)
+                    return
+                for m in batch:
+                    m.attempts += 1
+                self._count("retried", len(batch))
+                if self._closed.wait(self.retry_delay * 2 ** attempt):
+                    self._count("abandoned", len(batch))
+                    return
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Send every pending digest now and wait up to `timeout` seconds (None:
+        for ever) for the queue to drain. Returns whether it did."""
+        with self._cond:
+            self._release(force=True)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = self._queue.all_tasks_done
+        with done:
+            while self._queue.unfinished_tasks:
+                left = None if deadline is None else deadline - time.monotonic()
+                if left is not None and left <= 0:
+                    return False
+                done.wait(left)
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        deadline = time.monotonic() + timeout
+        self.flush(timeout)
+        with self._cond:
+            self._closed.set()
+            self._cond.notify_all()
+        abandoned = 0
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+            abandoned += 1
+        if abandoned:
+            self._count("abandoned", abandoned)
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for w in self._workers:
+            w.join(max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, backlog=self._queue.qsize(),
+                        pending_digests=len(self._pending))
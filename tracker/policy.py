@@ -0,0 +1,198 @@
+"""
+Fetch policy: when a check is allowed to go out, and what to do after it.
+
+  TokenBucket     per-host request rate with a small burst
+  backoff         per-URL exponential backoff with jitter on consecutive failures
+  CircuitBreaker  per-host; opens after repeated 503/429/captcha responses, lets
+                  one probe through after a cooldown, closes on success
+
+Every decision bumps a counter in FetchPolicy.counters and in the
+fetch_policy_total metric, labelled by decision.
+"""
+
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from tracker import metrics
+
+BLOCKED_STATUSES = {429, 503}
+
+DECISIONS = metrics.METRICS.counter("fetch_policy_total", "Fetch policy decisions")
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float, clock=time.monotonic):
+        self.rate   = rate
+        self.burst  = burst
+        self.clock  = clock
+        self.tokens = burst
+        self.stamp  = clock()
+
+    def take(self) -> float:
+        """Consume a token and return 0, or return seconds until one is available."""
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp  = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0,
+                 max_cooldown: float = 1800.0, clock=time.monotonic):
+        self.threshold     = threshold
+        self.base_cooldown = cooldown
+        self.cooldown      = cooldown
+        self.max_cooldown  = max_cooldown
+        self.clock         = clock
+        self.state         = self.CLOSED
+        self.failures      = 0
+        self.open_until    = 0.0
+
+    def allow(self) -> tuple[bool, float]:
+        """(allowed, seconds to wait). A half-open breaker admits a single probe."""
+        if self.state == self.CLOSED:
+            return True, 0.0
+        now = self.clock()
+        if self.state == self.OPEN and now >= self.open_until:
+            self.state = self.HALF_OPEN
+            return True, 0.0
+        return False, max(self.open_until - now, self.cooldown if self.state == self.HALF_OPEN else 0.0)
+
+    def success(self) -> bool:
+        """Returns True if this closed a previously open breaker."""
+        was_open = self.state != self.CLOSED
+        self.state    = self.CLOSED
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        return was_open
+
+    def blocked(self) -> bool:
+        """Returns True if this opened the breaker."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        elif self.state == self.OPEN or self.failures < self.threshold:
+            return False
+        self.state      = self.OPEN
+        self.open_until = self.clock() + self.cooldown
+        return True
+
+
+class FetchPolicy:
+    """Rate limits, backoff and circuit breakers shared by every check."""
+
+    def __init__(self, rate: float = 10.0, burst: float = 20.0,
+                 breaker_threshold: int = 5, breaker_cooldown: float = 60.0,
+                 max_backoff: float = 3600.0, clock=time.monotonic):
+        self.rate              = rate
+        self.burst             = burst
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown  = breaker_cooldown
+        self.max_backoff       = max_backoff
+        self.clock             = clock
+
+        self.counters: Counter = Counter()
+        self._buckets: dict[str, TokenBucket] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._failures: dict[str, int] = {}
+        self._lock = threading.Lock()
+        metrics.METRICS.gauge("open_circuits", "Hosts whose circuit breaker is not closed",
+                              fn=lambda: sum(b.state != CircuitBreaker.CLOSED
+                                             for b in list(self._breakers.values())))
+
+    def _count(self, decision: str) -> None:
+        self.counters[decision] += 1
+        DECISIONS.inc(decision=decision)
+
+    def _bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst, self.clock)
+        return bucket
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                self.breaker_threshold, self.breaker_cooldown, clock=self.clock)
+        return breaker
+
+    def admit(self, url: str) -> float:
+        """0 if the check may go out now, else how long to defer it."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            breaker = self.breaker(host)
+            allowed, wait = breaker.allow()
+            if not allowed:
+                self._count("circuit_rejected")
+                return wait
+            probing = breaker.state == CircuitBreaker.HALF_OPEN
+
+            wait = self._bucket(host).take()
+            if wait > 0:
+                self._count("rate_limited")
+                if probing:
+                    breaker.state = CircuitBreaker.OPEN
+                return wait
+
+            self._count("circuit_probes" if probing else "allowed")
+            return 0.0
+
+    def record(self, url: str, price: float | None, status: int | None = None,
+               blocked: bool = False) -> None:
+        host = urlsplit(url).netloc.lower()
+        blocked = blocked or status in BLOCKED_STATUSES
+        with self._lock:
+            breaker = self.breaker(host)
+            if price is not None:
+                self._failures.pop(url, None)
+                if breaker.success():
+                    self._count("circuit_closed")
+                return
+            self._failures[url] = self._failures.get(url, 0) + 1
+            if blocked:
+                self._count("blocked")
+                if breaker.blocked():
+                    self._count("circuit_opened")
+            elif breaker.success():
+                self._count("circuit_closed")
+
+    def next_delay(self, url: str, interval: float) -> float:
+        """Interval to the next check: the normal one, or a backoff after failures."""
+        failures = self._failures.get(url, 0)
+        if failures <= 1:
+            return interval
+        self._count("backoff")
+        delay = min(self.max_backoff, interval * 2 ** min(failures - 1, 16))
+        return max(interval, random.uniform(delay / 2, delay))
+
+    def failures(self, url: str) -> int:
+        return self._failures.get(url, 0)
+
+    def set_failures(self, url: str, failures: int) -> None:
+        """Restore a failure streak, e.g. from a snapshot."""
+        with self._lock:
+            if failures > 0:
+                self._failures[url] = failures
+            else:
+                self._failures.pop(url, None)
+
+    def forget(self, url: str) -> None:
+        with self._lock:
+            self._failures.pop(url, None)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "open_circuits": sorted(h for h, b in self._breakers.items()
+                                        if b.state != CircuitBreaker.CLOSED),
+            }
@@ -0,0 +1,81 @@
+"""
+Deadline scheduler: a min-heap of (due time, key) shared by every product.
+
+The engine sleeps until next_due() instead of each product polling its own
+timer. Cancelling or rescheduling a key is O(1); the stale heap entry is
+skipped when it surfaces.
+"""
+
+import heapq
+import itertools
+import random
+import time
+
+
+class Scheduler:
+    """Min-heap of next-due times with jitter and lazy cancellation."""
+
+    def __init__(self, jitter: float = 0.1, clock=time.monotonic):
+        self.jitter = jitter
+        self.clock  = clock
+
+        self._heap: list[tuple[float, int, str]] = []
+        self._entries: dict[str, int] = {}
+        self._seq = itertools.count()
+
+    def schedule(self, key: str, delay: float, jitter: bool = True) -> float:
+        """(Re)schedule `key` to run after `delay` seconds, +/- the jitter fraction."""
+        if jitter and self.jitter and delay > 0:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return self.schedule_at(key, self.clock() + max(0.0, delay))
+
+    def schedule_at(self, key: str, due: float) -> float:
+        seq = next(self._seq)
+        self._entries[key] = seq
+        heapq.heappush(self._heap, (due, seq, key))
+        return due
+
+    def cancel(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop_stale(self) -> None:
+        heap = self._heap
+        while heap and self._entries.get(heap[0][2]) != heap[0][1]:
+            heapq.heappop(heap)
+
+    def next_due(self) -> float | None:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def delay(self) -> float | None:
+        """Seconds until the next deadline (0 if overdue), None when empty."""
+        due = self.next_due()
+        return None if due is None else max(0.0, due - self.clock())
+
+    def pop_due(self, now: float | None = None, limit: int | None = None) -> list[str]:
+        now  = self.clock() if now is None else now
+        heap = self._heap
+        due: list[str] = []
+        while heap and (limit is None or len(due) < limit):
+            when, seq, key = heap[0]
+            if self._entries.get(key) != seq:
+                heapq.heappop(heap)
+                continue
+            if when > now:
+                break
+            heapq.heappop(heap)
+            del self._entries[key]
+            due.append(key)
+        if len(heap) > 64 and len(heap) > 4 * len(self._entries):
+            self._compact()
+        return due
+
+    def _compact(self) -> None:
+        self._heap = [e for e in self._heap if self._entries.get(e[2]) == e[1]]
+        heapq.heapify(self._heap)
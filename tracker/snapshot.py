@@ -0,0 +1,180 @@
+"""
+Warm-restart snapshots of the tracker's per-product state.
+
+A snapshot holds every live row of the StateTable: prices, check counts,
+failure streaks, adaptive-interval estimates and next-due times, plus the
+URLs and emails. The file is MAGIC followed by one zlib stream holding a
+JSON header line and then each column's raw bytes. save() writes a
+temporary file in the same directory, fsyncs it and renames it over the
+old one, so a crash leaves the previous snapshot or the new one and never a
+torn file. next_due is stored as wall time because the scheduler's
+monotonic clock starts over with the process.
+
+restore() copies saved state onto products that are already tracked. The
+watchlist still decides what is tracked, with which email and interval.
+Products not yet due keep their due time, capped at one interval from now.
+Overdue ones are spread over `catchup` seconds, or their interval if that is
+shorter, so they don't all fire at once. FetchPolicy failure streaks are
+restored so backoff carries over. Products the snapshot doesn't know are
+checked right away, as on a cold start.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from dataclasses import dataclass
+
+from tracker import metrics
+from tracker.state import COLUMNS
+
+MAGIC   = b"PTSNAP1\n"
+VERSION = 1
+
+SNAPSHOT_SECONDS = metrics.METRICS.histogram("snapshot_seconds", "Time per snapshot stage")
+
+
+@dataclass
+class Snapshot:
+    saved_at: float
+    urls: list[str]
+    emails: list[str]
+    columns: dict[str, array]
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+
+class SnapshotStore:
+    """Periodic, atomic snapshots of a TrackerEngine's StateTable at `path`."""
+
+    def __init__(self, path: str = "tracker_state.snap", every: float = 60.0,
+                 catchup: float = 60.0):
+        self.path    = path
+        self.every   = every
+        self.catchup = catchup
+
+    def capture(self, engine) -> bytes:
+        """Serialise `engine.state`. Call on the engine's loop; it is cheap and
+        gives a consistent view. write() does the slow part."""
+        started = time.perf_counter()
+        table   = engine.state
+        now     = time.time()
+        offset  = now - engine.scheduler.clock()
+        if len(table) == len(table.urls):          # no free rows: copy columns whole
+            ids, urls = None, list(table.urls)
+        else:
+            ids  = table.live_ids()
+            urls = [table.urls[i] for i in ids]
+        header = {
+            "version":   VERSION,
+            "saved_at":  now,
+            "byteorder": sys.byteorder,
+            "columns":   COLUMNS,
+            "urls":      urls,
+            "emails":    [table.emails[i] for i in ids] if ids is not None else table.emails,
+        }
+        parts = [json.dumps(header, separators=(",", ":")).encode(), b"\n"]
+        for name, code in COLUMNS.items():
+            col  = table.column(name)
+            live = array(code, col if ids is None else [col[i] for i in ids])
+            if name == "next_due":
+                live = array(code, [v + offset for v in live])      # NaN stays NaN
+            parts.append(live.tobytes())
+        SNAPSHOT_SECONDS.observe(time.perf_counter() - started, stage="capture")
+        return b"".join(parts)
+
+    def write(self, payload: bytes) -> None:
+        """Compress `payload` and atomically replace the snapshot file with it."""
+        started   = time.perf_counter()
+        data      = MAGIC + zlib.compress(payload, 1)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp   = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        if hasattr(os, "O_DIRECTORY"):
+            dfd = os.open(directory, os.O_DIRECTORY)
+            try:
+                os.fsync(dfd)
+            finally:
+                os.close(dfd)
+        SNAPSHOT_SECONDS.observe(time.perf_counter() - started, stage="write")
+
+    def save(self, engine) -> None:
+        self.write(self.capture(engine))
+
+    def load(self) -> Snapshot | None:
+        """The saved snapshot, or None if there is none. Raises ValueError if
+        the file is not a readable snapshot."""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if not data.startswith(MAGIC):
+            raise ValueError(f"{self.path} is not a tracker snapshot")
+        try:
+            payload = zlib.decompress(data[len(MAGIC):])
+            line, _, body = payload.partition(b"\n")
+            header = json.loads(line)
+        except (zlib.error, ValueError) as e:
+            raise ValueError(f"{self.path} is corrupt: {e}") from None
+        if header.get("version") != VERSION:
+            raise ValueError(f"{self.path} has unsupported version {header.get('version')}")
+
+        n, pos  = len(header["urls"]), 0
+        columns = {}
+        for name, code in header["columns"].items():
+            col  = array(code)
+            size = col.itemsize * n
+            if pos + size > len(body):
+                raise ValueError(f"{self.path} is truncated")
+            col.frombytes(body[pos:pos + size])
+            if header["byteorder"] != sys.byteorder:
+                col.byteswap()
+            pos += size
+            if COLUMNS.get(name) == code:          # columns this version doesn't know are skipped
+                columns[name] = col
+        return Snapshot(header["saved_at"], header["urls"], header["emails"], columns)
+
+    def restore(self, engine, snapshot: Snapshot) -> int:
+        """Copy `snapshot` onto the products `engine` already tracks, before
+        engine.run(). Returns how many products were restored."""
+        table     = engine.state
+        now       = time.time()
+        mono      = engine.scheduler.clock()
+        cols      = snapshot.columns
+        copy      = [(table.column(name), col) for name, col in cols.items()
+                     if name not in ("interval", "next_due")]
+        intervals = table.column("interval")
+        next_due  = table.column("next_due")
+        restored  = 0
+        for row, (url, pid) in enumerate(zip(snapshot.urls, table.ids(snapshot.urls))):
+            if pid is None:
+                continue
+            for dst, src in copy:
+                dst[pid] = src[row]
+            interval = intervals[pid]
+            due = cols["next_due"][row] if "next_due" in cols else float("nan")
+            if due == due:
+                if due < now:
+                    due = now + random.uniform(0, min(interval, self.catchup))
+                next_due[pid] = min(due, now + interval) - now + mono
+            if engine.policy is not None and "failures" in cols:
+                engine.policy.set_failures(url, cols["failures"][row])
+            restored += 1
+        return restored
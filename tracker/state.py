@@ -0,0 +1,222 @@
+"""
+Compact per-product state for large watchlists.
+
+StateTable keeps each field in its own typed array (the stdlib array module)
+indexed by a small integer product id, rather than one Python object per
+product. Prices and times are float64 with NaN standing for "none yet".
+Identical email strings are stored once. Ids of removed products are
+reused. Product is a __slots__ handle (table, id, url) whose attributes
+read and write the table, so engine code works on it like a plain record.
+
+column() returns the live array for bulk work; take() and ids() look up many
+products at once.
+"""
+
+import math
+from array import array
+from typing import Iterable
+
+NAN = float("nan")
+
+# name -> array typecode; failures saturates at 65535
+COLUMNS = {
+    "interval":    "d",
+    "last_price":  "d",
+    "start_price": "d",
+    "low_price":   "d",
+    "next_due":    "d",
+    "check_count": "I",
+    "failures":    "H",
+    "polls":       "d",      # decayed count of successful checks
+    "changes":     "d",      # decayed count of those that saw a new price
+    "watched":     "d",      # decayed seconds of observation behind `changes`
+    "checked_at":  "d",      # wall time of the last successful check
+}
+_FLOATS = frozenset(name for name, code in COLUMNS.items() if code == "d")
+
+
+def _opt(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+class StateTable:
+    """Column-per-field state for every tracked product."""
+
+    def __init__(self):
+        self.urls: list[str | None] = []
+        self.emails: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._free: list[int] = []
+        self._email_pool: dict[str, str] = {}
+        self._cols = {name: array(code) for name, code in COLUMNS.items()}
+
+    def add(self, url: str, email: str = "", interval: float = 60.0,
+            last_price: float | None = None, start_price: float | None = None,
+            check_count: int = 0, next_due: float | None = None) -> "Product":
+        """Insert `url`, or update email/interval if it is already tracked."""
+        email = self._email_pool.setdefault(email, email)
+        pid   = self._ids.get(url)
+        cols  = self._cols
+        if pid is not None:
+            self.emails[pid] = email
+            cols["interval"][pid] = interval
+            return Product(self, pid, url)
+        values = {
+            "interval":    interval,
+            "last_price":  NAN if last_price is None else last_price,
+            "start_price": NAN if start_price is None else start_price,
+            "low_price":   NAN if last_price is None else last_price,
+            "next_due":    NAN if next_due is None else next_due,
+            "check_count": check_count,
+            "failures":    0,
+            "polls":       0.0,
+            "changes":     0.0,
+            "watched":     0.0,
+            "checked_at":  NAN,
+        }
+        if self._free:
+            pid = self._free.pop()
+            self.urls[pid]   = url
+            self.emails[pid] = email
+            for name, value in values.items():
+                cols[name][pid] = value
+        else:
+            pid = len(self.urls)
+            self.urls.append(url)
+            self.emails.append(email)
+            for name, value in values.items():
+                cols[name].append(value)
+        self._ids[url] = pid
+        return Product(self, pid, url)
+
+    def remove(self, url: str) -> bool:
+        pid = self._ids.pop(url, None)
+        if pid is None:
+            return False
+        self.urls[pid]   = None
+        self.emails[pid] = ""
+        self._free.append(pid)
+        return True
+
+    def clear(self) -> None:
+        self.urls.clear()
+        self.emails.clear()
+        self._ids.clear()
+        self._free.clear()
+        self._email_pool.clear()
+        for col in self._cols.values():
+            del col[:]
+
+    def get(self, url: str) -> "Product | None":
+        pid = self._ids.get(url)
+        return None if pid is None else Product(self, pid, url)
+
+    def holds(self, product: "Product") -> bool:
+        """True while `product`'s row still belongs to its URL."""
+        return product.table is self and self._ids.get(product.url) == product.id
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self):
+        # list() copies the map in one step, so an add() from another thread
+        # can't change its size mid-iteration
+        return (Product(self, pid, url) for url, pid in list(self._ids.items()))
+
+    def ids(self, urls: Iterable[str]) -> list[int | None]:
+        get = self._ids.get
+        return [get(url) for url in urls]
+
+    def column(self, name: str) -> array:
+        """The live array for `name`, indexed by product id. Rows of removed
+        products hold stale values; use live_ids() to select current ones."""
+        return self._cols[name]
+
+    def live_ids(self) -> list[int]:
+        return list(self._ids.values())
+
+    def take(self, name: str, urls: Iterable[str]) -> list:
+        """`name` for each URL in order; None for untracked URLs and NaN floats."""
+        col, get = self._cols[name], self._ids.get
+        if name not in _FLOATS:
+            return [None if pid is None else col[pid] for pid in map(get, urls)]
+        # v != v only for NaN
+        return [None if pid is None or (v := col[pid]) != v else v for pid in map(get, urls)]
+
+    def record(self, pid: int, price: float | None) -> None:
+        """Fold one check's price into low_price and the failure streak."""
+        cols = self._cols
+        if price is None:
+            failures = cols["failures"]
+            if failures[pid] < 0xFFFF:
+                failures[pid] += 1
+            return
+        cols["failures"][pid] = 0
+        low = cols["low_price"][pid]
+        if not price >= low:       # also true while low is NaN
+            cols["low_price"][pid] = price
+
+    def nbytes(self) -> int:
+        """Bytes held by the typed columns (not the URL strings or the id map)."""
+        return sum(col.itemsize * col.buffer_info()[1] for col in self._cols.values())
+
+
+def _field(name: str, optional: bool) -> property:
+    def get(self):
+        value = self.table._cols[name][self.id]
+        return _opt(value) if optional else value
+
+    def set(self, value):
+        self.table._cols[name][self.id] = NAN if value is None else value
+
+    return property(get, set)
+
+
+class Product:
+    """One row of a StateTable."""
+
+    __slots__ = ("table", "id", "url")
+
+    def __init__(self, table: StateTable, pid: int, url: str):
+        self.table = table
+        self.id    = pid
+        self.url   = url
+
+    @property
+    def email(self) -> str:
+        return self.table.emails[self.id]
+
+    @email.setter
+    def email(self, value: str) -> None:
+        self.table.emails[self.id] = self.table._email_pool.setdefault(value, value)
+
+    interval    = _field("interval", False)
+    last_price  = _field("last_price", True)
+    start_price = _field("start_price", True)
+    low_price   = _field("low_price", True)
+    next_due    = _field("next_due", True)
+    check_count = _field("check_count", False)
+    failures    = _field("failures", False)
+    polls       = _field("polls", False)
+    changes     = _field("changes", False)
+    watched     = _field("watched", False)
+    checked_at  = _field("checked_at", True)
+
+    def row(self) -> list:
+        """[url, email, interval, last_price, start_price, check_count, next_due]"""
+        return [self.url, self.email, self.interval, self.last_price,
+                self.start_price, self.check_count, self.next_due]
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, Product) and other.table is self.table
+                and other.id == self.id and other.url == self.url)
+
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.id))
+
+    def __repr__(self) -> str:
+        return (f"Product({self.url!r}, {self.email!r}, {self.interval!r}, "
+                f"last_price={self.last_price!r}, check_count={self.check_count!r})")